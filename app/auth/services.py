@@ -4,7 +4,6 @@ import io
 from datetime import datetime, timedelta
 from typing import Optional
 
-import qrcode
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import pyotp
@@ -79,6 +78,8 @@ def verify_totp(secret: str, token: str) -> bool:
 
 def generate_qr_base64(uri: str, size: int = 200) -> str:
     """Generate QR code image as base64 data URL."""
+    import qrcode  # pulls in PIL; only needed while setting up 2FA
+
     qr = qrcode.QRCode(version=1, box_size=10, border=2)
     qr.add_data(uri)
     qr.make(fit=True)
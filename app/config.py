@@ -8,7 +8,7 @@ load_dotenv()
 
 # Base path
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATA_DIR = BASE_DIR / "data"
+DATA_DIR = Path(os.getenv("DATA_DIR", str(BASE_DIR / "data")))  # DB SQLite, file lock, trạng thái breaker
 LOG_DIR = Path(os.getenv("LOG_DIR", str(BASE_DIR / "logs")))
 
 # Ensure directories exist
@@ -29,7 +29,72 @@ DATABASE_URL = os.getenv(
 # Log settings
 MAX_LOG_SIZE_MB = int(os.getenv("MAX_LOG_SIZE_MB", "10"))
 LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "30"))
+# Lưu trữ log cronjob cũ: log cũ hơn N ngày chuyển sang file SQLite theo tháng (nén, chỉ đọc)
+# trong LOG_ARCHIVE_DIR thay vì bị xóa theo LOG_RETENTION_DAYS (0 = tắt, giữ cách xóa cũ).
+# Khi bật, LOG_RETENTION_DAYS không còn áp dụng cho log cronjob: thời gian giữ do LOG_ARCHIVE_KEEP_MONTHS quyết định
+LOG_ARCHIVE_AFTER_DAYS = int(os.getenv("LOG_ARCHIVE_AFTER_DAYS", "0"))
+LOG_ARCHIVE_DIR = Path(os.getenv("LOG_ARCHIVE_DIR", str(DATA_DIR / "archive")))
+LOG_ARCHIVE_KEEP_MONTHS = int(os.getenv("LOG_ARCHIVE_KEEP_MONTHS", "12"))  # xóa file lưu trữ cũ hơn N tháng (0 = giữ mãi, không giới hạn dung lượng)
+LOG_ARCHIVE_INTERVAL = float(os.getenv("LOG_ARCHIVE_INTERVAL", "3600"))  # giây giữa các lần chuyển
+LOG_ARCHIVE_BATCH_SIZE = int(os.getenv("LOG_ARCHIVE_BATCH_SIZE", "2000"))
+# Log của ứng dụng: LOG_DIR/app.log, xoay vòng khi đạt MAX_LOG_SIZE_MB, giữ LOG_BACKUP_COUNT file cũ
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").strip().lower()  # text | json (mỗi dòng một object JSON)
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# Chống spam log: tối đa N dòng giống nhau mỗi LOG_RATE_LIMIT_WINDOW giây cho cùng một chỗ gọi log (0 = tắt).
+# ERROR trở lên không bao giờ bị bỏ
+LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", "20"))
+LOG_RATE_LIMIT_WINDOW = float(os.getenv("LOG_RATE_LIMIT_WINDOW", "60"))
+
+# Nén gzip response JSON (và trang, file tĩnh) từ N byte trở lên
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
 
 # VNC - WebSocket URL (websockify), ví dụ: ws://localhost:6080
 # Bạn tự cài VNC server (TigerVNC, x11vnc) + websockify, đăng nhập do bạn cấu hình
 VNC_WS_URL = os.getenv("VNC_WS_URL", "")
+
+# Metrics (/metrics) - để trống METRICS_TOKEN thì cần đăng nhập như các API khác
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_LOOP_PROBE_INTERVAL = float(os.getenv("METRICS_LOOP_PROBE_INTERVAL", "0.5"))
+# Thêm nhãn cronjob_id vào panel_cronjob_runs_total: mỗi job một series, chỉ bật khi số job nhỏ
+METRICS_PER_JOB = os.getenv("METRICS_PER_JOB", "false").lower() == "true"
+
+# Scheduler backend: apscheduler (mặc định) | heap (cho 10k+ cronjob)
+SCHEDULER_BACKEND = os.getenv("SCHEDULER_BACKEND", "apscheduler").strip().lower()
+
+# Số uvicorn worker (run.py). Chỉ worker giữ lock DATA_DIR/scheduler.lock chạy scheduler;
+# worker khác thay thế sau tối đa LEADER_POLL_INTERVAL giây nếu leader chết
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))
+LEADER_POLL_INTERVAL = float(os.getenv("LEADER_POLL_INTERVAL", "2"))
+
+# Thực thi cronjob: inline (trong event loop của web) | process (process executor riêng, nhận qua queue)
+EXECUTOR_MODE = os.getenv("EXECUTOR_MODE", "inline").strip().lower()
+# Khi tắt: chờ tối đa N giây cho các lần chạy đang dở trong executor process
+EXECUTOR_DRAIN_TIMEOUT = float(os.getenv("EXECUTOR_DRAIN_TIMEOUT", "30"))
+
+# Lần chạy bị lỡ (server tắt / event loop bị treo): lần chạy trễ hơn N giây coi như bị lỡ
+MISFIRE_GRACE_SECONDS = float(os.getenv("MISFIRE_GRACE_SECONDS", "30"))
+# Chạy bù khi khởi động: tối đa N lần chạy mỗi giây; replay_all giữ tối đa N lần gần nhất mỗi job
+MISFIRE_CATCHUP_RATE = float(os.getenv("MISFIRE_CATCHUP_RATE", "2"))
+MISFIRE_REPLAY_MAX = int(os.getenv("MISFIRE_REPLAY_MAX", "100"))
+
+# Chuỗi phụ thuộc cronjob (DAG): số job chạy song song tối đa trong một lần chạy đồ thị
+WORKFLOW_MAX_PARALLEL = int(os.getenv("WORKFLOW_MAX_PARALLEL", "4"))
+
+# Circuit breaker theo host: mở sau N lỗi kết nối/timeout liên tiếp, thử lại (half-open) sau N giây
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+# Trần thời gian chờ giữa các lần retry
+RETRY_MAX_BACKOFF_SECONDS = float(os.getenv("RETRY_MAX_BACKOFF_SECONDS", "60"))
+
+# Fleet: agent (FLEET_TOKEN đặt thì bật GET /api/fleet/agent/snapshot cho aggregator gọi, Bearer token)
+FLEET_TOKEN = os.getenv("FLEET_TOKEN", "")
+# Aggregator: danh sách agent "tên=url,tên=url" và/hoặc file JSON [{"name", "url", "timeout", "token"}]
+FLEET_AGENTS = os.getenv("FLEET_AGENTS", "")
+FLEET_AGENTS_FILE = Path(os.getenv("FLEET_AGENTS_FILE", str(DATA_DIR / "fleet_agents.json")))
+FLEET_POLL_INTERVAL = float(os.getenv("FLEET_POLL_INTERVAL", "15"))
+FLEET_AGENT_TIMEOUT = float(os.getenv("FLEET_AGENT_TIMEOUT", "5"))  # mặc định cho mỗi agent
+FLEET_CONCURRENCY = int(os.getenv("FLEET_CONCURRENCY", "50"))  # số agent được poll cùng lúc
+
+# Quét dung lượng thư mục (dashboard): số thread đọc thư mục song song
+DISK_SCAN_WORKERS = int(os.getenv("DISK_SCAN_WORKERS", "8"))
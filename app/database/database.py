@@ -1,15 +1,27 @@
 """Database connection and session management."""
+import logging
+import time
+import zlib
 from collections.abc import AsyncGenerator
 
+from sqlalchemy import event, inspect, text
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 
 from app.config import DATABASE_URL
 from app.database.models import Base
 
+logger = logging.getLogger(__name__)
+
+# Giây chờ khi một connection khác đang ghi (SQLite khóa cả file khi ghi)
+SQLITE_BUSY_TIMEOUT = 30
+
 # SQLite requires different connect args for async
 connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
+if DATABASE_URL.startswith("sqlite") and (":memory:" in DATABASE_URL or "mode=memory" in DATABASE_URL):
+    # In-memory DB exists only on its one connection
     connect_args = {"check_same_thread": False}
     engine = create_async_engine(
         DATABASE_URL,
@@ -17,6 +29,17 @@ if DATABASE_URL.startswith("sqlite"):
         poolclass=StaticPool,
         echo=False,
     )
+elif DATABASE_URL.startswith("sqlite"):
+    # One connection per session: concurrent runs (DAG nodes, overlapping schedules) each get their
+    # own transaction. WAL lets readers run while one connection writes; writers wait up to the timeout.
+    connect_args = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT}
+    engine = create_async_engine(DATABASE_URL, connect_args=connect_args, echo=False)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _sqlite_wal(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
 else:
     engine = create_async_engine(DATABASE_URL, echo=False)
 
@@ -29,10 +52,111 @@ async_session = async_sessionmaker(
 )
 
 
+def _add_missing_columns(sync_conn) -> None:
+    """Add columns introduced after a table was created (create_all does not alter tables)."""
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=sync_conn.dialect)}"
+            if column.server_default is not None:
+                default = column.server_default.arg
+                ddl += f" DEFAULT {default.text if hasattr(default, 'text') else repr(str(default))}"
+            sync_conn.execute(text(ddl))
+
+
+def _add_missing_indexes(sync_conn) -> None:
+    """Create indexes declared after a table was created (create_all only indexes new tables)."""
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                started = time.perf_counter()
+                index.create(sync_conn)
+                logger.info(
+                    f"Created index {index.name} in {time.perf_counter() - started:.1f}s"
+                )
+
+
+# FTS5 index over cronjob_logs.output / error (external content: the index stores tokens only).
+# Triggers keep it in sync with inserts, retention deletes and cascades.
+LOG_SEARCH_TABLE = "cronjob_logs_fts"
+_LOG_SEARCH_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {LOG_SEARCH_TABLE} USING fts5(
+        output, error, content='cronjob_logs', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {LOG_SEARCH_TABLE}_ai AFTER INSERT ON cronjob_logs
+    WHEN new.output IS NOT NULL OR new.error IS NOT NULL BEGIN
+        INSERT INTO {LOG_SEARCH_TABLE}(rowid, output, error) VALUES (new.id, new.output, new.error);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {LOG_SEARCH_TABLE}_ad AFTER DELETE ON cronjob_logs
+    WHEN old.output IS NOT NULL OR old.error IS NOT NULL BEGIN
+        INSERT INTO {LOG_SEARCH_TABLE}({LOG_SEARCH_TABLE}, rowid, output, error)
+        VALUES ('delete', old.id, old.output, old.error);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {LOG_SEARCH_TABLE}_au AFTER UPDATE OF output, error ON cronjob_logs BEGIN
+        INSERT INTO {LOG_SEARCH_TABLE}({LOG_SEARCH_TABLE}, rowid, output, error)
+        SELECT 'delete', old.id, old.output, old.error WHERE old.output IS NOT NULL OR old.error IS NOT NULL;
+        INSERT INTO {LOG_SEARCH_TABLE}(rowid, output, error)
+        SELECT new.id, new.output, new.error WHERE new.output IS NOT NULL OR new.error IS NOT NULL;
+    END""",
+)
+
+
+def _ensure_log_search_index(sync_conn) -> None:
+    """Create the log FTS index (SQLite with FTS5 only) and fill it from existing rows when new."""
+    if sync_conn.dialect.name != "sqlite":
+        return
+    exists = sync_conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": LOG_SEARCH_TABLE}
+    ).first()
+    try:
+        for ddl in _LOG_SEARCH_DDL:
+            sync_conn.execute(text(ddl))
+    except OperationalError as e:
+        logger.warning(f"Log search index unavailable (SQLite without FTS5?): {e}")
+        return
+    if not exists:
+        sync_conn.execute(text(f"INSERT INTO {LOG_SEARCH_TABLE}({LOG_SEARCH_TABLE}) VALUES ('rebuild')"))
+
+
+def schema_version(dialect) -> int:
+    """Fingerprint of the DDL the app expects; changes whenever a model, index or the FTS setup changes."""
+    ddl = []
+    for table in Base.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        ddl.extend(str(CreateIndex(index).compile(dialect=dialect)) for index in sorted(table.indexes, key=lambda i: i.name))
+    ddl.extend(_LOG_SEARCH_DDL)
+    return zlib.crc32("\n".join(ddl).encode()) & 0x7FFFFFFF  # PRAGMA user_version is a signed 32-bit int
+
+
+def _migrate(sync_conn) -> bool:
+    """Create / upgrade the schema unless SQLite's user_version says it is current. True when work was done."""
+    sqlite = sync_conn.dialect.name == "sqlite"
+    version = schema_version(sync_conn.dialect)
+    if sqlite and sync_conn.execute(text("PRAGMA user_version")).scalar() == version:
+        return False
+    Base.metadata.create_all(sync_conn)
+    _add_missing_columns(sync_conn)
+    _add_missing_indexes(sync_conn)
+    _ensure_log_search_index(sync_conn)
+    if sqlite:
+        sync_conn.execute(text(f"PRAGMA user_version = {version}"))
+    return True
+
+
 async def init_db() -> None:
-    """Initialize database tables."""
+    """Initialize database tables (skipped when the stored schema version matches)."""
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        if not await conn.run_sync(_migrate):
+            logger.debug("Database schema is current, skipping create_all")
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
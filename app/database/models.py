@@ -2,7 +2,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, Integer, String, Text, ForeignKey, func
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, Text, ForeignKey, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -36,6 +36,27 @@ class Cronjob(Base):
     cron_expression: Mapped[str] = mapped_column(String(100), nullable=False)
     enabled: Mapped[bool] = mapped_column(Boolean, default=True)
     enable_log: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Fire-time spreading: runs start spread_offset seconds after the cron slot (0 <= offset < spread_seconds)
+    spread_seconds: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    spread_offset: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Per-job HTTP timeout and retry policy (retry delay: exponential backoff with full jitter)
+    timeout_seconds: Mapped[int] = mapped_column(Integer, default=30, server_default="30")
+    max_retries: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    retry_backoff_seconds: Mapped[int] = mapped_column(Integer, default=2, server_default="2")
+    # Change detection: conditional GET with the remembered ETag / Last-Modified, else a body hash;
+    # a run whose content did not change is logged as "unchanged" without output
+    change_detection: Mapped[bool] = mapped_column(Boolean, default=False, server_default="0")
+    # Run this job whenever change detection sees new content (fire-on-change follow-up)
+    on_change_cronjob_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("cronjobs.id", ondelete="SET NULL"), nullable=True
+    )
+    http_etag: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    http_last_modified: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    body_hash: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    content_changed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # Missed fires (service down / loop stalled): skip, coalesce (one run) or replay_all (see misfire.py)
+    misfire_policy: Mapped[str] = mapped_column(String(10), default="skip", server_default="skip")
+    last_fire_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)  # last handled fire, UTC
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
 
@@ -45,14 +66,50 @@ class Cronjob(Base):
 class CronjobLog(Base):
     """Cronjob execution log."""
     __tablename__ = "cronjob_logs"
+    # Per-job history newest first, latest run, per-job counts over a time window (status: covering)
+    __table_args__ = (Index("ix_cronjob_logs_job_time", "cronjob_id", "executed_at", "status"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     cronjob_id: Mapped[int] = mapped_column(Integer, ForeignKey("cronjobs.id", ondelete="CASCADE"), nullable=False)
-    status: Mapped[str] = mapped_column(String(20), nullable=False)  # success, failed, error
+    status: Mapped[str] = mapped_column(String(20), nullable=False)  # success, unchanged, failed, error
     status_code: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     output: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     duration_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     executed_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    # Scheduling timeline (UTC): scheduled fire time -> actual start; null for manual runs
+    scheduled_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    lag_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # started_at - scheduled_at
+    queue_wait_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # dispatch -> start
+    attempt: Mapped[int] = mapped_column(Integer, default=1, server_default="1")  # 1 = first try, 2+ = retries
+    catch_up: Mapped[Optional[str]] = mapped_column(String(10), nullable=True)  # coalesced | replayed (missed fires)
+    missed_fires: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # fires a coalesced run stands for
 
     cronjob: Mapped["Cronjob"] = relationship("Cronjob", back_populates="logs")
+
+
+class CronjobDependency(Base):
+    """Edge of the job graph: cronjob_id runs after depends_on_id succeeded."""
+    __tablename__ = "cronjob_dependencies"
+    __table_args__ = (Index("ix_cronjob_dependencies_upstream", "depends_on_id"),)
+
+    cronjob_id: Mapped[int] = mapped_column(Integer, ForeignKey("cronjobs.id", ondelete="CASCADE"), primary_key=True)
+    depends_on_id: Mapped[int] = mapped_column(Integer, ForeignKey("cronjobs.id", ondelete="CASCADE"), primary_key=True)
+
+
+class CronjobRun(Base):
+    """One run of a job's dependency graph (the job and everything upstream of it)."""
+    __tablename__ = "cronjob_runs"
+    __table_args__ = (Index("ix_cronjob_runs_job_time", "cronjob_id", "started_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    cronjob_id: Mapped[int] = mapped_column(Integer, ForeignKey("cronjobs.id", ondelete="CASCADE"), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)  # success, failed
+    scheduled_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)  # null for manual runs
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    duration_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    critical_path_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    # JSON: [{"cronjob_id", "name", "depends_on", "status", "start_ms", "end_ms", ...}] / [cronjob ids]
+    nodes: Mapped[str] = mapped_column(Text, nullable=False)
+    critical_path: Mapped[str] = mapped_column(Text, nullable=False)
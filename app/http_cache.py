@@ -0,0 +1,222 @@
+"""HTTP caching for the panel: cached pages, precompressed static assets, JSON ETags and gzip.
+
+- Pages: templates have no per-request data, so each is rendered once per process
+  (plus a gzip copy) and served with an ETag; browsers revalidate and get a 304.
+  A page is rendered again when an asset it links changed, so it never points
+  at an outdated ?v= hash.
+- Static files: read and compressed (gzip, brotli when the `brotli` package is
+  installed) once per file version. Templates link them as /static/x?v=<hash>;
+  a request carrying the current hash is cached for a year (immutable).
+- JSON: `json_response` encodes with orjson when installed (datetimes natively),
+  adds a weak ETag and answers If-None-Match with 304.
+- `JSONGZipMiddleware` gzips complete application/json bodies over GZIP_MIN_SIZE.
+  Streams (NDJSON exports, disk scan progress) and bodies that already carry a
+  Content-Encoding (the gzip log export) pass through untouched.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json
+    orjson = None
+
+from app.config import GZIP_MIN_SIZE
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Assets bigger than this are served as plain files (not held in memory)
+MAX_CACHED_ASSET = 2 * 1024 * 1024
+_COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+def _digest(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def _etag_matches(request_headers: Headers, etag: str) -> bool:
+    """If-None-Match with weak comparison (W/ prefixes ignored), "*" matches anything."""
+    header = request_headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def _accepted(request_headers: Headers) -> set:
+    return {e.split(";")[0].strip().lower() for e in request_headers.get("accept-encoding", "").split(",")}
+
+
+class _Variants:
+    """One body plus its compressed copies, chosen per Accept-Encoding."""
+
+    __slots__ = ("digest", "media_type", "identity", "gzip", "br")
+
+    def __init__(self, body: bytes, media_type: str):
+        self.digest = _digest(body)
+        self.media_type = media_type
+        self.identity = body
+        compressible = media_type.startswith(_COMPRESSIBLE) and len(body) >= GZIP_MIN_SIZE
+        self.gzip = gzip.compress(body, 9, mtime=0) if compressible else None
+        self.br = brotli.compress(body) if compressible and brotli is not None else None
+
+    def response(self, request_headers: Headers, cache_control: str) -> Response:
+        accepted = _accepted(request_headers)
+        encoding = "br" if self.br and "br" in accepted else "gzip" if self.gzip and "gzip" in accepted else None
+        etag = f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if self.gzip:
+            headers["Vary"] = "Accept-Encoding"
+        if _etag_matches(request_headers, etag):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(getattr(self, encoding or "identity"), media_type=self.media_type, headers=headers)
+
+
+class AssetStaticFiles(StaticFiles):
+    """StaticFiles serving small assets from memory, precompressed, keyed by (mtime, size)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._assets: Dict[str, Tuple[Tuple[float, int], _Variants]] = {}
+
+    def asset(self, full_path: str, stat_result: os.stat_result) -> Optional[_Variants]:
+        if stat_result.st_size > MAX_CACHED_ASSET:
+            return None
+        version = (stat_result.st_mtime, stat_result.st_size)
+        cached = self._assets.get(full_path)
+        if cached is None or cached[0] != version:
+            media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+            cached = self._assets[full_path] = (version, _Variants(Path(full_path).read_bytes(), media_type))
+        return cached[1]
+
+    def url(self, path: str) -> str:
+        """/static/<path>?v=<content hash> - for templates (`static_url('style.css')`)."""
+        full_path, stat_result = self.lookup_path(path)
+        variants = self.asset(full_path, stat_result) if stat_result else None
+        return f"/static/{path}?v={variants.digest}" if variants else f"/static/{path}"
+
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200) -> Response:
+        variants = self.asset(str(full_path), stat_result)
+        if variants is None or status_code != 200:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        version = dict(p.split("=", 1) for p in scope.get("query_string", b"").decode().split("&") if "=" in p).get("v")
+        cache_control = IMMUTABLE if version == variants.digest else REVALIDATE
+        return variants.response(Headers(scope=scope), cache_control)
+
+
+class PageCache:
+    """Rendered templates by name, with the asset URLs each one linked; pages take no per-request context."""
+
+    def __init__(self, templates: Jinja2Templates, static_files: AssetStaticFiles):
+        self.templates = templates
+        self.static_files = static_files
+        self._pages: Dict[str, Tuple[Dict[str, str], _Variants]] = {}
+
+    def _render(self, name: str) -> Tuple[Dict[str, str], _Variants]:
+        urls: Dict[str, str] = {}
+
+        def static_url(path: str) -> str:
+            urls[path] = self.static_files.url(path)
+            return urls[path]
+
+        body = self.templates.get_template(name).render(static_url=static_url).encode()
+        return urls, _Variants(body, "text/html; charset=utf-8")
+
+    def response(self, request: Request, name: str) -> Response:
+        cached = self._pages.get(name)
+        # Asset đổi nội dung thì ?v= đổi theo: render lại, không để trang trỏ vào hash cũ (immutable)
+        if cached is None or any(self.static_files.url(path) != url for path, url in cached[0].items()):
+            cached = self._pages[name] = self._render(name)
+        return cached[1].response(request.headers, REVALIDATE)
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return jsonable_encoder(value)
+
+
+def dumps(payload) -> bytes:
+    """Compact JSON bytes; datetimes as ISO 8601 with either encoder."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+
+def json_response(request: Request, payload, headers: Optional[Dict[str, str]] = None) -> Response:
+    """JSON with a weak ETag of the body; 304 when the client already has it."""
+    body = dumps(payload)
+    etag = f'W/"{_digest(body)}"'
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": REVALIDATE}
+    if _etag_matches(request.headers, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+class JSONGZipMiddleware:
+    """gzip complete application/json responses of at least GZIP_MIN_SIZE bytes."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = GZIP_MIN_SIZE, compresslevel: int = 6):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or "gzip" not in _accepted(Headers(scope=scope)):
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_maybe_gzip(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith("application/json")
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+            if start is not None:
+                body = message.get("body", b"")
+                if not message.get("more_body", False) and len(body) >= self.minimum_size:
+                    body = gzip.compress(body, self.compresslevel)
+                    headers = MutableHeaders(raw=start["headers"])
+                    headers["Content-Encoding"] = "gzip"
+                    headers["Content-Length"] = str(len(body))
+                    headers.add_vary_header("Accept-Encoding")
+                    message = {**message, "body": body}
+                await send(start)
+                start = None
+                passthrough = True  # the rest of a streamed body goes out as is
+            await send(message)
+
+        await self.app(scope, receive, send_maybe_gzip)
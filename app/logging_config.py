@@ -0,0 +1,194 @@
+"""Application logging: QueueHandler on the root logger, a QueueListener thread does the rest.
+
+Callers (the event loop, scheduler threads) only put the record on a queue; the
+listener thread formats it and writes LOG_DIR/app.log (rotated at MAX_LOG_SIZE_MB)
+and stderr. A rate limit per call site and message drops repeats from hot loops
+before they are even queued; the next such record after the window says how
+many were dropped. ERROR and above are never dropped.
+
+Several processes (uvicorn workers, the executor process) append to the same
+app.log; rotation is done by one of them under a lock file, the others reopen.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from app.config import (
+    LOG_BACKUP_COUNT,
+    LOG_DIR,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    LOG_RATE_LIMIT,
+    LOG_RATE_LIMIT_WINDOW,
+    MAX_LOG_SIZE_MB,
+)
+
+LOG_FILE = LOG_DIR / "app.log"
+TEXT_FORMAT = "%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s"
+
+# Loggers that log every request / every job fire at INFO
+QUIET_LOGGERS = ("httpx", "httpcore", "apscheduler.executors", "apscheduler.scheduler")
+# uvicorn installs its own stderr handlers; route them through the queue as well
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+# One call site per request - rate limiting would drop legitimate lines
+RATE_LIMIT_EXEMPT = frozenset({"uvicorn.access"})
+# Expired entries are pruned once the rate limiter tracks this many messages
+RATE_LIMIT_MAX_KEYS = 10000
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """At most `limit` records per call site (logger, file, line) and message per `window` seconds.
+
+    Keyed on the formatted message too, so one job repeating a warning does not use up
+    the budget of the same line logged for other jobs.
+    """
+
+    def __init__(self, limit: int, window: float):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._sites: Dict[Tuple[str, str, int, str], list] = {}  # key -> [window start, count, dropped]
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        for key, site in list(self._sites.items()):
+            if now - site[0] >= self.window:
+                del self._sites[key]
+        # Vòng lặp log nội dung luôn khác nhau: bắt đầu lại thay vì prune ở mỗi dòng
+        if len(self._sites) >= RATE_LIMIT_MAX_KEYS // 2:
+            self._sites.clear()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0 or record.levelno >= logging.ERROR or record.name in RATE_LIMIT_EXEMPT:
+            return True
+        key = (record.name, record.pathname, record.lineno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            if len(self._sites) >= RATE_LIMIT_MAX_KEYS:
+                self._prune(now)
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                dropped = site[2] if site is not None else 0
+                self._sites[key] = [now, 1, 0]
+            elif site[1] < self.limit:
+                site[1] += 1
+                return True
+            else:
+                site[2] += 1
+                return False
+        if dropped:
+            record.msg = f"{record.getMessage()} ({dropped} similar messages suppressed in the last {self.window:.0f}s)"
+            record.args = None
+        return True
+
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler for several processes appending to one file."""
+
+    def _rotated_elsewhere(self) -> bool:
+        try:
+            return os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _reopen(self) -> None:
+        self.stream.close()
+        self.stream = self._open()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.stream is not None and self._rotated_elsewhere():
+            self._reopen()
+        return super().shouldRollover(record)
+
+    def doRollover(self) -> None:
+        if fcntl is None:
+            super().doRollover()
+            return
+        with open(self.baseFilename + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # another process may have rotated while we waited for the lock
+            if self.stream is not None and self._rotated_elsewhere():
+                self._reopen()
+            else:
+                super().doRollover()
+
+
+def setup_logging() -> None:
+    """Install the queue pipeline once per process (web workers and the executor process)."""
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+    console = logging.StreamHandler(sys.stderr)
+    file_handler = SharedRotatingFileHandler(
+        LOG_FILE,
+        maxBytes=MAX_LOG_SIZE_MB * 1024 * 1024,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+    for handler in (console, file_handler):
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(LOG_RATE_LIMIT, LOG_RATE_LIMIT_WINDOW))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
+    for name in UVICORN_LOGGERS:
+        uv_logger = logging.getLogger(name)
+        uv_logger.handlers.clear()
+        uv_logger.propagate = True
+
+    _listener = QueueListener(log_queue, console, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush what is queued and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
@@ -1,58 +1,120 @@
 """Main FastAPI application."""
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict
 
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 
-from app.config import SECRET_KEY, BASE_DIR
-from app.database.database import init_db
+from app.config import SECRET_KEY, BASE_DIR, METRICS_LOOP_PROBE_INTERVAL
+from app.database.database import engine, init_db
+from app.http_cache import AssetStaticFiles, JSONGZipMiddleware, PageCache
 from app.auth.routes import router as auth_router
 from app.services.cronjob.routes import router as cronjob_router
 from app.services.dashboard.routes import router as dashboard_router
 from app.services.server.routes import router as server_router
-from app.services.cronjob.scheduler import start_scheduler, shutdown_scheduler, load_cronjobs_into_scheduler
+from app.services.fleet.routes import router as fleet_router
+from app.services.fleet.poller import start_fleet_poller, stop_fleet_poller
+from app.services.metrics.routes import router as metrics_router
+from app.services.metrics.middleware import MetricsMiddleware
+from app.services.metrics.collector import instrument_engine, loop_lag_probe
+from app.services.cronjob.leader import startup_lock
+from app.services.cronjob.scheduler import start_scheduler_leader, stop_scheduler_leader
 from app.init_db import ensure_default_user
+from app.logging_config import setup_logging
 
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], phase: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = time.perf_counter() - started
+
+
+def _format_timings(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in timings.items())
+
+
+async def _start_scheduler_deferred() -> None:
+    """Leader election + job load after the port is bound (uvicorn binds once lifespan startup returns)."""
+    timings: Dict[str, float] = {}
+    try:
+        with _timed(timings, "scheduler"):
+            await start_scheduler_leader()
+        logger.info(f"Scheduler startup: {_format_timings(timings)}")
+    except Exception as e:
+        logger.exception(f"Scheduler startup failed: {e}")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan - startup and shutdown."""
     # Startup
-    await init_db()
-    await ensure_default_user()
-    start_scheduler()
-    await load_cronjobs_into_scheduler()
-    logger.info("Application started")
+    timings: Dict[str, float] = {"imports": IMPORT_SECONDS}
+    waiting = time.perf_counter()
+    async with startup_lock():  # workers start together - one at a time creates tables / default user
+        timings["startup_lock"] = time.perf_counter() - waiting
+        with _timed(timings, "init_db"):
+            await init_db()
+        with _timed(timings, "default_user"):
+            await ensure_default_user()
+    scheduler_start = asyncio.create_task(_start_scheduler_deferred())
+    await start_fleet_poller()
+    lag_probe = asyncio.create_task(loop_lag_probe(METRICS_LOOP_PROBE_INTERVAL))
+    logger.info(f"Application started: {_format_timings(timings)}")
     yield
     # Shutdown
-    shutdown_scheduler()
+    lag_probe.cancel()
+    if not scheduler_start.done():
+        scheduler_start.cancel()
+        await asyncio.gather(scheduler_start, return_exceptions=True)
+    await stop_scheduler_leader()
+    await stop_fleet_poller()
     logger.info("Application shutdown")
 
 
 app = FastAPI(title="Control Server Web GUI", lifespan=lifespan)
 
+# Metrics: DB statement timing + per-route request latency
+instrument_engine(engine.sync_engine)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(JSONGZipMiddleware)
+
 # Session middleware (32 bytes = 256 bits for secret)
 app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY, max_age=86400 * 7)  # 7 days
 
 # Mount static files
 static_path = BASE_DIR / "static"
 static_path.mkdir(exist_ok=True)
-app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
+static_files = AssetStaticFiles(directory=str(static_path))
+app.mount("/static", static_files, name="static")
 
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+templates.env.globals["static_url"] = static_files.url
+# Pages have no per-request data: rendered once, then served from memory with an ETag
+pages = PageCache(templates, static_files)
 
 # API routes
 app.include_router(auth_router)
 app.include_router(dashboard_router)
 app.include_router(cronjob_router)
 app.include_router(server_router)
+app.include_router(fleet_router)
+app.include_router(metrics_router)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -64,40 +126,46 @@ async def index(request: Request):
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
     """Login page."""
-    return templates.TemplateResponse("login.html", {"request": request})
+    return pages.response(request, "login.html")
 
 
 @app.get("/setup", response_class=HTMLResponse)
 async def setup_page(request: Request):
     """Setup page (password change + 2FA)."""
-    return templates.TemplateResponse("setup.html", {"request": request})
+    return pages.response(request, "setup.html")
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard_page(request: Request):
     """Dashboard page."""
-    return templates.TemplateResponse("dashboard.html", {"request": request})
+    return pages.response(request, "dashboard.html")
 
 
 @app.get("/cronjobs", response_class=HTMLResponse)
 async def cronjobs_page(request: Request):
     """Cronjob manager page."""
-    return templates.TemplateResponse("cronjobs.html", {"request": request})
+    return pages.response(request, "cronjobs.html")
 
 
 @app.get("/logs", response_class=HTMLResponse)
 async def logs_page(request: Request):
     """Log server page."""
-    return templates.TemplateResponse("logs.html", {"request": request})
+    return pages.response(request, "logs.html")
 
 
 @app.get("/services", response_class=HTMLResponse)
 async def services_page(request: Request):
     """Systemd services page."""
-    return templates.TemplateResponse("services.html", {"request": request})
+    return pages.response(request, "services.html")
+
+
+@app.get("/fleet", response_class=HTMLResponse)
+async def fleet_page(request: Request):
+    """Fleet page - all hosts polled by this aggregator."""
+    return pages.response(request, "fleet.html")
 
 
 @app.get("/vnc", response_class=HTMLResponse)
 async def vnc_page(request: Request):
     """VNC viewer page - view only, đăng nhập VNC do bạn tự cấu hình."""
-    return templates.TemplateResponse("vnc.html", {"request": request})
+    return pages.response(request, "vnc.html")
@@ -0,0 +1,144 @@
+"""Schedule load forecast - where do cronjob fires pile up?
+
+Counting is bucketed instead of expanding individual fires:
+- jobs are grouped by (compiled expression, spread offset), so 2,000 copies of
+  `*/5 * * * *` are one source;
+- a source is expanded per matching *minute* (its seconds are the same in every minute,
+  the spread offset only shifts them into the same or a later minute);
+- minutes with the same set of contributing sources share one 60-slot per-second profile.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from app.services.cronjob.cron import CronSpec, compile_cron
+
+JobRow = Tuple[int, str, str, int]  # (cronjob_id, name, cron_expression, spread_offset)
+
+MAX_JOBS_PER_SLOT = 50
+MAX_EXAMPLES_PER_SLOT = 5
+
+
+class _Source:
+    """All jobs sharing one compiled expression and spread offset."""
+
+    __slots__ = ("expression", "spec", "offset", "shifted", "jobs")
+
+    def __init__(self, expression: str, spec: CronSpec, offset: int):
+        self.expression = expression
+        self.spec = spec
+        self.offset = offset
+        # minute shift -> seconds (within that minute) after applying the offset
+        shifted: Dict[int, List[int]] = defaultdict(list)
+        for second in spec.seconds:
+            shifted[(second + offset) // 60].append((second + offset) % 60)
+        self.shifted = dict(shifted)
+        self.jobs: List[Tuple[int, str]] = []
+
+
+def _matching_minutes(spec: CronSpec, start: datetime, first: int, total_minutes: int) -> Iterable[int]:
+    """Indexes (minutes since `start`, from `first`) of every window minute in which `spec` fires."""
+    months = set(spec.months)
+    day = (start + timedelta(minutes=first)).replace(hour=0, minute=0, second=0, microsecond=0)
+    end = start + timedelta(minutes=total_minutes)
+    while day < end:
+        if day.month in months and day.day in spec.days_in(day.year, day.month):
+            base = int((day - start).total_seconds() // 60)
+            for hour in spec.hours:
+                hour_base = base + hour * 60
+                if hour_base + 59 < first or hour_base >= total_minutes:
+                    continue
+                for minute in spec.minutes:
+                    index = hour_base + minute
+                    if first <= index < total_minutes:
+                        yield index
+        day += timedelta(days=1)
+
+
+def forecast_load(jobs: Iterable[JobRow], start: datetime, hours: int, top: int = 10) -> dict:
+    """Expand every job's schedule over [start, start + hours) and find the busiest seconds."""
+    start = start.replace(second=0, microsecond=0)
+    total_minutes = hours * 60
+
+    sources: Dict[Tuple[str, int], _Source] = {}
+    invalid = []
+    for cronjob_id, name, expression, offset in jobs:
+        key = (" ".join(expression.split()), offset or 0)
+        source = sources.get(key)
+        if source is None:
+            try:
+                source = sources[key] = _Source(key[0], compile_cron(key[0]), key[1])
+            except ValueError as e:
+                invalid.append({"id": cronjob_id, "name": name, "error": str(e)})
+                continue
+        source.jobs.append((cronjob_id, name))
+    source_list = list(sources.values())
+
+    # Per-minute totals and, per minute, which (source, minute shift) pairs fire in it
+    per_minute = [0] * total_minutes
+    minute_sources: List[List[Tuple[int, int]]] = [[] for _ in range(total_minutes)]
+    for idx, source in enumerate(source_list):
+        max_shift = max(source.shifted)
+        for index in _matching_minutes(source.spec, start, -max_shift, total_minutes):
+            for shift, seconds in source.shifted.items():
+                target = index + shift
+                if 0 <= target < total_minutes:
+                    per_minute[target] += len(seconds) * len(source.jobs)
+                    minute_sources[target].append((idx, shift))
+
+    # Minutes with an identical contributor set share one per-second profile
+    by_signature: Dict[Tuple[Tuple[int, int], ...], List[int]] = defaultdict(list)
+    for index, contributors in enumerate(minute_sources):
+        if contributors:
+            by_signature[tuple(contributors)].append(index)
+
+    per_second_of_minute = [0] * 60
+    slots = []  # (fires, signature, second)
+    for signature, minute_indexes in by_signature.items():
+        profile = [0] * 60
+        for idx, shift in signature:
+            weight = len(source_list[idx].jobs)
+            for second in source_list[idx].shifted[shift]:
+                profile[second] += weight
+        for second, fires in enumerate(profile):
+            if fires:
+                per_second_of_minute[second] += fires * len(minute_indexes)
+                slots.append((fires, signature, second))
+    slots.sort(key=lambda slot: (-slot[0], by_signature[slot[1]][0], slot[2]))
+
+    hotspots = []
+    for fires, signature, second in slots[:top]:
+        minute_indexes = by_signature[signature]
+        contributors = [
+            {"id": cronjob_id, "name": name, "cron_expression": source.expression, "spread_offset": source.offset}
+            for source, shift in ((source_list[idx], shift) for idx, shift in signature)
+            if second in source.shifted[shift]
+            for cronjob_id, name in source.jobs
+        ]
+        hotspots.append({
+            "second_of_minute": second,
+            "fires": fires,
+            "occurrences": len(minute_indexes),
+            "first_at": (start + timedelta(minutes=minute_indexes[0], seconds=second)).isoformat(),
+            "examples": [
+                (start + timedelta(minutes=i, seconds=second)).isoformat()
+                for i in minute_indexes[:MAX_EXAMPLES_PER_SLOT]
+            ],
+            "jobs_total": len(contributors),
+            "jobs": contributors[:MAX_JOBS_PER_SLOT],
+        })
+
+    return {
+        "start": start.isoformat(),
+        "hours": hours,
+        "jobs": sum(len(s.jobs) for s in source_list),
+        "distinct_expressions": len({s.expression for s in source_list}),
+        "distinct_schedules": len(source_list),
+        "fires_total": sum(per_minute),
+        "peak_fires_per_second": slots[0][0] if slots else 0,
+        "peak_fires_per_minute": max(per_minute) if per_minute else 0,
+        "per_minute": per_minute,
+        "per_second_of_minute": per_second_of_minute,
+        "hotspots": hotspots,
+        "invalid": invalid,
+    }
@@ -0,0 +1,340 @@
+"""Cold-log archive: cronjob_logs rows older than LOG_ARCHIVE_AFTER_DAYS move to monthly SQLite files.
+
+LOG_ARCHIVE_DIR/cronjob_logs_YYYY-MM.db holds one month of rows (by executed_at),
+same columns as cronjob_logs with `output` zlib-compressed. The mover copies a
+batch into the month files (INSERT OR IGNORE on id: a crash between copy and
+delete only repeats work), then deletes it from the main DB - the FTS triggers
+follow. Once the cutoff is past a month's end its file is VACUUMed and made
+read-only (0444). With archiving on, LOG_RETENTION_DAYS no longer applies to
+cronjob logs: month files older than LOG_ARCHIVE_KEEP_MONTHS are deleted.
+
+Readers never go through the app's connection pool: a plain sqlite3 connection in
+a worker thread ATTACHes the months a query's time range reaches (read-only URIs,
+at most SQLITE_LIMIT_ATTACHED at a time) and reads them with UNION ALL.
+"""
+import asyncio
+import logging
+import re
+import sqlite3
+import stat
+import time
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, select
+
+from app.config import (
+    LOG_ARCHIVE_AFTER_DAYS,
+    LOG_ARCHIVE_BATCH_SIZE,
+    LOG_ARCHIVE_DIR,
+    LOG_ARCHIVE_INTERVAL,
+    LOG_ARCHIVE_KEEP_MONTHS,
+)
+from app.database.database import async_session
+from app.database.models import CronjobLog
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    "id", "cronjob_id", "status", "status_code", "output", "error", "duration_ms",
+    "executed_at", "scheduled_at", "started_at", "lag_ms", "queue_wait_ms", "attempt",
+    "catch_up", "missed_fires",
+)
+DATETIME_COLUMNS = frozenset({"executed_at", "scheduled_at", "started_at"})
+_FILE_RE = re.compile(r"^cronjob_logs_(\d{4})-(\d{2})\.db$")
+# Same text layout SQLAlchemy uses for DateTime on SQLite, so range filters compare alike
+_DT_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS cronjob_logs (
+        id INTEGER PRIMARY KEY, cronjob_id INTEGER NOT NULL, status TEXT NOT NULL, status_code INTEGER,
+        output BLOB, error TEXT, duration_ms INTEGER, executed_at TEXT, scheduled_at TEXT, started_at TEXT,
+        lag_ms INTEGER, queue_wait_ms INTEGER, attempt INTEGER, catch_up TEXT, missed_fires INTEGER
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_cronjob_logs_job_time ON cronjob_logs (cronjob_id, executed_at)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+)
+# Columns added after the first archive layout: added to writable files, read as NULL from read-only ones
+_ADDED_COLUMNS = {"catch_up": "TEXT", "missed_fires": "INTEGER"}
+
+
+def archive_enabled() -> bool:
+    return LOG_ARCHIVE_AFTER_DAYS > 0
+
+
+def _dt_text(value: Optional[datetime]) -> Optional[str]:
+    return value.strftime(_DT_FORMAT) if value is not None else None
+
+
+def _month_start(year: int, month: int) -> datetime:
+    return datetime(year, month, 1)
+
+
+def _next_month(start: datetime) -> datetime:
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def month_path(month: str) -> Path:
+    return LOG_ARCHIVE_DIR / f"cronjob_logs_{month}.db"
+
+
+# Month files by directory mtime (files added / removed change it): a stat per call instead of a listing
+_listing: Tuple[Optional[int], List[Tuple[datetime, Path]]] = (None, [])
+
+
+def _all_months() -> List[Tuple[datetime, Path]]:
+    global _listing
+    try:
+        mtime = LOG_ARCHIVE_DIR.stat().st_mtime_ns
+    except OSError:
+        return []
+    if _listing[0] == mtime:
+        return _listing[1]
+    months = []
+    for path in LOG_ARCHIVE_DIR.iterdir():
+        match = _FILE_RE.match(path.name)
+        if match:
+            months.append((_month_start(int(match.group(1)), int(match.group(2))), path))
+    months.sort()
+    _listing = (mtime, months)
+    return months
+
+
+def archive_months(since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Tuple[datetime, Path]]:
+    """(month start, file) of every archive overlapping [since, until), oldest first."""
+    return [
+        (start, path) for start, path in _all_months()
+        if (since is None or _next_month(start) > since) and (until is None or start < until)
+    ]
+
+
+def archived_before() -> Optional[datetime]:
+    """End of the newest archive month: every archived row is older; None when nothing is archived."""
+    months = _all_months()
+    return _next_month(months[-1][0]) if months else None
+
+
+# --- writing (scheduler leader only) ----------------------------------------
+
+def _writable(path: Path) -> bool:
+    return bool(path.stat().st_mode & stat.S_IWUSR)
+
+
+def _open_for_write(path: Path) -> sqlite3.Connection:
+    if path.exists() and not _writable(path):
+        path.chmod(stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH)
+    conn = sqlite3.connect(path)
+    for ddl in _SCHEMA:
+        conn.execute(ddl)
+    existing = _table_columns(conn, "main")
+    for name, sql_type in _ADDED_COLUMNS.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE cronjob_logs ADD COLUMN {name} {sql_type}")
+    return conn
+
+
+def _write_rows(rows: Sequence[tuple]) -> None:
+    """Copy rows (COLUMNS order) into their month files; blocking."""
+    by_month: Dict[str, List[tuple]] = {}
+    out = COLUMNS.index("output")
+    dt_indexes = [i for i, c in enumerate(COLUMNS) if c in DATETIME_COLUMNS]
+    for row in rows:
+        row = list(row)
+        if row[out] is not None:
+            row[out] = zlib.compress(row[out].encode(), 6)
+        for i in dt_indexes:
+            row[i] = _dt_text(row[i])
+        by_month.setdefault(row[COLUMNS.index("executed_at")][:7], []).append(row)
+
+    LOG_ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    placeholders = ", ".join("?" * len(COLUMNS))
+    for month, month_rows in by_month.items():
+        conn = _open_for_write(month_path(month))
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO cronjob_logs ({', '.join(COLUMNS)}) VALUES ({placeholders})", month_rows,
+                )
+                # A late row reopens a finalized month; the next pass finalizes it again
+                conn.execute("DELETE FROM meta WHERE key = 'finalized'")
+        finally:
+            conn.close()
+
+
+def _finalize_months(cutoff: datetime) -> None:
+    """VACUUM and chmod 0444 every month that ended before the cutoff; drop months past retention."""
+    keep_from = None
+    if LOG_ARCHIVE_KEEP_MONTHS > 0:
+        keep_from = datetime(cutoff.year, cutoff.month, 1)
+        for _ in range(LOG_ARCHIVE_KEEP_MONTHS):
+            keep_from = (keep_from - timedelta(days=1)).replace(day=1)
+    for start, path in archive_months():
+        if keep_from is not None and start < keep_from:
+            path.unlink(missing_ok=True)
+            logger.info(f"Removed log archive {path.name} (older than {LOG_ARCHIVE_KEEP_MONTHS} months)")
+            continue
+        if _next_month(start) > cutoff or not _writable(path):
+            continue
+        conn = sqlite3.connect(path)
+        try:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'finalized'").fetchone():
+                continue
+            conn.execute("INSERT INTO meta (key, value) VALUES ('finalized', ?)", (datetime.utcnow().isoformat(),))
+            conn.commit()
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        path.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        logger.info(f"Log archive {path.name} finalized ({path.stat().st_size // 1024} KiB)")
+
+
+async def archive_old_logs(cutoff: datetime) -> int:
+    """Move every row with executed_at < cutoff into the archive, batch by batch. Returns rows moved."""
+    columns = [getattr(CronjobLog, c) for c in COLUMNS]
+    moved = 0
+    while True:
+        async with async_session() as db:
+            rows = (await db.execute(
+                select(*columns).where(CronjobLog.executed_at < cutoff).order_by(CronjobLog.id).limit(LOG_ARCHIVE_BATCH_SIZE)
+            )).tuples().all()
+        if not rows:
+            break
+        await asyncio.to_thread(_write_rows, rows)
+        async with async_session() as db:
+            await db.execute(delete(CronjobLog).where(CronjobLog.id.in_([r[0] for r in rows])))
+            await db.commit()
+        moved += len(rows)
+        if len(rows) < LOG_ARCHIVE_BATCH_SIZE:
+            break
+        await asyncio.sleep(0.05)  # let API writes in between batches (SQLite has one writer at a time)
+    await asyncio.to_thread(_finalize_months, cutoff)
+    return moved
+
+
+class LogArchiver:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            try:
+                moved = await archive_old_logs(datetime.utcnow() - timedelta(days=LOG_ARCHIVE_AFTER_DAYS))
+                if moved:
+                    logger.info(f"Archived {moved} cronjob log rows in {time.perf_counter() - started:.1f}s")
+            except Exception as e:
+                logger.exception(f"Log archiving failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if archive_enabled() and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+archiver = LogArchiver(LOG_ARCHIVE_INTERVAL)
+
+
+# --- reading ------------------------------------------------------------------
+
+def _unzip(value: Optional[bytes]) -> Optional[str]:
+    return zlib.decompress(value).decode() if value is not None else None
+
+
+def _attached(months: List[Tuple[datetime, Path]]) -> Iterator[Tuple[sqlite3.Connection, List[str]]]:
+    """A connection with the months ATTACHed read-only, chunked to SQLite's attach limit -> (conn, schema names)."""
+    conn = sqlite3.connect(":memory:", uri=True)
+    try:
+        conn.create_function("unz", 1, _unzip, deterministic=True)
+        chunk = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        for i in range(0, len(months), chunk):
+            schemas = []
+            for start, path in months[i:i + chunk]:
+                schema = f"m{start:%Y%m}"
+                conn.execute(f"ATTACH DATABASE ? AS {schema}", (f"file:{path}?mode=ro",))
+                schemas.append(schema)
+            yield conn, schemas
+            for schema in schemas:
+                conn.execute(f"DETACH DATABASE {schema}")
+    finally:
+        conn.close()
+
+
+def _table_columns(conn: sqlite3.Connection, schema: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA {schema}.table_info(cronjob_logs)")}
+
+
+def _select(conn: sqlite3.Connection, schema: str, names: Sequence[str]) -> str:
+    """SELECT of `names` from one attached month; columns the file predates come back as NULL."""
+    available = _table_columns(conn, schema)
+    columns = (
+        "unz(output) AS output" if n == "output" else n if n in available else f"NULL AS {n}" for n in names
+    )
+    return f"SELECT {', '.join(columns)} FROM {schema}.cronjob_logs"
+
+
+def _convert(names: Sequence[str], row: tuple) -> tuple:
+    return tuple(
+        datetime.fromisoformat(v) if v is not None and n in DATETIME_COLUMNS else v for n, v in zip(names, row)
+    )
+
+
+def read_rows(
+    months: List[Tuple[datetime, Path]],
+    names: Sequence[str],
+    cronjob_ids: Optional[List[int]],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    after_id: int,
+    limit: int,
+) -> List[tuple]:
+    """Up to `limit` archived rows with id > after_id in id order, columns as `names`; blocking."""
+    where, params = ["id > ?"], [after_id]
+    if cronjob_ids:
+        where.append(f"cronjob_id IN ({', '.join('?' * len(cronjob_ids))})")
+        params.extend(cronjob_ids)
+    if since is not None:
+        where.append("executed_at >= ?")
+        params.append(_dt_text(since))
+    if until is not None:
+        where.append("executed_at < ?")
+        params.append(_dt_text(until))
+    rows: List[tuple] = []
+    for conn, schemas in _attached(months):
+        arms = (f"{_select(conn, s, names)} WHERE {' AND '.join(where)}" for s in schemas)
+        sql = " UNION ALL ".join(arms) + " ORDER BY id LIMIT ?"
+        rows.extend(conn.execute(sql, params * len(schemas) + [limit]).fetchall())
+    rows.sort(key=lambda r: r[0])
+    return [_convert(names, r) for r in rows[:limit]]
+
+
+def read_job_page(cronjob_id: int, limit: int, offset: int) -> List[dict]:
+    """Archived rows of one job, newest first (continues the main DB's page); blocking."""
+    months = archive_months()[::-1]
+    page: List[dict] = []
+    for conn, schemas in _attached(months):
+        if len(page) >= limit:
+            break
+        total = sum(
+            conn.execute(f"SELECT count(*) FROM {s}.cronjob_logs WHERE cronjob_id = ?", (cronjob_id,)).fetchone()[0]
+            for s in schemas
+        )
+        if offset >= total:
+            offset -= total
+            continue
+        sql = " UNION ALL ".join(f"{_select(conn, s, COLUMNS)} WHERE cronjob_id = ?" for s in schemas)
+        rows = conn.execute(
+            f"{sql} ORDER BY executed_at DESC, id DESC LIMIT ? OFFSET ?",
+            [cronjob_id] * len(schemas) + [limit - len(page), offset],
+        ).fetchall()
+        page.extend(dict(zip(COLUMNS, _convert(COLUMNS, r))) for r in rows)
+        offset = 0
+    return page
@@ -0,0 +1,265 @@
+"""Scheduler backends - decide *when* a cronjob fires and hand it to a dispatch callback.
+
+- APSchedulerBackend: one CronTrigger job per cronjob in AsyncIOScheduler (default).
+- HeapSchedulerBackend: precomputed next-fire times in a heap, grouped by schedule;
+  wakes once per due tick and dispatches every due job in one batch. Meant for
+  10k+ jobs where APScheduler's per-job trigger and job-store overhead dominates.
+
+Dispatch signature: dispatch(cronjob_id, scheduled_at) with scheduled_at as naive UTC.
+Each job row carries a spread offset (seconds); the job is dispatched that long after
+its cron slot and scheduled_at includes the offset.
+"""
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from apscheduler.events import EVENT_JOB_SUBMITTED, JobSubmissionEvent
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from app.services.cronjob.cron import CronSpec, compile_cron, split_expression
+
+logger = logging.getLogger(__name__)
+
+Dispatch = Callable[[int, Optional[datetime]], None]
+JobRow = Tuple[int, str, str, int]  # (cronjob_id, name, cron_expression, spread_offset)
+
+
+def _to_utc_naive(dt: datetime) -> datetime:
+    """Convert aware datetime to naive UTC (DB timestamps are naive UTC)."""
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@lru_cache(maxsize=4096)
+def _trigger_normalized(expression: str) -> CronTrigger:
+    compile_cron(expression)  # same validation/errors as the API
+    return CronTrigger(**split_expression(expression))
+
+
+def _cron_trigger(expression: str) -> CronTrigger:
+    """CronTrigger cached per normalized expression; triggers are stateless, so jobs share them across reloads."""
+    return _trigger_normalized(" ".join(expression.split()))
+
+
+class SchedulerBackend:
+    """Interface implemented by every backend."""
+
+    name = "base"
+
+    def start(self) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        raise NotImplementedError
+
+    @property
+    def running(self) -> bool:
+        raise NotImplementedError
+
+    def sync(self, jobs: Iterable[JobRow]) -> int:
+        """Replace the scheduled set with `jobs`; returns how many were loaded."""
+        raise NotImplementedError
+
+    def job_count(self) -> int:
+        raise NotImplementedError
+
+
+class APSchedulerBackend(SchedulerBackend):
+    """One APScheduler CronTrigger job per cronjob."""
+
+    name = "apscheduler"
+
+    def __init__(self, scheduler: AsyncIOScheduler, dispatch: Dispatch):
+        self.scheduler = scheduler
+        self._dispatch = dispatch
+        self._scheduled_times: Dict[int, datetime] = {}
+        scheduler.add_listener(self._on_job_submitted, EVENT_JOB_SUBMITTED)
+
+    def _on_job_submitted(self, event: JobSubmissionEvent) -> None:
+        """Remember the scheduled fire time; dispatched before the job coroutine starts running."""
+        if event.job_id and event.job_id.startswith("cronjob_") and event.scheduled_run_times:
+            self._scheduled_times[int(event.job_id[len("cronjob_"):])] = _to_utc_naive(event.scheduled_run_times[-1])
+
+    async def _job_wrapper(self, cronjob_id: int, offset: int = 0) -> None:
+        """
+        APScheduler entry point - dispatch (after the spread offset) and return immediately.
+        Must be a coroutine function: AsyncIOExecutor runs plain functions in a thread pool,
+        where there is no running event loop.
+        """
+        try:
+            scheduled_at = self._scheduled_times.pop(cronjob_id, None)
+            if offset:
+                if scheduled_at is not None:
+                    scheduled_at += timedelta(seconds=offset)
+                asyncio.get_running_loop().call_later(offset, self._dispatch, cronjob_id, scheduled_at)
+            else:
+                self._dispatch(cronjob_id, scheduled_at)
+        except Exception as e:
+            logger.exception(f"Scheduler job wrapper error for {cronjob_id}: {e}")
+
+    def start(self) -> None:
+        if not self.scheduler.running:
+            self.scheduler.start()
+            logger.info("APScheduler started")
+
+    def shutdown(self) -> None:
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=True)
+            logger.info("APScheduler shutdown")
+
+    @property
+    def running(self) -> bool:
+        return self.scheduler.running
+
+    def sync(self, jobs: Iterable[JobRow]) -> int:
+        # Remove existing jobs for our app
+        for job in self.scheduler.get_jobs():
+            if job.id and job.id.startswith("cronjob_"):
+                try:
+                    self.scheduler.remove_job(job.id)
+                except Exception:
+                    pass
+
+        loaded = 0
+        for cronjob_id, name, expression, offset in jobs:
+            try:
+                self.scheduler.add_job(
+                    self._job_wrapper,
+                    trigger=_cron_trigger(expression),
+                    id=f"cronjob_{cronjob_id}",
+                    args=[cronjob_id, offset or 0],
+                    replace_existing=True,
+                    # Late fires (stalled loop) are always submitted, once; misfire.py applies the job's policy
+                    misfire_grace_time=None,
+                    coalesce=True,
+                )
+                loaded += 1
+                logger.debug(f"Loaded cronjob {cronjob_id} ({name}) with expression {expression}")
+            except Exception as e:
+                logger.error(f"Failed to load cronjob {cronjob_id}: {e}")
+        return loaded
+
+    def job_count(self) -> int:
+        return sum(1 for job in self.scheduler.get_jobs() if job.id.startswith("cronjob_"))
+
+
+class _Group:
+    """Jobs sharing one compiled schedule and offset - one next-fire computation per tick for all."""
+
+    __slots__ = ("spec", "offset", "job_ids")
+
+    def __init__(self, spec: CronSpec, offset: int):
+        self.spec = spec
+        self.offset = offset
+        self.job_ids: List[int] = []
+
+
+class HeapSchedulerBackend(SchedulerBackend):
+    """Heap of (next_fire_ts, group) entries, dispatched in batches once per due tick."""
+
+    name = "heap"
+
+    # Fires older than this (loop stall, clock jump) are skipped instead of replayed
+    misfire_grace_seconds = 1.0
+
+    def __init__(self, dispatch: Dispatch):
+        self._dispatch = dispatch
+        self._groups: Dict[Tuple[str, int], _Group] = {}
+        self._heap: List[Tuple[float, Tuple[str, int]]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info("Heap scheduler started")
+
+    def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            logger.info("Heap scheduler shutdown")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def sync(self, jobs: Iterable[JobRow]) -> int:
+        groups: Dict[Tuple[str, int], _Group] = {}
+        loaded = 0
+        for cronjob_id, name, expression, offset in jobs:
+            key = (" ".join(expression.split()), offset or 0)
+            group = groups.get(key)
+            if group is None:
+                try:
+                    group = groups[key] = _Group(compile_cron(key[0]), key[1])
+                except ValueError as e:
+                    logger.error(f"Failed to load cronjob {cronjob_id}: {e}")
+                    continue
+            group.job_ids.append(cronjob_id)
+            loaded += 1
+
+        now = time.time()
+        heap = []
+        for key, group in groups.items():
+            ts = self._next_ts(group, now)
+            if ts is not None:
+                heap.append((ts, key))
+        heapq.heapify(heap)
+        self._groups, self._heap = groups, heap
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return loaded
+
+    def job_count(self) -> int:
+        return sum(len(g.job_ids) for g in self._groups.values())
+
+    @staticmethod
+    def _next_ts(group: _Group, after_ts: float) -> Optional[float]:
+        """Next (offset-shifted) fire timestamp strictly after `after_ts`."""
+        nxt = group.spec.next_after(datetime.fromtimestamp(after_ts - group.offset))
+        return nxt.timestamp() + group.offset if nxt else None
+
+    def _fire_due(self, now: float) -> int:
+        """Pop every group due at or before `now`, dispatch its jobs, reschedule. Returns jobs fired."""
+        heap, groups = self._heap, self._groups
+        fired = 0
+        while heap and heap[0][0] <= now:
+            ts, key = heapq.heappop(heap)
+            group = groups.get(key)
+            if group is None:
+                continue
+            scheduled_at = datetime.utcfromtimestamp(ts)
+            for cronjob_id in group.job_ids:
+                try:
+                    self._dispatch(cronjob_id, scheduled_at)
+                except Exception as e:
+                    logger.exception(f"Scheduler dispatch error for {cronjob_id}: {e}")
+            fired += len(group.job_ids)
+            nxt = self._next_ts(group, ts)
+            if nxt is not None and nxt < now - self.misfire_grace_seconds:
+                nxt = self._next_ts(group, now)
+            if nxt is not None:
+                heapq.heappush(heap, (nxt, key))
+        return fired
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                self._fire_due(time.time())
+            except Exception as e:
+                logger.exception(f"Heap scheduler tick failed: {e}")
+            delay = self._heap[0][0] - time.time() if self._heap else 60.0
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(delay, 60.0))
+                except asyncio.TimeoutError:
+                    pass
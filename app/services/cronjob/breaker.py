@@ -0,0 +1,145 @@
+"""Per-host circuit breakers for cronjob HTTP calls.
+
+closed    -> calls pass; BREAKER_FAILURE_THRESHOLD consecutive transport failures
+             (connect error, timeout, ...) open the breaker
+open      -> calls fail fast without touching the network for BREAKER_RESET_SECONDS
+half_open -> one probe call at a time; success closes, failure re-opens
+
+State lives in the process that executes scheduled runs (the scheduler leader or
+the executor process). That process writes a snapshot file on every state change
+so the API can show it from any worker.
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from app.config import BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS, DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+STATE_PATH = DATA_DIR / "breakers.json"
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Call rejected because the host's breaker is open."""
+
+
+class CircuitBreaker:
+    __slots__ = (
+        "host", "state", "failures", "opened_at", "last_error", "last_failure_at",
+        "probe_in_flight", "rejected", "_registry",
+    )
+
+    def __init__(self, host: str, registry: "BreakerRegistry"):
+        self.host = host
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_failure_at: Optional[float] = None
+        self.probe_in_flight = False
+        self.rejected = 0
+        self._registry = registry
+
+    def acquire(self) -> None:
+        """Raise CircuitOpenError unless a call may go out now."""
+        if self.state == OPEN and time.time() - self.opened_at >= self._registry.reset_seconds:
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self.probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(f"circuit half-open for {self.host}, probe in flight")
+            self.probe_in_flight = True
+        elif self.state == OPEN:
+            self.rejected += 1
+            retry_in = self._registry.reset_seconds - (time.time() - self.opened_at)
+            raise CircuitOpenError(f"circuit open for {self.host} (retry in {retry_in:.0f}s)")
+
+    def record_success(self) -> None:
+        self.probe_in_flight = False
+        self.failures = 0
+        if self.state != CLOSED:
+            self._set_state(CLOSED)
+
+    def record_failure(self, error: str) -> None:
+        self.probe_in_flight = False
+        self.failures += 1
+        self.last_error = error[:500]
+        self.last_failure_at = time.time()
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self._registry.threshold):
+            self.opened_at = time.time()
+            self._set_state(OPEN)
+
+    def release(self) -> None:
+        """Call ended without a verdict (cancelled) - let the next call probe."""
+        self.probe_in_flight = False
+
+    def _set_state(self, state: str) -> None:
+        logger.warning(f"Circuit breaker {self.host}: {self.state} -> {state}")
+        self.state = state
+        self._registry.persist()
+
+    def snapshot(self) -> dict:
+        return {
+            "host": self.host,
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opened_at": self.opened_at,
+            "last_failure_at": self.last_failure_at,
+            "last_error": self.last_error,
+            "rejected": self.rejected,
+        }
+
+
+class BreakerRegistry:
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = max(1, threshold)
+        self.reset_seconds = reset_seconds
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._state_path: Optional[Path] = None
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc.lower() or url
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(host, self)
+        return breaker
+
+    @property
+    def persistent(self) -> bool:
+        return self._state_path is not None
+
+    def snapshot(self) -> List[dict]:
+        return [b.snapshot() for b in sorted(self._breakers.values(), key=lambda b: b.host)]
+
+    def enable_persistence(self, path: Path = STATE_PATH) -> None:
+        """Called in the process executing scheduled runs: it owns the snapshot file."""
+        self._state_path = path
+        self.persist()
+
+    def persist(self) -> None:
+        if self._state_path is None:
+            return
+        try:
+            tmp = self._state_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"pid": os.getpid(), "updated_at": time.time(), "breakers": self.snapshot()}))
+            os.replace(tmp, self._state_path)
+        except OSError as e:
+            logger.warning(f"Could not write breaker state: {e}")
+
+
+breakers = BreakerRegistry(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+
+
+def read_breaker_state(path: Path = STATE_PATH) -> Optional[dict]:
+    """Snapshot written by the executing process, None if there is none yet."""
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,228 @@
+"""Compiled cron expressions with APScheduler CronTrigger semantics.
+
+Same 5/6-field layout as `_parse_cron_expression` (second defaults to 0) and the
+same field syntax as CronTrigger: `*`, `*/n`, `a`, `a-b`, `a-b/n`, `a/n`, comma
+lists, month names (jan-dec), weekday names (mon-sun, 0 = Monday) and `last`
+in the day field (`1st mon` style items cannot occur: fields are split on
+whitespace). Day-of-month and day-of-week must both match (APScheduler
+behaviour, not Vixie cron's OR).
+
+Times are naive local wall-clock datetimes, like the scheduler's local timezone.
+"""
+import re
+from bisect import bisect_left
+from calendar import monthrange
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+FIELD_NAMES = ("second", "minute", "hour", "day", "month", "day_of_week")
+MIN_VALUES = {"second": 0, "minute": 0, "hour": 0, "day": 1, "month": 1, "day_of_week": 0}
+MAX_VALUES = {"second": 59, "minute": 59, "hour": 23, "day": 31, "month": 12, "day_of_week": 6}
+
+# Give up looking for a next fire time after this many years (e.g. "0 0 30 feb *")
+MAX_SEARCH_YEARS = 8
+
+_SEPARATOR = re.compile(r" *, *")
+_ALL_RE = re.compile(r"\*(?:/(?P<step>\d+))?$")
+_RANGE_RE = re.compile(r"(?P<first>\d+)(?:-(?P<last>\d+))?(?:/(?P<step>\d+))?$")
+_NAME_RANGE_RE = re.compile(r"(?P<first>[a-z]+)(?:-(?P<last>[a-z]+))?$", re.IGNORECASE)
+_LAST_RE = re.compile(r"last$", re.IGNORECASE)
+
+
+class CronError(ValueError):
+    """Invalid cron expression."""
+
+
+def split_expression(expr: str) -> Dict[str, str]:
+    """Split a 5-field (second = 0) or 6-field expression into named fields."""
+    parts = expr.strip().split()
+    if len(parts) == 6:
+        return dict(zip(FIELD_NAMES, parts))
+    if len(parts) == 5:
+        return dict(zip(FIELD_NAMES, ["0"] + parts))
+    raise CronError(f"Invalid cron: {expr} (cần 5 hoặc 6 field)")
+
+
+def _check_step(field: str, step: Optional[int], first: int, last: Optional[int]) -> None:
+    if step is None:
+        return
+    if step == 0:
+        raise CronError(f"Increment must be higher than 0 in field {field}")
+    span = (last if last is not None else MAX_VALUES[field]) - first
+    if step > span:
+        raise CronError(f"Step {step} is higher than the range of field {field} ({span})")
+
+
+def _range_values(first: int, last: Optional[int], step: Optional[int], maxval: int) -> List[int]:
+    """Values of `first[-last][/step]` limited to `maxval` (CronTrigger RangeExpression)."""
+    end = min(maxval, last) if last is not None else maxval
+    return list(range(first, end + 1, step or 1))
+
+
+def _compile_range(field: str, item: str) -> Tuple[int, Optional[int], Optional[int]]:
+    """Compile one numeric/name item to (first, last, step)."""
+    m = _ALL_RE.match(item)
+    if m:
+        step = int(m.group("step")) if m.group("step") else None
+        _check_step(field, step, MIN_VALUES[field], MAX_VALUES[field])
+        return MIN_VALUES[field], MAX_VALUES[field], step
+
+    m = _RANGE_RE.match(item)
+    if m:
+        first = int(m.group("first"))
+        last = int(m.group("last")) if m.group("last") else None
+        step = int(m.group("step")) if m.group("step") else None
+        if last is None and step is None:
+            last = first
+        if last is not None and first > last:
+            raise CronError(f"The minimum value in a range must not be higher than the maximum ({item!r})")
+        if first < MIN_VALUES[field]:
+            raise CronError(f"Value {first} is lower than the minimum of field {field} ({MIN_VALUES[field]})")
+        if last is not None and last > MAX_VALUES[field]:
+            raise CronError(f"Value {last} is higher than the maximum of field {field} ({MAX_VALUES[field]})")
+        _check_step(field, step, first, last)
+        return first, last, step
+
+    names = {"month": MONTHS, "day_of_week": WEEKDAYS}.get(field)
+    m = _NAME_RANGE_RE.match(item) if names else None
+    if m:
+        offset = 1 if field == "month" else 0
+        try:
+            first = names.index(m.group("first").lower()) + offset
+            last = names.index(m.group("last").lower()) + offset if m.group("last") else first
+        except ValueError:
+            raise CronError(f"Invalid {field} name in {item!r}") from None
+        if first > last:
+            raise CronError(f"The minimum value in a range must not be higher than the maximum ({item!r})")
+        return first, last, None
+
+    raise CronError(f'Unrecognized expression "{item}" for field "{field}"')
+
+
+def _compile_field(field: str, value: str) -> Tuple[int, ...]:
+    """Compile second/minute/hour/month/day_of_week into a sorted tuple of allowed values."""
+    values = set()
+    for item in _SEPARATOR.split(value.strip()):
+        first, last, step = _compile_range(field, item)
+        values.update(_range_values(first, last, step, MAX_VALUES[field]))
+    return tuple(sorted(values))
+
+
+class CronSpec:
+    """Compiled cron expression; shared between jobs and reloads through compile_cron's cache."""
+
+    __slots__ = ("expression", "seconds", "minutes", "hours", "months", "weekdays", "_day_items", "_days_cache")
+
+    def __init__(self, expression: str):
+        fields = split_expression(expression)
+        self.expression = " ".join(expression.split())
+        self.seconds = _compile_field("second", fields["second"])
+        self.minutes = _compile_field("minute", fields["minute"])
+        self.hours = _compile_field("hour", fields["hour"])
+        self.months = _compile_field("month", fields["month"])
+        self.weekdays = frozenset(_compile_field("day_of_week", fields["day_of_week"]))
+        # Day items stay symbolic: their values depend on the month length
+        self._day_items = tuple(
+            None if _LAST_RE.match(item) else _compile_range("day", item)
+            for item in _SEPARATOR.split(fields["day"].strip())
+        )
+        self._days_cache: Dict[Tuple[int, int], Tuple[int, ...]] = {}
+
+    def __repr__(self) -> str:
+        return f"CronSpec({self.expression!r})"
+
+    def days_in(self, year: int, month: int) -> Tuple[int, ...]:
+        """Days of `year-month` matching both the day and day_of_week fields."""
+        key = (year, month)
+        days = self._days_cache.get(key)
+        if days is not None:
+            return days
+        first_wday, last_day = monthrange(year, month)
+        values = set()
+        for item in self._day_items:
+            if item is None:
+                values.add(last_day)
+            else:
+                values.update(_range_values(*item, last_day))
+        days = tuple(sorted(d for d in values if (first_wday + d - 1) % 7 in self.weekdays))
+        if len(self._days_cache) > 256:
+            self._days_cache.clear()
+        self._days_cache[key] = days
+        return days
+
+    def next_after(self, after: datetime) -> Optional[datetime]:
+        """First fire time strictly after `after` (second resolution), or None if there is none."""
+        t = after.replace(microsecond=0, tzinfo=None) + timedelta(seconds=1)
+        year, month, day, hour, minute, second = t.year, t.month, t.day, t.hour, t.minute, t.second
+        last_year = year + MAX_SEARCH_YEARS
+        months, hours, minutes, seconds = self.months, self.hours, self.minutes, self.seconds
+        while year <= last_year:
+            i = bisect_left(months, month)
+            if i == len(months):
+                year, month, day, hour, minute, second = year + 1, months[0], 1, 0, 0, 0
+                continue
+            if months[i] != month:
+                month, day, hour, minute, second = months[i], 1, 0, 0, 0
+
+            days = self.days_in(year, month)
+            i = bisect_left(days, day)
+            if i == len(days):
+                month, day, hour, minute, second = month + 1, 1, 0, 0, 0
+                if month > 12:
+                    year, month = year + 1, 1
+                continue
+            if days[i] != day:
+                day, hour, minute, second = days[i], 0, 0, 0
+
+            i = bisect_left(hours, hour)
+            if i == len(hours):
+                day, hour, minute, second = day + 1, 0, 0, 0
+                continue
+            if hours[i] != hour:
+                hour, minute, second = hours[i], 0, 0
+
+            i = bisect_left(minutes, minute)
+            if i == len(minutes):
+                hour, minute, second = hour + 1, 0, 0
+                continue
+            if minutes[i] != minute:
+                minute, second = minutes[i], 0
+
+            i = bisect_left(seconds, second)
+            if i == len(seconds):
+                minute, second = minute + 1, 0
+                continue
+            return datetime(year, month, day, hour, minute, seconds[i])
+        return None
+
+    def next_n(self, after: datetime, n: int) -> List[datetime]:
+        """Up to `n` consecutive fire times strictly after `after`."""
+        times = []
+        t = after
+        while len(times) < n:
+            t = self.next_after(t)
+            if t is None:
+                break
+            times.append(t)
+        return times
+
+
+@lru_cache(maxsize=4096)
+def _compile_normalized(expression: str) -> CronSpec:
+    return CronSpec(expression)
+
+
+def compile_cron(expression: str) -> CronSpec:
+    """Compile a cron expression (cached per normalized expression); raises CronError when invalid."""
+    return _compile_normalized(" ".join(expression.split()))
+
+
+def validate_cron(expression: str) -> CronSpec:
+    """Compile and make sure the expression fires at least once in the future."""
+    spec = compile_cron(expression)
+    if spec.next_after(datetime.now()) is None:
+        raise CronError(f"no future fire time ({expression})")
+    return spec
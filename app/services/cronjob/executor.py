@@ -1,66 +1,285 @@
 """Cronjob URL executor - CURL/WGET style execution."""
+import asyncio
+import hashlib
+import logging
+import random
 import time
-from typing import Optional
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
 
 import httpx
-from sqlalchemy import select
+from sqlalchemy import exists, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.config import LOG_RETENTION_DAYS
+from app.config import LOG_ARCHIVE_AFTER_DAYS, LOG_RETENTION_DAYS, RETRY_MAX_BACKOFF_SECONDS
 from app.database.database import async_session
-from app.database.models import Cronjob, CronjobLog
+from app.database.models import Cronjob, CronjobDependency, CronjobLog
+from app.services.cronjob.breaker import CircuitBreaker, CircuitOpenError, breakers
+from app.services.metrics.collector import record_cronjob_run
 
+logger = logging.getLogger(__name__)
 
-async def execute_cronjob(cronjob_id: int, url: str, method: str) -> None:
-    """
-    Execute cronjob URL using httpx (equivalent to CURL/WGET).
-    CURL and WGET both do HTTP GET by default - we support GET/POST via method.
-    """
-    start = time.perf_counter()
-    status = "failed"
-    status_code = None
-    output = None
-    error = None
+# Retried besides transport errors (connect/read timeouts, refused, DNS...)
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Run outcomes that count as OK (unchanged = change detection saw the same content)
+OK_STATUSES = ("success", "unchanged")
+# Fire-on-change chains (A changes -> runs B -> B changes -> runs C ...) stop at this depth
+MAX_TRIGGER_DEPTH = 3
+
+_follow_ups: Dict[int, asyncio.Task] = {}  # target job id -> running follow-up
+# Jobs executing in this process: scheduled runs (scheduler / executor worker) and dependency graph nodes
+running_jobs: Set[int] = set()
+# Seconds between checks while a graph node waits for another run of the same job
+CLAIM_POLL_INTERVAL = 0.25
+
+
+async def claim_job(cronjob_id: int) -> None:
+    """Wait until cronjob_id is not running in this process, then mark it running (release: running_jobs.discard)."""
+    if cronjob_id in running_jobs:
+        logger.info(f"Cronjob {cronjob_id} already running, waiting for it to finish")
+    while cronjob_id in running_jobs:
+        await asyncio.sleep(CLAIM_POLL_INTERVAL)
+    running_jobs.add(cronjob_id)
+
+
+class Fingerprint:
+    """Validators and body hash of one response, for change detection."""
+
+    __slots__ = ("etag", "last_modified", "body_hash")
+
+    def __init__(self, etag: Optional[str], last_modified: Optional[str], body_hash: Optional[str]):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body_hash = body_hash
 
+
+def _request_headers(previous: Optional[Fingerprint]) -> Dict[str, str]:
+    headers = {}
+    if previous is not None and previous.etag:
+        headers["If-None-Match"] = previous.etag
+    if previous is not None and previous.last_modified:
+        headers["If-Modified-Since"] = previous.last_modified
+    return headers
+
+
+async def _attempt(
+    url: str, method: str, timeout: float, breaker: CircuitBreaker, previous: Optional[Fingerprint] = None,
+) -> Tuple[str, Optional[int], Optional[str], Optional[str], bool, Optional[Fingerprint]]:
+    """One HTTP call through the host breaker -> (status, status_code, output, error, retryable, fingerprint).
+
+    `previous` (change detection on): GETs are sent conditionally and a 304 is
+    "unchanged"; the fingerprint of a 2xx response is returned for comparison."""
+    try:
+        breaker.acquire()
+    except CircuitOpenError as e:
+        return "error", None, None, str(e), False, None
+
+    is_post = method.upper() == "POST"
+    # Validators only make sense for GET (CURL / WGET / GET all do a GET)
+    headers = _request_headers(previous) if not is_post else {}
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            if method.upper() == "WGET" or method.upper() == "GET":
-                response = await client.get(url)
-            elif method.upper() == "POST":
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            if is_post:
                 response = await client.post(url)
-            elif method.upper() == "CURL":
-                # CURL default is GET
-                response = await client.get(url)
             else:
-                response = await client.get(url)
+                response = await client.get(url, headers=headers)
+    except httpx.TransportError as e:
+        error = (str(e) or type(e).__name__)[:2000]  # Limit error size
+        breaker.record_failure(error)
+        return "error", None, None, error, True, None
+    except Exception as e:
+        breaker.release()
+        return "error", None, None, (str(e) or type(e).__name__)[:2000], False, None
+    except BaseException:
+        breaker.release()
+        raise
 
-            status_code = response.status_code
-            status = "success" if 200 <= status_code < 400 else "failed"
-            output = response.text[:10000] if response.text else None  # Limit output size
+    breaker.record_success()  # the host answered, whatever the status
+    status_code = response.status_code
+    if status_code == 304 and headers:
+        return "unchanged", status_code, None, None, False, None
+    status = "success" if 200 <= status_code < 400 else "failed"
+    output = response.text[:10000] if response.text else None  # Limit output size
+    fingerprint = None
+    if previous is not None and 200 <= status_code < 300:
+        fingerprint = Fingerprint(
+            response.headers.get("etag"),
+            response.headers.get("last-modified"),
+            hashlib.blake2b(response.content, digest_size=16).hexdigest(),
+        )
+    return status, status_code, output, None, status_code in RETRY_STATUS_CODES, fingerprint
 
-    except Exception as e:
-        error = str(e)[:2000]  # Limit error size
-        status = "error"
 
-    duration_ms = int((time.perf_counter() - start) * 1000)
+async def _load_fingerprint(cronjob_id: int) -> Fingerprint:
+    async with async_session() as db:
+        row = (await db.execute(
+            select(Cronjob.http_etag, Cronjob.http_last_modified, Cronjob.body_hash).where(Cronjob.id == cronjob_id)
+        )).one_or_none()
+    return Fingerprint(*row) if row is not None else Fingerprint(None, None, None)
 
+
+async def _save_fingerprint(cronjob_id: int, fingerprint: Fingerprint, changed: bool) -> None:
+    values = {
+        "http_etag": fingerprint.etag,
+        "http_last_modified": fingerprint.last_modified,
+        "body_hash": fingerprint.body_hash,
+    }
+    if changed:
+        values["content_changed_at"] = datetime.utcnow()
     async with async_session() as db:
-        result = await db.execute(select(Cronjob).where(Cronjob.id == cronjob_id))
-        cronjob = result.scalar_one_or_none()
-        if cronjob and cronjob.enable_log:
-            log_entry = CronjobLog(
-                cronjob_id=cronjob_id,
-                status=status,
-                status_code=status_code,
-                output=output,
-                error=error,
-                duration_ms=duration_ms,
-            )
-            db.add(log_entry)
-            await db.commit()
-
-            # Clean old logs if needed (limit per cronjob)
+        await db.execute(update(Cronjob).where(Cronjob.id == cronjob_id).values(**values))
+        await db.commit()
+
+
+def _fire_follow_up(cronjob_id: int, target_id: int, depth: int) -> None:
+    """Start the on-change job in the background (one at a time per target, bounded chain depth)."""
+    if depth >= MAX_TRIGGER_DEPTH:
+        logger.warning(f"Cronjob {cronjob_id}: on-change chain deeper than {MAX_TRIGGER_DEPTH}, not running {target_id}")
+        return
+    running = _follow_ups.get(target_id)
+    if running is not None and not running.done():
+        return
+    task = asyncio.get_running_loop().create_task(
+        execute_cronjob_by_id(target_id, require_enabled=False, trigger_depth=depth + 1)
+    )
+    _follow_ups[target_id] = task
+    task.add_done_callback(lambda t: _follow_ups.pop(target_id, None) if _follow_ups.get(target_id) is t else None)
+
+
+def _retry_delay(attempt: int, backoff: float) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(cap, backoff * 2^(attempt-1)))."""
+    return random.uniform(0, min(RETRY_MAX_BACKOFF_SECONDS, backoff * 2 ** (attempt - 1)))
+
+
+async def _write_log(cronjob_id: int, **fields) -> bool:
+    """Insert one attempt's log row if logging is enabled for the job; returns whether it was."""
+    async with async_session() as db:
+        result = await db.execute(select(Cronjob.enable_log).where(Cronjob.id == cronjob_id))
+        if not result.scalar_one_or_none():
+            return False
+        db.add(CronjobLog(cronjob_id=cronjob_id, **fields))
+        await db.commit()
+        return True
+
+
+async def execute_cronjob(
+    cronjob_id: int,
+    url: str,
+    method: str,
+    scheduled_at: Optional[datetime] = None,
+    dispatched_at: Optional[datetime] = None,
+    timeout: float = 30.0,
+    max_retries: int = 0,
+    retry_backoff: float = 2.0,
+    change_detection: bool = False,
+    on_change_cronjob_id: Optional[int] = None,
+    trigger_depth: int = 0,
+    catch_up: Optional[str] = None,
+    missed_fires: Optional[int] = None,
+) -> Tuple[str, float]:
+    """
+    Execute cronjob URL using httpx (equivalent to CURL/WGET).
+    CURL and WGET both do HTTP GET by default - we support GET/POST via method.
+    scheduled_at / dispatched_at (naive UTC) come from the scheduler and are used to
+    record how late the run started and how long it waited after dispatch.
+    Transport errors and 429/5xx are retried up to max_retries times; every attempt
+    gets its own log row. Returns (final status, elapsed seconds over all attempts).
+    change_detection: a 304, or a 2xx whose body hash matches the previous one, is
+    logged as "unchanged" without output; new content runs on_change_cronjob_id.
+    catch_up / missed_fires mark a run for missed fires (see misfire.py) on its first log row.
+    """
+    breaker = breakers.for_url(url)
+    previous = await _load_fingerprint(cronjob_id) if change_detection else None
+    run_start = time.perf_counter()
+    logged = fire_follow_up = False
+    attempt = 0
+    while True:
+        attempt += 1
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        status, status_code, output, error, retryable, fingerprint = await _attempt(
+            url, method, timeout, breaker, previous,
+        )
+        duration_ms = int((time.perf_counter() - start) * 1000)
+
+        if fingerprint is not None:
+            changed = fingerprint.body_hash != previous.body_hash
+            if not changed:
+                status, output = "unchanged", None
+            await _save_fingerprint(cronjob_id, fingerprint, changed)
+            # The first fetch only sets the baseline
+            fire_follow_up = changed and previous.body_hash is not None and bool(on_change_cronjob_id)
+
+        first = attempt == 1
+        logged = await _write_log(
+            cronjob_id,
+            status=status,
+            status_code=status_code,
+            output=output,
+            error=error,
+            duration_ms=duration_ms,
+            scheduled_at=scheduled_at,
+            started_at=started_at,
+            # lateness is about the scheduled start, retries would skew it
+            lag_ms=int((started_at - scheduled_at).total_seconds() * 1000) if scheduled_at and first else None,
+            queue_wait_ms=int((started_at - dispatched_at).total_seconds() * 1000) if dispatched_at and first else None,
+            attempt=attempt,
+            catch_up=catch_up if first else None,
+            missed_fires=missed_fires if first else None,
+        ) or logged
+
+        if status in OK_STATUSES or not retryable or attempt > max_retries:
+            break
+        await asyncio.sleep(_retry_delay(attempt, retry_backoff))
+
+    elapsed = time.perf_counter() - run_start
+    record_cronjob_run(cronjob_id, status, elapsed)
+
+    if logged and not LOG_ARCHIVE_AFTER_DAYS:
+        # Clean old logs if needed (limit per cronjob); with archiving on, the archiver moves them instead
+        # and LOG_ARCHIVE_KEEP_MONTHS bounds how long they are kept
+        async with async_session() as db:
             await _cleanup_logs(db, cronjob_id)
+    if fire_follow_up:
+        # Started once this run is fully recorded
+        _fire_follow_up(cronjob_id, on_change_cronjob_id, trigger_depth)
+    return status, elapsed
+
+
+async def execute_cronjob_by_id(
+    cronjob_id: int,
+    scheduled_at: Optional[datetime] = None,
+    dispatched_at: Optional[datetime] = None,
+    require_enabled: bool = True,
+    trigger_depth: int = 0,
+    with_dependencies: bool = True,
+    catch_up: Optional[str] = None,
+    missed_fires: Optional[int] = None,
+) -> Optional[Tuple[str, float]]:
+    """Scheduled run: look up the job and execute it; None if it was deleted or disabled meanwhile.
+
+    On-change follow-ups pass require_enabled=False: a disabled job can serve as a trigger-only action.
+    A job with dependencies runs its whole upstream graph (workflow.py) unless with_dependencies=False."""
+    has_dependencies = exists().where(CronjobDependency.cronjob_id == Cronjob.id)
+    query = select(
+        Cronjob.url, Cronjob.method, Cronjob.timeout_seconds, Cronjob.max_retries, Cronjob.retry_backoff_seconds,
+        Cronjob.change_detection, Cronjob.on_change_cronjob_id, has_dependencies.label("has_dependencies"),
+    ).where(Cronjob.id == cronjob_id)
+    if require_enabled:
+        query = query.where(Cronjob.enabled == True)
+    async with async_session() as db:
+        row = (await db.execute(query)).one_or_none()
+    if row is None:
+        return None
+    if row.has_dependencies and with_dependencies:
+        from app.services.cronjob.workflow import run_workflow
+        return await run_workflow(cronjob_id, scheduled_at, dispatched_at, trigger_depth, catch_up, missed_fires)
+    return await execute_cronjob(
+        cronjob_id, row.url, row.method, scheduled_at=scheduled_at, dispatched_at=dispatched_at,
+        timeout=row.timeout_seconds, max_retries=row.max_retries, retry_backoff=row.retry_backoff_seconds,
+        change_detection=row.change_detection, on_change_cronjob_id=row.on_change_cronjob_id,
+        trigger_depth=trigger_depth, catch_up=catch_up, missed_fires=missed_fires,
+    )
 
 
 async def _cleanup_logs(db: AsyncSession, cronjob_id: int) -> None:
@@ -0,0 +1,248 @@
+"""Scheduler leader lease - with several uvicorn workers exactly one runs the scheduler.
+
+The lease is an exclusive fcntl lock on DATA_DIR/scheduler.lock. The kernel drops
+the lock when the holder dies, so failover needs no heartbeat: followers retry
+every LEADER_POLL_INTERVAL seconds and the first to get the lock starts the
+scheduler. The leader writes its pid into the lock file once its SIGUSR1 handler
+is installed; other workers ask it to reload the job set with that signal, after
+checking that the lock is really held (a crashed leader leaves its pid behind,
+and SIGUSR1 kills a process without a handler). A leader that cannot install the
+handler marks the pid with "poll" and watches the mtime of <lock>.reload instead,
+which followers touch.
+
+Without fcntl (Windows) every process is leader, i.e. run a single worker there.
+"""
+import asyncio
+import logging
+import os
+import signal
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from app.config import DATA_DIR, LEADER_POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+LOCK_PATH = DATA_DIR / "scheduler.lock"
+STARTUP_LOCK_PATH = DATA_DIR / "startup.lock"
+RELOAD_SIGNAL = getattr(signal, "SIGUSR1", None)
+
+Callback = Callable[[], Awaitable[None]]
+
+
+class LeaderLease:
+    """Holds (or waits for) the scheduler lock and runs the leader callbacks.
+
+    Other singletons (e.g. the fleet poller) use their own lock file; only one lease
+    per process may own the reload signal, the others pass reload_signal=None.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        on_elected: Callback,
+        on_reload: Optional[Callback] = None,
+        reload_signal: Optional[int] = RELOAD_SIGNAL,
+    ):
+        self.path = path
+        self._on_elected = on_elected
+        self._on_reload = on_reload
+        self._reload_signal = reload_signal if on_reload is not None else None
+        self._fd: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._request_path = path.with_name(path.name + ".reload")
+        self._reload_pending: Optional[asyncio.Event] = None
+        self._reload_done: Optional[asyncio.Event] = None
+        self._reload_task: Optional[asyncio.Task] = None
+        self._poll_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def _try_acquire(self) -> bool:
+        if fcntl is None:
+            self._fd = -1
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        # Leases without reloads publish the pid now; the others once reloads can be received
+        self._write_holder("" if self._on_reload is None else None)
+        return True
+
+    def _write_holder(self, mode: Optional[str]) -> None:
+        """Lock file content: "<pid>" (listens for the signal), "<pid> poll", or empty (None)."""
+        if self._fd is None or self._fd < 0:
+            return
+        os.ftruncate(self._fd, 0)
+        if mode is not None:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            os.write(self._fd, f"{os.getpid()} {mode}".strip().encode())
+        os.fsync(self._fd)
+
+    async def start(self) -> None:
+        """Try to become leader now; otherwise keep trying in the background."""
+        if self._try_acquire():
+            await self._become_leader()
+        else:
+            logger.info(f"Lease {self.path.name} held by pid {read_leader_pid(self.path)}, running as follower")
+            self._task = asyncio.create_task(self._wait_for_lease())
+
+    async def _wait_for_lease(self) -> None:
+        while True:
+            await asyncio.sleep(LEADER_POLL_INTERVAL)
+            try:
+                if self._try_acquire():
+                    await self._become_leader()
+                    return
+            except Exception as e:
+                logger.exception(f"Lease {self.path.name} check failed: {e}")
+
+    async def _become_leader(self) -> None:
+        logger.info(f"Leader elected for {self.path.name} (pid {os.getpid()})")
+        if self._on_reload is not None:
+            self._reload_pending = asyncio.Event()
+            self._reload_done = asyncio.Event()
+            listening = False
+            if self._reload_signal is not None:
+                try:
+                    asyncio.get_running_loop().add_signal_handler(self._reload_signal, self._reload_pending.set)
+                    listening = True
+                except (ValueError, RuntimeError, NotImplementedError) as e:  # loop not in the main thread
+                    logger.warning(f"Reload signal handler unavailable, polling {self._request_path.name} instead: {e}")
+            if not listening:
+                self._poll_task = asyncio.create_task(self._poll_reload_requests())
+            self._write_holder("" if listening else "poll")
+            self._reload_task = asyncio.create_task(self._reload_loop())
+        await self._on_elected()
+
+    async def _reload_loop(self) -> None:
+        """Reload requests arriving while a reload runs collapse into one follow-up reload."""
+        while True:
+            await self._reload_pending.wait()
+            self._reload_pending.clear()
+            done, self._reload_done = self._reload_done, asyncio.Event()
+            try:
+                await self._on_reload()
+            except Exception as e:
+                logger.exception(f"Scheduler reload failed: {e}")
+            finally:
+                done.set()
+
+    def _request_mtime(self) -> Optional[int]:
+        try:
+            return self._request_path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    async def _poll_reload_requests(self) -> None:
+        """Fallback without the signal handler: followers touch the request file."""
+        seen = self._request_mtime()
+        while True:
+            await asyncio.sleep(LEADER_POLL_INTERVAL)
+            mtime = self._request_mtime()
+            if mtime != seen:
+                seen = mtime
+                self._reload_pending.set()
+
+    def _live_holder(self) -> Tuple[Optional[int], bool]:
+        """(pid, listens for the signal) of the process holding the lock; (None, False) when nobody does."""
+        pid, listening = read_lease(self.path)
+        if pid is None or fcntl is None:
+            return pid, listening
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except OSError:
+            return None, False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return pid, listening  # held: the pid was written by the current holder
+        try:
+            # Free lock: the pid is left over from a dead leader (and may belong to another process by now).
+            # A candidate polling at this instant misses one round.
+            os.ftruncate(fd, 0)
+            return None, False
+        finally:
+            os.close(fd)
+
+    async def request_reload(self) -> None:
+        """Reload the job set on the leader - queued on the reload loop when this process is leader
+        (and awaited), else via signal or the request file."""
+        if self._on_reload is None:
+            return
+        if self.is_leader:
+            done = self._reload_done
+            self._reload_pending.set()
+            await done.wait()
+            return
+        pid, listening = self._live_holder()
+        if pid is not None and listening and self._reload_signal is not None:
+            try:
+                os.kill(pid, self._reload_signal)
+                return
+            except OSError as e:
+                logger.warning(f"Could not signal scheduler leader pid {pid}: {e}")
+        try:
+            self._request_path.touch()
+        except OSError as e:
+            logger.warning(f"Could not request a {self.path.name} reload: {e}")
+        if pid is None:
+            logger.info(f"No {self.path.name} leader to reload; it will load its state when elected")
+
+    def stop(self) -> None:
+        """Stop waiting / release the lease (the caller shuts the scheduler down first)."""
+        for task in (self._task, self._reload_task, self._poll_task):
+            if task is not None:
+                task.cancel()
+        self._task = self._reload_task = self._poll_task = None
+        if self._reload_done is not None:
+            self._reload_done.set()  # nobody stays waiting on a reload that will not run
+        if self._fd is not None:
+            if self._reload_signal is not None:
+                try:
+                    asyncio.get_running_loop().remove_signal_handler(self._reload_signal)
+                except (ValueError, RuntimeError, NotImplementedError):
+                    pass
+            if self._fd >= 0:
+                os.ftruncate(self._fd, 0)
+                os.close(self._fd)  # closing drops the flock
+            self._fd = None
+
+
+def read_lease(path: Path = LOCK_PATH) -> Tuple[Optional[int], bool]:
+    """(pid, listens for the reload signal) as written in the lock file; not checked against the lock."""
+    try:
+        parts = path.read_text().split()
+        return (int(parts[0]) or None, len(parts) == 1) if parts else (None, False)
+    except (OSError, ValueError):
+        return None, False
+
+
+def read_leader_pid(path: Path = LOCK_PATH) -> Optional[int]:
+    return read_lease(path)[0]
+
+
+@asynccontextmanager
+async def startup_lock():
+    """Serialize one-time startup work (create tables, default user) between workers."""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(STARTUP_LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        await asyncio.to_thread(fcntl.flock, fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
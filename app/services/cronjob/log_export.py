@@ -0,0 +1,127 @@
+"""Streaming export of CronjobLog history (CSV / NDJSON).
+
+Rows go out in id order, fetched in keyset batches (`id > last_id LIMIT n`), each
+batch in its own short session. Memory stays at one batch whatever the range, and
+no cursor stays open on the shared SQLite connection between batches. Every row
+carries its id, so a client that lost the connection resumes with
+`after_id=<last id received>`.
+
+When the range reaches into the monthly log archives (see archive.py), each round
+also reads the next archived batch and the two are merged on id, so the stream
+stays in id order across both and after_id resumes the same way.
+"""
+import asyncio
+import csv
+import io
+import json
+import math
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy import select
+
+from app.database.database import async_session
+from app.database.models import CronjobLog
+from app.services.cronjob import archive
+
+BATCH_SIZE = 1000
+
+COLUMNS = (
+    "id", "cronjob_id", "executed_at", "status", "status_code", "duration_ms", "attempt",
+    "scheduled_at", "started_at", "lag_ms", "queue_wait_ms", "catch_up", "missed_fires", "error",
+)
+
+
+DATETIME_COLUMNS = ("executed_at", "scheduled_at", "started_at")
+
+
+def _iso(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def header(include_output: bool) -> List[str]:
+    return list(COLUMNS) + (["output"] if include_output else [])
+
+
+async def iter_log_rows(
+    cronjob_ids: Optional[List[int]],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    after_id: int,
+    include_output: bool,
+) -> AsyncIterator[list]:
+    """Batches of log rows (tuples in `header()` order) with id > after_id, oldest first."""
+    columns = [getattr(CronjobLog, c) for c in header(include_output)]
+    query = select(*columns).order_by(CronjobLog.id).limit(BATCH_SIZE)
+    if cronjob_ids:
+        query = query.where(CronjobLog.cronjob_id.in_(cronjob_ids))
+    if since is not None:
+        query = query.where(CronjobLog.executed_at >= since)
+    if until is not None:
+        query = query.where(CronjobLog.executed_at < until)
+
+    months = archive.archive_months(since, until)
+    last_id = after_id
+    hot_done, cold_done = False, not months
+    while not (hot_done and cold_done):
+        hot, cold = [], []
+        if not hot_done:
+            async with async_session() as db:
+                result = await db.execute(query.where(CronjobLog.id > last_id))
+                hot = result.tuples().all()
+        if not cold_done:
+            cold = await asyncio.to_thread(
+                archive.read_rows, months, header(include_output), cronjob_ids, since, until, last_id, BATCH_SIZE,
+            )
+        # A full batch may continue past its last id: only rows up to the smaller of those are final
+        bound = min((batch[-1][0] for batch in (hot, cold) if len(batch) == BATCH_SIZE), default=math.inf)
+        # A side is done once a short batch has been emitted entirely
+        hot_done = hot_done or (len(hot) < BATCH_SIZE and (not hot or hot[-1][0] <= bound))
+        cold_done = cold_done or (len(cold) < BATCH_SIZE and (not cold or cold[-1][0] <= bound))
+        rows, seen = [], set()
+        for row in sorted(hot + cold, key=lambda r: r[0]):
+            # the same id in both: archived but not yet deleted from the main DB
+            if row[0] <= bound and row[0] not in seen:
+                seen.add(row[0])
+                rows.append(row)
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+
+async def encode_rows(batches: AsyncIterator[list], fmt: str, include_output: bool) -> AsyncIterator[bytes]:
+    """CSV (header first) or NDJSON bytes, one chunk per batch."""
+    names = header(include_output)
+    if fmt == "csv":
+        dt_indexes = [names.index(c) for c in DATETIME_COLUMNS]
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(names)
+        yield buf.getvalue().encode()
+        async for batch in batches:
+            buf.seek(0)
+            buf.truncate()
+            for row in batch:
+                row = list(row)
+                for i in dt_indexes:
+                    if row[i] is not None:
+                        row[i] = row[i].isoformat()
+                writer.writerow(row)
+            yield buf.getvalue().encode()
+    else:
+        dumps = json.JSONEncoder(ensure_ascii=False, default=_iso).encode
+        async for batch in batches:
+            yield "".join(dumps(dict(zip(names, row))) + "\n" for row in batch).encode()
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """gzip-encode a byte stream incrementally (Content-Encoding: gzip)."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    async for chunk in chunks:
+        # sync flush per batch: every received byte decodes to whole rows, so a cut stream is resumable
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
@@ -0,0 +1,289 @@
+"""Missed fires: persisted last fire time per job, misfire policies and a rate-limited catch-up queue.
+
+A fire is missed when the service was down at its time (restart, crash) or when it
+is dispatched more than MISFIRE_GRACE_SECONDS late (stalled event loop). Both are
+found the same way: the slots of the job's schedule between the last handled fire
+(Cronjob.last_fire_at, kept in memory and flushed every few seconds) and now.
+
+Per-job misfire_policy:
+- skip: missed fires are dropped (a late fire does not run); the next on-time fire runs.
+- coalesce: all missed fires become one run (catch_up="coalesced", missed_fires=N).
+- replay_all: every missed fire runs with its own scheduled_at (catch_up="replayed"),
+  the MISFIRE_REPLAY_MAX most recent ones per job.
+
+skip never lists the missed slots (the first one is enough to know there was a
+gap). A startup catch-up checks each job's first missed slot on the event loop;
+the full lists for coalesce (count) and replay_all are built in a thread.
+
+Catch-up runs do not start at once: CatchUpQueue drains them at MISFIRE_CATCHUP_RATE
+runs per second, round-robin over jobs, never two runs of one job at the same time.
+"""
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, update
+
+from app.config import MISFIRE_CATCHUP_RATE, MISFIRE_GRACE_SECONDS, MISFIRE_REPLAY_MAX
+from app.database.database import async_session
+from app.database.models import Cronjob
+from app.services.cronjob.cron import compile_cron
+
+logger = logging.getLogger(__name__)
+
+MISFIRE_POLICIES = ("skip", "coalesce", "replay_all")
+# Seconds between writes of the last fire times
+FLUSH_INTERVAL = 5.0
+# Slots examined per job and gap (a per-second job down for a day stops counting here)
+MAX_SCANNED_SLOTS = 10_000
+
+
+class Fire(NamedTuple):
+    cronjob_id: int
+    scheduled_at: Optional[datetime]  # naive UTC
+    catch_up: Optional[str] = None  # coalesced | replayed
+    missed_fires: Optional[int] = None  # fires this run stands for (coalesced)
+
+
+def slots_between(
+    expression: str, offset: int, after: datetime, until: datetime, limit: int = MAX_SCANNED_SLOTS,
+) -> Tuple[List[datetime], bool]:
+    """Fire times (naive UTC, offset included) in (after, until], oldest first, at most `limit` -> (slots, truncated).
+
+    Cron expressions are evaluated in server local time, like the scheduler backends."""
+    spec = compile_cron(" ".join(expression.split()))
+    ts = after.replace(tzinfo=timezone.utc).timestamp()
+    until_ts = until.replace(tzinfo=timezone.utc).timestamp()
+    slots: List[datetime] = []
+    while len(slots) < limit:
+        nxt = spec.next_after(datetime.fromtimestamp(ts - offset))
+        if nxt is None:
+            break
+        ts = nxt.timestamp() + offset
+        if ts > until_ts:
+            return slots, False
+        slots.append(datetime.utcfromtimestamp(ts))
+    return slots, len(slots) >= limit
+
+
+class _JobState:
+    __slots__ = ("expression", "offset", "policy", "last")
+
+    def __init__(self, expression: str, offset: int, policy: str, last: Optional[datetime]):
+        self.expression = expression
+        self.offset = offset
+        self.policy = policy
+        self.last = last
+
+
+class MisfireTracker:
+    """Last handled fire per scheduled job and the misfire decision for each dispatch (leader only)."""
+
+    def __init__(self):
+        self.jobs: Dict[int, _JobState] = {}
+        self._dirty: Dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def sync(self, rows: Iterable) -> None:
+        """Rows of (id, cron_expression, spread_offset, misfire_policy, last_fire_at) for the scheduled jobs.
+
+        A NULL last_fire_at resets the job (schedule changed or re-enabled: nothing counts as missed);
+        otherwise the newer of the stored and the in-memory (not yet flushed) time wins. Jobs no
+        longer scheduled (deleted, disabled) lose their unflushed time."""
+        jobs = {}
+        for cronjob_id, expression, offset, policy, last_fire_at in rows:
+            known = self.jobs.get(cronjob_id)
+            last = last_fire_at
+            if last is None:
+                self._dirty.pop(cronjob_id, None)
+            elif known is not None and known.last is not None and known.last > last:
+                last = known.last
+            jobs[cronjob_id] = _JobState(expression, offset or 0, policy or "skip", last)
+        self.jobs = jobs
+        for cronjob_id in [i for i in self._dirty if i not in jobs]:
+            del self._dirty[cronjob_id]
+
+    def _handled(self, state: _JobState, cronjob_id: int, upto: datetime) -> None:
+        state.last = upto
+        self._dirty[cronjob_id] = upto
+
+    def _missed(self, state: _JobState, cronjob_id: int, after: datetime, until: datetime, limit: int = MAX_SCANNED_SLOTS) -> List[datetime]:
+        try:
+            slots, truncated = slots_between(state.expression, state.offset, after, until, limit)
+        except ValueError:
+            return []
+        if truncated and limit == MAX_SCANNED_SLOTS:
+            logger.warning(f"Cronjob {cronjob_id}: more than {MAX_SCANNED_SLOTS} missed fires since {after}, counting stopped")
+        return slots
+
+    def _apply(self, state: _JobState, cronjob_id: int, missed: List[datetime], now_fire: Optional[Fire]) -> Tuple[Optional[Fire], List[Fire]]:
+        """(fire to run now, fires for the catch-up queue) under the job's policy."""
+        if not missed:
+            return now_fire, []
+        if state.policy == "coalesce":
+            if now_fire is not None:  # the on-time run stands for the missed ones too
+                return now_fire._replace(catch_up="coalesced", missed_fires=len(missed)), []
+            return None, [Fire(cronjob_id, missed[-1], "coalesced", len(missed))]
+        if state.policy == "replay_all":
+            replay = missed[-MISFIRE_REPLAY_MAX:] if MISFIRE_REPLAY_MAX > 0 else []
+            if len(replay) < len(missed):
+                logger.warning(f"Cronjob {cronjob_id}: replaying the last {len(replay)} of {len(missed)} missed fires")
+            return now_fire, [Fire(cronjob_id, t, "replayed", 1) for t in replay]
+        return now_fire, []
+
+    def plan(self, cronjob_id: int, scheduled_at: datetime, now: datetime) -> Tuple[Optional[Fire], List[Fire]]:
+        """Decide a backend dispatch -> (fire to run now, fires for the catch-up queue)."""
+        state = self.jobs.get(cronjob_id)
+        if state is None:
+            return Fire(cronjob_id, scheduled_at), []
+        if state.last is not None and scheduled_at <= state.last:
+            return None, []  # already handled (e.g. by the startup catch-up)
+        late = (now - scheduled_at).total_seconds() > MISFIRE_GRACE_SECONDS
+        if state.policy not in ("coalesce", "replay_all"):
+            # skip: no slot list needed, at most the first missed slot for the log
+            if late:
+                self._handled(state, cronjob_id, now)
+                logger.info(f"Cronjob {cronjob_id}: skipped late fire of {scheduled_at}")
+                return None, []
+            first = self._missed(state, cronjob_id, state.last, scheduled_at, limit=1) if state.last is not None else []
+            self._handled(state, cronjob_id, scheduled_at)
+            if first and first[0] < scheduled_at:
+                logger.info(f"Cronjob {cronjob_id}: skipped missed fire(s) since {first[0]}")
+            return Fire(cronjob_id, scheduled_at), []
+        if late:
+            # Everything due up to now was missed, this fire included
+            missed = self._missed(state, cronjob_id, state.last, now) if state.last is not None else []
+            missed = missed or [scheduled_at]
+            self._handled(state, cronjob_id, max(missed[-1], scheduled_at))
+            return self._apply(state, cronjob_id, missed, None)
+        missed = []
+        if state.last is not None:
+            missed = [t for t in self._missed(state, cronjob_id, state.last, scheduled_at) if t < scheduled_at]
+        self._handled(state, cronjob_id, scheduled_at)
+        return self._apply(state, cronjob_id, missed, Fire(cronjob_id, scheduled_at))
+
+    async def catch_up_all(self, now: datetime) -> List[Fire]:
+        """Fires missed while no scheduler was running (startup, new leader) -> catch-up queue items.
+
+        Every job with a missed slot is marked handled up to `now` before anything is awaited,
+        so dispatches arriving meanwhile see no gap; the slot lists are built in a thread."""
+        scans: List[Tuple[int, _JobState, datetime]] = []
+        skipped = 0
+        for cronjob_id, state in self.jobs.items():
+            if state.last is None or not self._missed(state, cronjob_id, state.last, now, limit=1):
+                continue
+            after = state.last
+            self._handled(state, cronjob_id, now)
+            if state.policy in ("coalesce", "replay_all"):
+                scans.append((cronjob_id, state, after))
+            else:
+                skipped += 1
+        if skipped:
+            logger.info(f"Catch-up: missed fires of {skipped} job(s) skipped (misfire_policy=skip)")
+        if not scans:
+            return []
+        slots = await asyncio.to_thread(
+            lambda: [self._missed(state, cronjob_id, after, now) for cronjob_id, state, after in scans]
+        )
+        queued: List[Fire] = []
+        for (cronjob_id, state, _), missed in zip(scans, slots):
+            queued.extend(self._apply(state, cronjob_id, missed, None)[1])
+        if queued:
+            logger.info(f"Catch-up: {len(queued)} run(s) queued for missed fires")
+        return queued
+
+    async def flush(self) -> None:
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        # Core executemany: a job deleted since its fire matches no row instead of failing the batch
+        table = Cronjob.__table__
+        statement = update(table).where(table.c.id == bindparam("job_id")).values(last_fire_at=bindparam("fired_at"))
+        try:
+            async with async_session() as db:
+                await db.execute(statement, [{"job_id": i, "fired_at": t} for i, t in dirty.items()])
+                await db.commit()
+        except Exception as e:
+            for cronjob_id, t in dirty.items():  # retried next round unless newer by then
+                self._dirty.setdefault(cronjob_id, t)
+            logger.warning(f"Could not save last fire times: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+
+class CatchUpQueue:
+    """Catch-up fires started at `rate` per second, round-robin over jobs, one run per job at a time."""
+
+    def __init__(self, launch: Callable[[Fire], None], busy: Callable[[int], bool], rate: float = MISFIRE_CATCHUP_RATE):
+        self._launch = launch
+        self._busy = busy
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._pending: "OrderedDict[int, Deque[Fire]]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self._pending.values())
+
+    def add(self, fires: Iterable[Fire]) -> None:
+        for fire in fires:
+            self._pending.setdefault(fire.cronjob_id, deque()).append(fire)
+        if self._wakeup is not None and self._pending:
+            self._wakeup.set()
+
+    def _next(self) -> Optional[Fire]:
+        for cronjob_id in list(self._pending):
+            if self._busy(cronjob_id):
+                continue
+            fires = self._pending.pop(cronjob_id)
+            fire = fires.popleft()
+            if fires:
+                self._pending[cronjob_id] = fires  # back of the line
+            return fire
+        return None
+
+    async def _drain(self) -> None:
+        while True:
+            fire = self._next()
+            if fire is None:
+                self._wakeup.clear()
+                try:
+                    # Jobs still busy: look again shortly; nothing queued: wait for add()
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=0.5 if self._pending else None)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                self._launch(fire)
+            except Exception as e:
+                logger.exception(f"Catch-up dispatch error for {fire.cronjob_id}: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+
+    def stop(self) -> None:
+        """Drop what is still queued; those fires stay handled (last_fire_at already moved past them)."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._pending:
+            logger.warning(f"Catch-up: {len(self)} queued run(s) dropped at shutdown")
+            self._pending.clear()
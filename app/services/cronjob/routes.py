@@ -1,15 +1,34 @@
 """Cronjob API routes."""
-from typing import Optional
+import asyncio
+import json
+import math
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
-from sqlalchemy import select, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Float, cast, delete, or_, select, func, update
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from app.auth.dependencies import require_setup_complete
-from app.database.database import get_db
-from app.database.models import Cronjob, CronjobLog, User
-from app.services.cronjob.scheduler import load_cronjobs_into_scheduler
+from app.database.database import async_session, get_db
+from app.database.models import Cronjob, CronjobDependency, CronjobLog, CronjobRun, User
+from app.http_cache import json_response
+from app.services.cronjob import archive
+from app.services.cronjob.analysis import forecast_load
+from app.services.cronjob.breaker import breakers, read_breaker_state
+from app.services.cronjob.cron import CronError, validate_cron
+from app.services.cronjob.executor import OK_STATUSES
+from app.services.cronjob.misfire import MISFIRE_POLICIES
+from app.services.cronjob.log_export import encode_rows, gzip_stream, iter_log_rows
+from app.services.cronjob.search import SearchQueryError, build_match, parse_cursor, search_logs
+from app.services.cronjob.scheduler import MAX_SPREAD_SECONDS, compute_spread_offset, reload_scheduler
+from app.services.cronjob.workflow import find_cycle, load_dependencies, run_dict
 
 router = APIRouter(prefix="/api/cronjobs", tags=["cronjobs"])
 
@@ -19,7 +38,16 @@ class CronjobCreate(BaseModel):
     url: str
     method: str = "CURL"
     cron_expression: str
+    enabled: bool = True
     enable_log: bool = True
+    spread_seconds: int = 0
+    timeout_seconds: int = 30
+    max_retries: int = 0
+    retry_backoff_seconds: int = 2
+    change_detection: bool = False
+    on_change_cronjob_id: Optional[int] = None
+    depends_on: List[int] = []  # runs after these jobs succeeded, as one graph (see workflow.py)
+    misfire_policy: str = "skip"
 
 
 class CronjobUpdate(BaseModel):
@@ -29,29 +57,684 @@ class CronjobUpdate(BaseModel):
     cron_expression: Optional[str] = None
     enabled: Optional[bool] = None
     enable_log: Optional[bool] = None
+    spread_seconds: Optional[int] = None
+    timeout_seconds: Optional[int] = None
+    max_retries: Optional[int] = None
+    retry_backoff_seconds: Optional[int] = None
+    change_detection: Optional[bool] = None
+    on_change_cronjob_id: Optional[int] = None  # 0 clears the follow-up
+    depends_on: Optional[List[int]] = None  # [] clears the dependencies
+    misfire_policy: Optional[str] = None
+
+
+class CronjobBulkUpdate(CronjobUpdate):
+    id: int
+
+
+class CronjobBulk(BaseModel):
+    """One transaction: create, update, enable/disable, delete (in that order), then one reload."""
+    create: List[dict] = []
+    update: List[dict] = []
+    enable: List[int] = []
+    disable: List[int] = []
+    delete: List[int] = []
+
+
+# Giới hạn chính sách timeout / retry của một cronjob
+RETRY_POLICY_LIMITS = {"timeout_seconds": (1, 300), "max_retries": (0, 10), "retry_backoff_seconds": (0, 300)}
+
+# Bulk / import: số dòng tối đa mỗi request, số lỗi tối đa trả về
+BULK_MAX_ROWS = 20000
+BULK_MAX_ERRORS = 200
+# Fields written by export and accepted by import (id is exported for reference, ignored on import)
+EXPORT_FIELDS = (
+    "name", "url", "method", "cron_expression", "enabled", "enable_log",
+    "spread_seconds", "timeout_seconds", "max_retries", "retry_backoff_seconds", "change_detection",
+    "misfire_policy",
+)
+
+
+def _validated_cron(expression: str) -> str:
+    """Reject invalid cron expressions at write time (400) instead of at scheduler load."""
+    expression = expression.strip()
+    try:
+        validate_cron(expression)
+    except CronError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cron expression: {e}")
+    return expression
+
+
+def _validated_spread(spread_seconds: int) -> int:
+    if not 0 <= spread_seconds <= MAX_SPREAD_SECONDS:
+        raise HTTPException(status_code=400, detail=f"spread_seconds must be between 0 and {MAX_SPREAD_SECONDS}")
+    return spread_seconds
+
+
+def _validated_misfire_policy(policy: str) -> str:
+    if policy not in MISFIRE_POLICIES:
+        raise HTTPException(status_code=400, detail=f"misfire_policy must be one of {', '.join(MISFIRE_POLICIES)}")
+    return policy
+
+
+def _validated_policy(data: BaseModel) -> dict:
+    """Timeout/retry fields that were set, range-checked (400 when out of range)."""
+    values = {}
+    for field, (low, high) in RETRY_POLICY_LIMITS.items():
+        value = getattr(data, field)
+        if value is None:
+            continue
+        if not low <= value <= high:
+            raise HTTPException(status_code=400, detail=f"{field} must be between {low} and {high}")
+        values[field] = value
+    return values
+
+
+def _job_dict(j: Cronjob) -> dict:
+    return {
+        "id": j.id,
+        "name": j.name,
+        "url": j.url,
+        "method": j.method,
+        "cron_expression": j.cron_expression,
+        "enabled": j.enabled,
+        "enable_log": j.enable_log,
+        "spread_seconds": j.spread_seconds,
+        "spread_offset": j.spread_offset,
+        "timeout_seconds": j.timeout_seconds,
+        "max_retries": j.max_retries,
+        "retry_backoff_seconds": j.retry_backoff_seconds,
+        "change_detection": j.change_detection,
+        "on_change_cronjob_id": j.on_change_cronjob_id,
+        "content_changed_at": j.content_changed_at.isoformat() if j.content_changed_at else None,
+        "misfire_policy": j.misfire_policy,
+        "last_fire_at": j.last_fire_at.isoformat() if j.last_fire_at else None,
+        "created_at": j.created_at.isoformat() if j.created_at else None,
+    }
+
+
+def _new_cronjob(data: CronjobCreate) -> Cronjob:
+    """Validated (400) new Cronjob; spread_offset is set once the id is known."""
+    if data.method.upper() not in ("CURL", "WGET", "GET", "POST"):
+        raise HTTPException(status_code=400, detail="Method must be CURL, WGET, GET, or POST")
+    return Cronjob(
+        name=data.name,
+        url=data.url,
+        method=data.method.upper(),
+        cron_expression=_validated_cron(data.cron_expression),
+        enabled=data.enabled,
+        enable_log=data.enable_log,
+        spread_seconds=_validated_spread(data.spread_seconds),
+        change_detection=data.change_detection,
+        on_change_cronjob_id=data.on_change_cronjob_id or None,
+        misfire_policy=_validated_misfire_policy(data.misfire_policy),
+        **_validated_policy(data),
+    )
+
+
+def _apply_update(job: Cronjob, data: CronjobUpdate) -> None:
+    """Apply the fields set in `data` to `job` (400 on invalid values)."""
+    if data.name is not None:
+        job.name = data.name
+    target = (job.url, job.method)
+    if data.url is not None:
+        job.url = data.url
+    if data.method is not None:
+        if data.method.upper() not in ("CURL", "WGET", "GET", "POST"):
+            raise HTTPException(status_code=400, detail="Invalid method")
+        job.method = data.method.upper()
+    if (job.url, job.method) != target:
+        # Validators and hash belong to the old target; the next run sets a new baseline
+        job.http_etag = job.http_last_modified = job.body_hash = None
+    if data.change_detection is not None:
+        job.change_detection = data.change_detection
+    if data.on_change_cronjob_id is not None:
+        job.on_change_cronjob_id = data.on_change_cronjob_id or None
+    schedule = (job.cron_expression, job.enabled, job.spread_seconds)
+    if data.cron_expression is not None:
+        job.cron_expression = _validated_cron(data.cron_expression)
+    if data.enabled is not None:
+        job.enabled = data.enabled
+    if data.enable_log is not None:
+        job.enable_log = data.enable_log
+    if data.spread_seconds is not None:
+        job.spread_seconds = _validated_spread(data.spread_seconds)
+        job.spread_offset = compute_spread_offset(job.id, job.spread_seconds)
+    if (job.cron_expression, job.enabled, job.spread_seconds) != schedule:
+        # New schedule / re-enabled: fires before now are not "missed"
+        job.last_fire_at = None
+    if data.misfire_policy is not None:
+        job.misfire_policy = _validated_misfire_policy(data.misfire_policy)
+    for field, value in _validated_policy(data).items():
+        setattr(job, field, value)
+
+
+async def _validate_follow_ups(db: AsyncSession, jobs: List[Cronjob]) -> None:
+    """400 when an on-change follow-up points at the job itself or at a job that does not exist."""
+    targets = {j.on_change_cronjob_id for j in jobs if j.on_change_cronjob_id}
+    if not targets:
+        return
+    existing = set()
+    for chunk in _chunks(list(targets)):
+        existing.update((await db.execute(select(Cronjob.id).where(Cronjob.id.in_(chunk)))).scalars())
+    for job in jobs:
+        if job.on_change_cronjob_id and job.on_change_cronjob_id == job.id:
+            raise HTTPException(status_code=400, detail="on_change_cronjob_id cannot be the job itself")
+        if job.on_change_cronjob_id and job.on_change_cronjob_id not in existing:
+            raise HTTPException(status_code=400, detail=f"on_change_cronjob_id {job.on_change_cronjob_id}: cronjob not found")
+
+
+async def _save_dependencies(db: AsyncSession, changes: dict) -> None:
+    """Replace the dependencies of the jobs in `changes` ({id: [ids]}); 400 on unknown ids, self or a cycle."""
+    changes = {job_id: sorted(set(deps)) for job_id, deps in changes.items()}
+    if not changes:
+        return
+    targets = sorted({d for deps in changes.values() for d in deps})
+    existing = set()
+    for chunk in _chunks(targets):
+        existing.update((await db.execute(select(Cronjob.id).where(Cronjob.id.in_(chunk)))).scalars())
+    for job_id, deps in changes.items():
+        if job_id in deps:
+            raise HTTPException(status_code=400, detail=f"Cronjob {job_id} cannot depend on itself")
+        missing = [d for d in deps if d not in existing]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"depends_on: cronjob {missing[0]} not found")
+    cycle = find_cycle({**await load_dependencies(db), **changes})
+    if cycle is not None:
+        raise HTTPException(status_code=400, detail=f"Dependency cycle: {' -> '.join(map(str, cycle))}")
+    for chunk in _chunks(list(changes)):
+        await db.execute(delete(CronjobDependency).where(CronjobDependency.cronjob_id.in_(chunk)))
+    db.add_all(
+        CronjobDependency(cronjob_id=job_id, depends_on_id=d) for job_id, deps in changes.items() for d in deps
+    )
+
+
+async def _delete_jobs(db: AsyncSession, ids: List[int]) -> None:
+    """Delete jobs with their logs, runs and graph edges; follow-ups pointing at them are cleared
+    (SQLite does not enforce the foreign key actions)."""
+    for chunk in _chunks(ids):
+        await db.execute(
+            update(Cronjob).where(Cronjob.on_change_cronjob_id.in_(chunk)).values(on_change_cronjob_id=None)
+        )
+        await db.execute(delete(CronjobDependency).where(
+            or_(CronjobDependency.cronjob_id.in_(chunk), CronjobDependency.depends_on_id.in_(chunk))
+        ))
+        await db.execute(delete(CronjobRun).where(CronjobRun.cronjob_id.in_(chunk)))
+        await db.execute(delete(CronjobLog).where(CronjobLog.cronjob_id.in_(chunk)))
+        await db.execute(delete(Cronjob).where(Cronjob.id.in_(chunk)))
+
+
+def _next_fires(expression: str, n: int, offset: int = 0) -> dict:
+    spec = validate_cron(expression)
+    now = datetime.now()
+    shift = timedelta(seconds=offset)
+    return {
+        "expression": spec.expression,
+        "spread_offset": offset,
+        "now": now.replace(microsecond=0).isoformat(),
+        "next": [(t + shift).isoformat() for t in spec.next_n(now - shift, n)],
+    }
+
+
+# Columns of the job list; the ORM objects (and their relationships) are not loaded
+_LIST_COLUMNS = (
+    Cronjob.id, Cronjob.name, Cronjob.url, Cronjob.method, Cronjob.cron_expression, Cronjob.enabled,
+    Cronjob.enable_log, Cronjob.spread_seconds, Cronjob.spread_offset, Cronjob.timeout_seconds,
+    Cronjob.max_retries, Cronjob.retry_backoff_seconds, Cronjob.change_detection, Cronjob.on_change_cronjob_id,
+    Cronjob.content_changed_at, Cronjob.misfire_policy, Cronjob.last_fire_at, Cronjob.created_at,
+)
+LIST_SORTS = ("id", "name", "created_at", "last_run", "last_status", "success_rate")
+
+
+def _list_query(since: datetime):
+    """(select of list rows, latest-run alias, sort expressions); one correlated lookup per job, all on
+    ix_cronjob_logs_job_time: the latest run by (executed_at, id) and the run / success counts since `since`."""
+    last = aliased(CronjobLog)
+    latest_id = (
+        select(CronjobLog.id)
+        .where(CronjobLog.cronjob_id == Cronjob.id)
+        .order_by(CronjobLog.executed_at.desc(), CronjobLog.id.desc())
+        .limit(1)
+        .correlate(Cronjob)
+        .scalar_subquery()
+    )
+    window = (CronjobLog.cronjob_id == Cronjob.id, CronjobLog.executed_at >= since)
+    runs = select(func.count()).where(*window).correlate(Cronjob).scalar_subquery()
+    ok = select(func.count()).where(*window, CronjobLog.status.in_(OK_STATUSES)).correlate(Cronjob).scalar_subquery()
+    success_rate = cast(ok, Float) / func.nullif(runs, 0)
+    depends_on = (
+        select(func.group_concat(CronjobDependency.depends_on_id))
+        .where(CronjobDependency.cronjob_id == Cronjob.id)
+        .correlate(Cronjob)
+        .scalar_subquery()
+    )
+    query = select(
+        *_LIST_COLUMNS,
+        last.status.label("last_status"), last.status_code.label("last_status_code"),
+        last.duration_ms.label("last_duration_ms"), last.executed_at.label("last_run_at"),
+        last.lag_ms.label("last_lag_ms"), last.catch_up.label("last_catch_up"),
+        last.missed_fires.label("last_missed_fires"),
+        runs.label("runs_24h"), success_rate.label("success_rate_24h"), depends_on.label("depends_on"),
+    ).outerjoin(last, last.id == latest_id)
+    sorts = {
+        "id": Cronjob.id, "name": Cronjob.name, "created_at": Cronjob.created_at,
+        "last_run": last.executed_at, "last_status": last.status, "success_rate": success_rate,
+    }
+    return query, last, sorts
+
+
+def _list_row(row) -> dict:
+    job = {c.key: row._mapping[c.key] for c in _LIST_COLUMNS}
+    job["depends_on"] = sorted(int(d) for d in row.depends_on.split(",")) if row.depends_on else []
+    job["last_run"] = None if row.last_status is None else {
+        "status": row.last_status,
+        "status_code": row.last_status_code,
+        "duration_ms": row.last_duration_ms,
+        "executed_at": row.last_run_at,
+        "lag_ms": row.last_lag_ms,
+        "catch_up": row.last_catch_up,
+        "missed_fires": row.last_missed_fires,
+    }
+    job["runs_24h"] = row.runs_24h
+    job["success_rate_24h"] = round(row.success_rate_24h, 4) if row.success_rate_24h is not None else None
+    return job
 
 
 @router.get("")
 async def list_cronjobs(
+    request: Request,
+    q: Optional[str] = Query(None, max_length=200, description="substring of name or URL (case-insensitive)"),
+    enabled: Optional[bool] = Query(None),
+    last_status: Optional[str] = Query(None, description="status of the latest run; 'never' = not run yet"),
+    sort: str = Query("id", pattern=f"^-?({'|'.join(LIST_SORTS)})$", description="'-' prefix = descending"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="omit for every job"),
+    offset: int = Query(0, ge=0),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_setup_complete),
 ):
-    """List all cronjobs."""
-    result = await db.execute(select(Cronjob).order_by(Cronjob.id))
-    jobs = result.scalars().all()
-    return [
-        {
-            "id": j.id,
-            "name": j.name,
-            "url": j.url,
-            "method": j.method,
-            "cron_expression": j.cron_expression,
-            "enabled": j.enabled,
-            "enable_log": j.enable_log,
-            "created_at": j.created_at.isoformat() if j.created_at else None,
-        }
-        for j in jobs
+    """Jobs with their latest run and 24h success rate; total before paging in X-Total-Count.
+
+    Weak ETag: 304 when nothing changed (a new run changes the list)."""
+    query, last, sorts = _list_query(datetime.utcnow() - timedelta(hours=24))
+    if q:
+        query = query.where(or_(Cronjob.name.icontains(q, autoescape=True), Cronjob.url.icontains(q, autoescape=True)))
+    if enabled is not None:
+        query = query.where(Cronjob.enabled == enabled)
+    if last_status == "never":
+        query = query.where(last.id.is_(None))
+    elif last_status:
+        query = query.where(last.status == last_status)
+
+    total = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+    key = sorts[sort.lstrip("-")]
+    query = query.order_by(key.desc() if sort.startswith("-") else key, Cronjob.id).offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    rows = (await db.execute(query)).all()
+    return json_response(request, [_list_row(r) for r in rows], headers={"X-Total-Count": str(total)})
+
+
+def _percentile(sorted_values: List[int], q: float) -> int:
+    """Nearest-rank percentile of an already sorted list."""
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+def _lag_stats(lags: List[int], waits: List[int]) -> dict:
+    lags.sort()
+    waits.sort()
+    return {
+        "runs": len(lags),
+        "lag_p50_ms": _percentile(lags, 0.50),
+        "lag_p95_ms": _percentile(lags, 0.95),
+        "lag_max_ms": lags[-1],
+        "queue_wait_p95_ms": _percentile(waits, 0.95) if waits else None,
+    }
+
+
+@router.get("/lateness")
+async def get_lateness_report(
+    hours: int = Query(24, ge=1, le=168),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_setup_complete),
+):
+    """Start lag (actual start - scheduled fire time) per job and per minute-of-hour."""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    result = await db.execute(
+        select(CronjobLog.cronjob_id, CronjobLog.scheduled_at, CronjobLog.lag_ms, CronjobLog.queue_wait_ms)
+        .where(CronjobLog.scheduled_at >= since, CronjobLog.lag_ms.is_not(None))
+    )
+    by_job = defaultdict(lambda: ([], []))
+    by_minute = defaultdict(lambda: ([], []))
+    for cronjob_id, scheduled_at, lag_ms, queue_wait_ms in result.all():
+        for bucket in (by_job[cronjob_id], by_minute[scheduled_at.minute]):
+            bucket[0].append(lag_ms)
+            if queue_wait_ms is not None:
+                bucket[1].append(queue_wait_ms)
+
+    names = dict((await db.execute(select(Cronjob.id, Cronjob.name))).all())
+    jobs = [
+        {"cronjob_id": job_id, "name": names.get(job_id), **_lag_stats(*values)}
+        for job_id, values in by_job.items()
     ]
+    jobs.sort(key=lambda j: j["lag_p95_ms"], reverse=True)
+    minutes = [
+        {"minute": minute, **_lag_stats(*by_minute[minute])}
+        for minute in sorted(by_minute)
+    ]
+    return {"hours": hours, "jobs": jobs, "minutes": minutes}
+
+
+@router.get("/breakers")
+async def get_circuit_breakers(
+    current_user: User = Depends(require_setup_complete),
+):
+    """Per-host circuit breaker state of the process executing scheduled runs."""
+    if breakers.persistent:
+        return {"pid": os.getpid(), "live": True, "breakers": breakers.snapshot()}
+    state = read_breaker_state()
+    if state is None:
+        return {"pid": None, "live": False, "breakers": []}
+    return {**state, "live": False}
+
+
+@router.get("/logs/export")
+async def export_cronjob_logs(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(csv|ndjson)$"),
+    cronjob_id: Optional[List[int]] = Query(None, description="repeat for several jobs; omit for all"),
+    since: Optional[datetime] = Query(None, description="executed_at >= since (UTC)"),
+    until: Optional[datetime] = Query(None, description="executed_at < until (UTC)"),
+    after_id: int = Query(0, ge=0, description="resume: last log id already received"),
+    include_output: bool = Query(False),
+    current_user: User = Depends(require_setup_complete),
+):
+    """Stream execution history oldest-first as CSV or NDJSON; gzip when the client accepts it."""
+    body = encode_rows(iter_log_rows(cronjob_id, since, until, after_id, include_output), format, include_output)
+    headers = {
+        "Content-Disposition": f'attachment; filename="cronjob_logs.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if "gzip" in request.headers.get("accept-encoding", "").lower():
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+@router.get("/logs/search")
+async def search_cronjob_logs(
+    q: str = Query(..., min_length=1, max_length=500),
+    cronjob_id: Optional[int] = Query(None),
+    raw: bool = Query(False, description="q is FTS5 query syntax (AND/OR/NOT, \"phrases\", column:term)"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_setup_complete),
+):
+    """Ranked full-text hits over log output/error across all jobs, with [[highlighted]] snippets.
+
+    Only rows still in the main DB are indexed: archived logs are not searched. When archive files
+    exist, archived_before says up to when results may be missing rows.
+    """
+    try:
+        hits, next_cursor = await search_logs(db, build_match(q, raw), cronjob_id, limit, parse_cursor(cursor))
+    except SearchQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {e.orig}")
+    # Archive chuyển log sang file tháng và xoá khỏi FTS index - báo rõ kết quả thiếu phần đó
+    archived_before = archive.archived_before()
+    return {
+        "q": q,
+        "hits": hits,
+        "next_cursor": next_cursor,
+        "archived_excluded": archived_before is not None,
+        "archived_before": archived_before.isoformat() if archived_before else None,
+    }
+
+
+@router.get("/preview")
+async def preview_cron_expression(
+    expression: str = Query(..., min_length=1, max_length=100),
+    n: int = Query(10, ge=1, le=500),
+    current_user: User = Depends(require_setup_complete),
+):
+    """Validate an expression and return its next N fire times (server local time)."""
+    try:
+        return _next_fires(expression, n)
+    except CronError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cron expression: {e}")
+
+
+@router.get("/analysis/hotspots")
+async def get_schedule_hotspots(
+    hours: int = Query(24, ge=1, le=168),
+    top: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_setup_complete),
+):
+    """Forecast fires of all enabled jobs over the next `hours`: per-minute load and busiest seconds."""
+    result = await db.execute(
+        select(Cronjob.id, Cronjob.name, Cronjob.cron_expression, Cronjob.spread_offset)
+        .where(Cronjob.enabled == True)
+    )
+    start = datetime.now().replace(second=0, microsecond=0) + timedelta(minutes=1)
+    # CPU-bound for large job sets - keep it off the event loop
+    return await asyncio.to_thread(forecast_load, result.all(), start, hours, top)
+
+
+def _row_error(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(str(x) for x in err['loc'])}: {err['msg']}" for err in e.errors())
+    if isinstance(e, HTTPException):
+        return str(e.detail)
+    return str(e)
+
+
+def _raise_row_errors(errors: List[dict]) -> None:
+    if errors:
+        raise HTTPException(status_code=400, detail={
+            "message": f"{len(errors)} invalid row(s), nothing was changed",
+            "errors": errors[:BULK_MAX_ERRORS],
+        })
+
+
+def _chunks(ids: List[int], size: int = 500):
+    """SQLite caps bound parameters per statement."""
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+async def _add_new_jobs(db: AsyncSession, jobs: List[Cronjob]) -> List[int]:
+    """Insert validated jobs in the current transaction; ids are needed for the spread offsets."""
+    db.add_all(jobs)
+    await db.flush()
+    for job in jobs:
+        job.spread_offset = compute_spread_offset(job.id, job.spread_seconds)
+    return [job.id for job in jobs]
+
+
+@router.post("/bulk")
+async def bulk_cronjobs(
+    data: CronjobBulk,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_setup_complete),
+):
+    """Create/update/enable/disable/delete many jobs in one transaction; all rows are validated first."""
+    total = len(data.create) + len(data.update) + len(data.enable) + len(data.disable) + len(data.delete)
+    if total > BULK_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ROWS} rows per request")
+
+    errors: List[dict] = []
+    new_jobs: List[Cronjob] = []
+    new_deps: List[List[int]] = []
+    for i, row in enumerate(data.create):
+        try:
+            create = CronjobCreate.model_validate(row)
+            new_jobs.append(_new_cronjob(create))
+            new_deps.append(create.depends_on)
+        except (ValidationError, HTTPException) as e:
+            errors.append({"section": "create", "row": i, "error": _row_error(e)})
+
+    updates: List[Tuple[int, CronjobBulkUpdate]] = []
+    for i, row in enumerate(data.update):
+        try:
+            updates.append((i, CronjobBulkUpdate.model_validate(row)))
+        except ValidationError as e:
+            errors.append({"section": "update", "row": i, "error": _row_error(e)})
+
+    ids = list({u.id for _, u in updates} | set(data.enable) | set(data.disable) | set(data.delete))
+    jobs = {}
+    for chunk in _chunks(ids):
+        result = await db.execute(select(Cronjob).where(Cronjob.id.in_(chunk)))
+        jobs.update((j.id, j) for j in result.scalars())
+    for section, section_ids in (
+        ("update", [u.id for _, u in updates]), ("enable", data.enable),
+        ("disable", data.disable), ("delete", data.delete),
+    ):
+        for i, cronjob_id in enumerate(section_ids):
+            if cronjob_id not in jobs:
+                errors.append({"section": section, "row": i, "id": cronjob_id, "error": "Cronjob not found"})
+
+    for i, u in updates:
+        if u.id in jobs:
+            try:
+                _apply_update(jobs[u.id], u)
+            except HTTPException as e:
+                errors.append({"section": "update", "row": i, "id": u.id, "error": _row_error(e)})
+    _raise_row_errors(errors)  # session is discarded uncommitted
+
+    created = await _add_new_jobs(db, new_jobs)
+    await _validate_follow_ups(db, new_jobs + [jobs[u.id] for _, u in updates])
+    await _save_dependencies(db, {
+        **{job.id: deps for job, deps in zip(new_jobs, new_deps) if deps},
+        **{u.id: u.depends_on for _, u in updates if u.depends_on is not None},
+    })
+    for enabled, section_ids in ((True, data.enable), (False, data.disable)):
+        for chunk in _chunks(list(set(section_ids))):
+            # Only jobs actually switched on start over (no missed fires); already-enabled ones keep theirs
+            values = {"enabled": True, "last_fire_at": None} if enabled else {"enabled": False}
+            await db.execute(update(Cronjob).where(Cronjob.id.in_(chunk), Cronjob.enabled != enabled).values(**values))
+    await _delete_jobs(db, list(set(data.delete)))
+    await db.commit()
+
+    await reload_scheduler()
+    return {
+        "created": created,
+        "updated": len(updates),
+        "enabled": len(set(data.enable)),
+        "disabled": len(set(data.disable)),
+        "deleted": len(set(data.delete)),
+    }
+
+
+async def _export_cronjobs(fmt: str) -> AsyncIterator[str]:
+    """Keyset batches by id: one short query per batch, memory bounded by the batch size."""
+    columns = [Cronjob.id] + [getattr(Cronjob, f) for f in EXPORT_FIELDS]
+    last_id, first = 0, True
+    if fmt == "json":
+        yield "["
+    while True:
+        async with async_session() as db:
+            result = await db.execute(
+                select(*columns).where(Cronjob.id > last_id).order_by(Cronjob.id).limit(500)
+            )
+            rows = result.all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        items = [json.dumps(row._asdict(), ensure_ascii=False) for row in rows]
+        if fmt == "json":
+            yield ("\n" if first else ",\n") + ",\n".join(items)
+        else:
+            yield "\n".join(items) + "\n"
+        first = False
+    if fmt == "json":
+        yield "\n]\n"
+
+
+@router.get("/export")
+async def export_cronjobs(
+    format: str = Query("ndjson", pattern="^(json|ndjson)$"),
+    current_user: User = Depends(require_setup_complete),
+):
+    """Stream every job definition as a JSON array or NDJSON (one job per line)."""
+    media_type = "application/json" if format == "json" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_cronjobs(format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="cronjobs.{format}"'},
+    )
+
+
+async def _read_import_rows(request: Request, fmt: str) -> Tuple[List[Tuple[int, object]], List[dict]]:
+    """(row number, parsed value) pairs and parse errors; NDJSON rows are numbered by line."""
+    rows, errors = [], []
+    if fmt == "json":
+        try:
+            payload = json.loads(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+        if isinstance(payload, dict):
+            payload = payload.get("jobs")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail='Expected a JSON array or {"jobs": [...]}')
+        rows = list(enumerate(payload))
+    else:
+        buffer, line_no = b"", 0
+
+        def take(line: bytes) -> None:
+            if line.strip():
+                try:
+                    rows.append((line_no, json.loads(line)))
+                except ValueError as e:
+                    errors.append({"row": line_no, "error": f"Invalid JSON: {e}"})
+
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_no += 1
+                take(line)
+            if len(rows) + len(errors) > BULK_MAX_ROWS:
+                break
+        line_no += 1
+        take(buffer)
+    if len(rows) + len(errors) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ROWS} rows per import")
+    return rows, errors
+
+
+@router.post("/import")
+async def import_cronjobs(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(json|ndjson)$"),
+    dry_run: bool = Query(False),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_setup_complete),
+):
+    """Import job definitions (export format). Every row is validated before anything is written."""
+    rows, errors = await _read_import_rows(request, format)
+    new_jobs, new_deps = [], []
+    for row_no, row in rows:
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("row must be a JSON object")
+            create = CronjobCreate.model_validate(row)
+            new_jobs.append(_new_cronjob(create))
+            new_deps.append(create.depends_on)
+        except (ValueError, HTTPException) as e:  # ValidationError is a ValueError
+            errors.append({"row": row_no, "error": _row_error(e)})
+    errors.sort(key=lambda e: e["row"])
+    _raise_row_errors(errors)
+    if dry_run:
+        return {"valid": len(new_jobs), "imported": 0}
+
+    created = await _add_new_jobs(db, new_jobs)
+    await _validate_follow_ups(db, new_jobs)
+    await _save_dependencies(db, {job.id: deps for job, deps in zip(new_jobs, new_deps) if deps})
+    await db.commit()
+    await reload_scheduler()
+    return {"valid": len(new_jobs), "imported": len(created), "ids": created}
 
 
 @router.post("")
@@ -61,21 +744,14 @@ async def create_cronjob(
     current_user: User = Depends(require_setup_complete),
 ):
     """Create new cronjob."""
-    if data.method.upper() not in ("CURL", "WGET", "GET", "POST"):
-        raise HTTPException(status_code=400, detail="Method must be CURL, WGET, GET, or POST")
-
-    cronjob = Cronjob(
-        name=data.name,
-        url=data.url,
-        method=data.method.upper(),
-        cron_expression=data.cron_expression.strip(),
-        enable_log=data.enable_log,
-    )
-    db.add(cronjob)
+    cronjob = _new_cronjob(data)
+    await _add_new_jobs(db, [cronjob])
+    await _validate_follow_ups(db, [cronjob])
+    await _save_dependencies(db, {cronjob.id: data.depends_on} if data.depends_on else {})
     await db.commit()
     await db.refresh(cronjob)
 
-    await load_cronjobs_into_scheduler()
+    await reload_scheduler()
     return {"id": cronjob.id, "message": "Cronjob created"}
 
 
@@ -90,16 +766,28 @@ async def get_cronjob(
     job = result.scalar_one_or_none()
     if not job:
         raise HTTPException(status_code=404, detail="Cronjob not found")
-    return {
-        "id": job.id,
-        "name": job.name,
-        "url": job.url,
-        "method": job.method,
-        "cron_expression": job.cron_expression,
-        "enabled": job.enabled,
-        "enable_log": job.enable_log,
-        "created_at": job.created_at.isoformat() if job.created_at else None,
-    }
+    dependencies = await load_dependencies(db, [job.id])
+    return {**_job_dict(job), "depends_on": dependencies.get(job.id, [])}
+
+
+@router.get("/{cronjob_id}/next")
+async def get_cronjob_next_fires(
+    cronjob_id: int,
+    n: int = Query(10, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_setup_complete),
+):
+    """Next N fire times of a cronjob (server local time)."""
+    result = await db.execute(
+        select(Cronjob.cron_expression, Cronjob.spread_offset).where(Cronjob.id == cronjob_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Cronjob not found")
+    try:
+        return {"id": cronjob_id, **_next_fires(row.cron_expression, n, row.spread_offset or 0)}
+    except CronError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cron expression: {e}")
 
 
 @router.put("/{cronjob_id}")
@@ -115,24 +803,13 @@ async def update_cronjob(
     if not job:
         raise HTTPException(status_code=404, detail="Cronjob not found")
 
-    if data.name is not None:
-        job.name = data.name
-    if data.url is not None:
-        job.url = data.url
-    if data.method is not None:
-        if data.method.upper() not in ("CURL", "WGET", "GET", "POST"):
-            raise HTTPException(status_code=400, detail="Invalid method")
-        job.method = data.method.upper()
-    if data.cron_expression is not None:
-        job.cron_expression = data.cron_expression.strip()
-    if data.enabled is not None:
-        job.enabled = data.enabled
-    if data.enable_log is not None:
-        job.enable_log = data.enable_log
-
+    _apply_update(job, data)
+    await _validate_follow_ups(db, [job])
+    if data.depends_on is not None:
+        await _save_dependencies(db, {job.id: data.depends_on})
     db.add(job)
     await db.commit()
-    await load_cronjobs_into_scheduler()
+    await reload_scheduler()
     return {"message": "Cronjob updated"}
 
 
@@ -147,27 +824,42 @@ async def delete_cronjob(
     job = result.scalar_one_or_none()
     if not job:
         raise HTTPException(status_code=404, detail="Cronjob not found")
-    await db.delete(job)
+    await _delete_jobs(db, [cronjob_id])
     await db.commit()
-    await load_cronjobs_into_scheduler()
+    await reload_scheduler()
     return {"message": "Cronjob deleted"}
 
 
 @router.post("/{cronjob_id}/run")
 async def run_cronjob_now(
     cronjob_id: int,
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_setup_complete),
 ):
-    """Run cronjob manually once."""
-    result = await db.execute(select(Cronjob).where(Cronjob.id == cronjob_id))
-    job = result.scalar_one_or_none()
-    if not job:
+    """Run cronjob manually once (with its upstream jobs when it has dependencies)."""
+    from app.services.cronjob.executor import execute_cronjob_by_id
+    outcome = await execute_cronjob_by_id(cronjob_id, require_enabled=False)
+    if outcome is None:
         raise HTTPException(status_code=404, detail="Cronjob not found")
+    return {"message": "Cronjob executed", "status": outcome[0]}
 
-    from app.services.cronjob.executor import execute_cronjob
-    await execute_cronjob(job.id, job.url, job.method)
-    return {"message": "Cronjob executed"}
+
+@router.get("/{cronjob_id}/runs")
+async def get_cronjob_runs(
+    cronjob_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_setup_complete),
+):
+    """Dependency graph runs of a job, newest first: per-job timings and the critical path."""
+    result = await db.execute(
+        select(CronjobRun)
+        .where(CronjobRun.cronjob_id == cronjob_id)
+        .order_by(CronjobRun.started_at.desc(), CronjobRun.id.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return {"runs": [run_dict(r) for r in result.scalars()]}
 
 
 @router.get("/{cronjob_id}/logs")
@@ -189,22 +881,41 @@ async def get_cronjob_logs(
     logs_result = await db.execute(
         select(CronjobLog)
         .where(CronjobLog.cronjob_id == cronjob_id)
-        .order_by(CronjobLog.executed_at.desc())
+        .order_by(CronjobLog.executed_at.desc(), CronjobLog.id.desc())
         .limit(limit)
         .offset(offset)
     )
-    logs = logs_result.scalars().all()
-    return {
-        "logs": [
-            {
-                "id": l.id,
-                "status": l.status,
-                "status_code": l.status_code,
-                "output": l.output,
-                "error": l.error,
-                "duration_ms": l.duration_ms,
-                "executed_at": l.executed_at.isoformat() if l.executed_at else None,
-            }
-            for l in logs
-        ]
-    }
+    logs = [
+        {
+            "id": l.id,
+            "status": l.status,
+            "status_code": l.status_code,
+            "output": l.output,
+            "error": l.error,
+            "duration_ms": l.duration_ms,
+            "executed_at": l.executed_at,
+            "scheduled_at": l.scheduled_at,
+            "started_at": l.started_at,
+            "lag_ms": l.lag_ms,
+            "queue_wait_ms": l.queue_wait_ms,
+            "attempt": l.attempt,
+            "catch_up": l.catch_up,
+            "missed_fires": l.missed_fires,
+        }
+        for l in logs_result.scalars().all()
+    ]
+    # The archive is only consulted once the hot rows run out (archive_months is a cached stat)
+    if len(logs) < limit and archive.archive_months():
+        # Page runs past the main DB: continue in the monthly archives (older than every hot row)
+        archive_offset = 0
+        if not logs:
+            hot_total = (await db.execute(
+                select(func.count()).select_from(CronjobLog).where(CronjobLog.cronjob_id == cronjob_id)
+            )).scalar_one()
+            archive_offset = max(0, offset - hot_total)
+        archived = await asyncio.to_thread(archive.read_job_page, cronjob_id, limit - len(logs), archive_offset)
+        logs.extend({k: v for k, v in row.items() if k != "cronjob_id"} for row in archived)
+    for log in logs:
+        for key in ("executed_at", "scheduled_at", "started_at"):
+            log[key] = log[key].isoformat() if log[key] else None
+    return {"logs": logs}
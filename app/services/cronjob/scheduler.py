@@ -1,25 +1,48 @@
-"""APScheduler-based cronjob scheduler - loads from DB, no system crontab."""
+"""Cronjob scheduler - loads from DB, no system crontab. Backend selected by SCHEDULER_BACKEND."""
 import asyncio
 import logging
-from typing import Set
+import time
+import zlib
+from datetime import datetime
+from typing import Optional
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import EXECUTOR_DRAIN_TIMEOUT, EXECUTOR_MODE, SCHEDULER_BACKEND
 from app.database.database import async_session
 from app.database.models import Cronjob
-from app.services.cronjob.executor import execute_cronjob
+from app.services.cronjob.archive import archiver
+from app.services.cronjob.backends import APSchedulerBackend, HeapSchedulerBackend, SchedulerBackend
+from app.services.cronjob.cron import split_expression
+from app.services.cronjob.breaker import breakers
+from app.services.cronjob.executor import execute_cronjob_by_id, running_jobs
+from app.services.cronjob.leader import LOCK_PATH, LeaderLease
+from app.services.cronjob.misfire import CatchUpQueue, Fire, MisfireTracker
+from app.services.cronjob.worker import ExecutorProcess
 
 logger = logging.getLogger(__name__)
 
+# Upper bound for Cronjob.spread_seconds
+MAX_SPREAD_SECONDS = 3600
+
 # Global scheduler instance
 scheduler = AsyncIOScheduler()
-_running_jobs: Set[int] = set()  # Track running jobs to prevent duplicates
+_running_jobs = running_jobs  # Track running jobs to prevent duplicates (shared with graph nodes)
+
+# EXECUTOR_MODE=process: runs go through a queue to a separate executor process
+executor_process: Optional[ExecutorProcess] = (
+    ExecutorProcess(EXECUTOR_DRAIN_TIMEOUT) if EXECUTOR_MODE == "process" else None
+)
 
 
-async def _run_cronjob(cronjob_id: int) -> None:
+async def _run_cronjob(
+    cronjob_id: int,
+    scheduled_at: Optional[datetime] = None,
+    dispatched_at: Optional[datetime] = None,
+    catch_up: Optional[str] = None,
+    missed_fires: Optional[int] = None,
+) -> None:
     """Wrapper to execute cronjob - prevents duplicate runs."""
     if cronjob_id in _running_jobs:
         logger.warning(f"Cronjob {cronjob_id} already running, skipping")
@@ -27,26 +50,50 @@ async def _run_cronjob(cronjob_id: int) -> None:
 
     _running_jobs.add(cronjob_id)
     try:
-        async with async_session() as db:
-            result = await db.execute(
-                select(Cronjob).where(Cronjob.id == cronjob_id, Cronjob.enabled == True)
+        if executor_process is not None:
+            await executor_process.submit(cronjob_id, scheduled_at, dispatched_at, catch_up, missed_fires)
+        else:
+            await execute_cronjob_by_id(
+                cronjob_id, scheduled_at=scheduled_at, dispatched_at=dispatched_at,
+                catch_up=catch_up, missed_fires=missed_fires,
             )
-            cronjob = result.scalar_one_or_none()
-            if cronjob:
-                await execute_cronjob(cronjob_id, cronjob.url, cronjob.method)
     except Exception as e:
         logger.exception(f"Error executing cronjob {cronjob_id}: {e}")
     finally:
         _running_jobs.discard(cronjob_id)
 
 
-def _job_wrapper(cronjob_id: int):
-    """Sync wrapper - schedule async task in running event loop."""
-    try:
-        loop = asyncio.get_running_loop()
-        loop.create_task(_run_cronjob(cronjob_id))
-    except Exception as e:
-        logger.exception(f"Scheduler job wrapper error for {cronjob_id}: {e}")
+def _launch(fire: Fire) -> None:
+    asyncio.get_running_loop().create_task(
+        _run_cronjob(fire.cronjob_id, fire.scheduled_at, datetime.utcnow(), fire.catch_up, fire.missed_fires)
+    )
+
+
+# Last fire time per job + misfire policies; catch-up runs drain at MISFIRE_CATCHUP_RATE
+misfires = MisfireTracker()
+catch_up_queue = CatchUpQueue(_launch, busy=lambda cronjob_id: cronjob_id in _running_jobs)
+
+
+def _dispatch(cronjob_id: int, scheduled_at: Optional[datetime]) -> None:
+    """Backend callback (on the event loop) - spawn the run as its own task and return immediately."""
+    if scheduled_at is None:
+        _launch(Fire(cronjob_id, None))
+        return
+    now_fire, queued = misfires.plan(cronjob_id, scheduled_at, datetime.utcnow())
+    if now_fire is not None:
+        _launch(now_fire)
+    if queued:
+        catch_up_queue.add(queued)
+
+
+def compute_spread_offset(cronjob_id: int, spread_seconds: int) -> int:
+    """
+    Deterministic start offset in [0, spread_seconds) derived from a hash of the job id.
+    Jobs sharing a cron slot land on different seconds, and a job keeps its offset across reloads.
+    """
+    if not spread_seconds or spread_seconds <= 0:
+        return 0
+    return zlib.crc32(f"cronjob:{cronjob_id}".encode()) % spread_seconds
 
 
 def _parse_cron_expression(expr: str) -> dict:
@@ -55,72 +102,88 @@ def _parse_cron_expression(expr: str) -> dict:
     Hỗ trợ 5 field: minute hour day month day_of_week (giây = 0)
     Hỗ trợ 6 field: second minute hour day month day_of_week
     """
-    parts = expr.strip().split()
-    if len(parts) == 6:
-        return {
-            "second": parts[0],
-            "minute": parts[1],
-            "hour": parts[2],
-            "day": parts[3],
-            "month": parts[4],
-            "day_of_week": parts[5],
-        }
-    if len(parts) == 5:
-        return {
-            "second": "0",
-            "minute": parts[0],
-            "hour": parts[1],
-            "day": parts[2],
-            "month": parts[3],
-            "day_of_week": parts[4],
-        }
-    raise ValueError(f"Invalid cron: {expr} (cần 5 hoặc 6 field)")
+    return split_expression(expr)
 
 
-async def load_cronjobs_into_scheduler() -> None:
-    """Load all enabled cronjobs from DB into scheduler. Removes old jobs first."""
-    # Remove existing jobs for our app
-    for job in scheduler.get_jobs():
-        if job.id and job.id.startswith("cronjob_"):
-            try:
-                scheduler.remove_job(job.id)
-            except Exception:
-                pass
+def _create_backend() -> SchedulerBackend:
+    if SCHEDULER_BACKEND == "heap":
+        return HeapSchedulerBackend(_dispatch)
+    if SCHEDULER_BACKEND != "apscheduler":
+        logger.warning(f"Unknown SCHEDULER_BACKEND={SCHEDULER_BACKEND!r}, using apscheduler")
+    return APSchedulerBackend(scheduler, _dispatch)
 
-    async with async_session() as db:
-        result = await db.execute(select(Cronjob).where(Cronjob.enabled == True))
-        cronjobs = result.scalars().all()
-
-    for cj in cronjobs:
-        try:
-            trigger = _parse_cron_expression(cj.cron_expression)
-            job_id = f"cronjob_{cj.id}"
-            scheduler.add_job(
-                _job_wrapper,
-                trigger=CronTrigger(**trigger),
-                id=job_id,
-                args=[cj.id],
-                replace_existing=True,
-            )
-            logger.info(f"Loaded cronjob {cj.id} ({cj.name}) with expression {cj.cron_expression}")
-        except Exception as e:
-            logger.error(f"Failed to load cronjob {cj.id}: {e}")
 
-    logger.info(f"Scheduler loaded {len(cronjobs)} cronjobs")
+backend = _create_backend()
+
+
+async def load_cronjobs_into_scheduler() -> None:
+    """Load all enabled cronjobs from DB into scheduler. Replaces the previously loaded set."""
+    started = time.perf_counter()
+    async with async_session() as db:
+        result = await db.execute(
+            select(
+                Cronjob.id, Cronjob.name, Cronjob.cron_expression, Cronjob.spread_offset,
+                Cronjob.misfire_policy, Cronjob.last_fire_at,
+            ).where(Cronjob.enabled == True)
+        )
+        cronjobs = result.all()
+
+    misfires.sync((r.id, r.cron_expression, r.spread_offset, r.misfire_policy, r.last_fire_at) for r in cronjobs)
+    loaded = backend.sync((r.id, r.name, r.cron_expression, r.spread_offset) for r in cronjobs)
+    logger.info(
+        f"Scheduler loaded {loaded}/{len(cronjobs)} cronjobs ({backend.name}) "
+        f"in {(time.perf_counter() - started) * 1000:.0f}ms"
+    )
 
 
 def start_scheduler() -> None:
     """Start the scheduler (call after app startup)."""
-    if not scheduler.running:
-        scheduler.start()
-        logger.info("APScheduler started")
+    backend.start()
 
 
 def shutdown_scheduler() -> None:
     """Shutdown scheduler gracefully."""
-    if scheduler.running:
-        scheduler.shutdown(wait=True)
-        logger.info("APScheduler shutdown")
+    backend.shutdown()
+
+
+async def _on_elected() -> None:
+    if executor_process is not None:
+        executor_process.start()
+    else:
+        breakers.enable_persistence()  # scheduled runs execute in this process
+    start_scheduler()
+    await load_cronjobs_into_scheduler()
+    # Fires missed while no scheduler ran (restart, previous leader died)
+    catch_up_queue.add(await misfires.catch_up_all(datetime.utcnow()))
+    catch_up_queue.start()
+    misfires.start()
+    archiver.start()
+
+
+# Only the worker holding the lease runs the scheduler (see leader.py)
+lease = LeaderLease(LOCK_PATH, on_elected=_on_elected, on_reload=load_cronjobs_into_scheduler)
+
+
+async def start_scheduler_leader() -> None:
+    """Join the leader election; the scheduler starts in whichever worker wins."""
+    await lease.start()
+
+
+async def stop_scheduler_leader() -> None:
+    """Shutdown scheduler and drain the executor (if leader), then release the lease."""
+    if lease.is_leader:
+        shutdown_scheduler()
+        catch_up_queue.stop()
+        await misfires.stop()
+        await archiver.stop()
+        if executor_process is not None:
+            await executor_process.stop()
+    lease.stop()
+
+
+async def reload_scheduler() -> None:
+    """Apply cronjob changes - from any worker, the leader reloads its job set."""
+    await lease.request_reload()
 
 
 # Alias for clarity
@@ -0,0 +1,114 @@
+"""Full-text search over cronjob log output / error (FTS5 index, see database.LOG_SEARCH_TABLE).
+
+Hits are ordered by (bm25 score, log id); the cursor is the last hit's "score:id",
+so later pages are keyset filters instead of growing OFFSET scans.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.database import LOG_SEARCH_TABLE
+
+# Snippet highlight markers (plain text, the API does not return HTML)
+MARK_START, MARK_END = "[[", "]]"
+SNIPPET_TOKENS = 16
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchQueryError(ValueError):
+    """Query that FTS5 cannot parse."""
+
+
+def build_match(q: str, raw: bool) -> str:
+    """Plain queries match every word (prefix match on the last one); raw=True passes FTS5 syntax through."""
+    if raw:
+        return q
+    words = _TOKEN_RE.findall(q)
+    if not words:
+        raise SearchQueryError("query has no searchable words")
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[float, int]]:
+    if not cursor:
+        return None
+    try:
+        score, log_id = cursor.rsplit(":", 1)
+        return float(score), int(log_id)
+    except ValueError:
+        raise SearchQueryError("invalid cursor") from None
+
+
+async def search_logs(
+    db: AsyncSession,
+    match: str,
+    cronjob_id: Optional[int],
+    limit: int,
+    cursor: Optional[Tuple[float, int]],
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of hits and the cursor of the next page (None on the last page)."""
+    where = [f"{LOG_SEARCH_TABLE} MATCH :match"]
+    params = {"match": match, "limit": limit + 1}
+    if cronjob_id is not None:
+        where.append("l.cronjob_id = :cronjob_id")
+        params["cronjob_id"] = cronjob_id
+    after = ""
+    if cursor is not None:
+        after = "WHERE score > :score OR (score = :score AND id > :after_id)"
+        params["score"], params["after_id"] = cursor
+
+    # output weighs less than error: an error string is usually what people look for
+    hits = (await db.execute(text(f"""
+        SELECT * FROM (
+            SELECT l.id AS id, l.cronjob_id, c.name AS cronjob_name, l.status, l.status_code,
+                   l.executed_at, bm25({LOG_SEARCH_TABLE}, 1.0, 2.0) AS score
+            FROM {LOG_SEARCH_TABLE}
+            JOIN cronjob_logs AS l ON l.id = {LOG_SEARCH_TABLE}.rowid
+            LEFT JOIN cronjobs AS c ON c.id = l.cronjob_id
+            WHERE {" AND ".join(where)}
+        ) {after}
+        ORDER BY score, id
+        LIMIT :limit
+    """), params)).mappings().all()
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = f"{hits[-1]['score']!r}:{hits[-1]['id']}"
+    if not hits:
+        return [], None
+
+    # Snippets only for the page, not for every match
+    snippets = {
+        row.id: (row.output, row.error)
+        for row in (await db.execute(
+            text(f"""
+                SELECT rowid AS id,
+                       snippet({LOG_SEARCH_TABLE}, 0, :ms, :me, '…', :n) AS output,
+                       snippet({LOG_SEARCH_TABLE}, 1, :ms, :me, '…', :n) AS error
+                FROM {LOG_SEARCH_TABLE}
+                WHERE {LOG_SEARCH_TABLE} MATCH :match AND rowid IN :ids
+            """).bindparams(bindparam("ids", expanding=True)),
+            {"match": match, "ms": MARK_START, "me": MARK_END, "n": SNIPPET_TOKENS, "ids": [h["id"] for h in hits]},
+        )).all()
+    }
+    results = []
+    for hit in hits:
+        output, error = snippets.get(hit["id"], (None, None))
+        results.append({
+            "log_id": hit["id"],
+            "cronjob_id": hit["cronjob_id"],
+            "cronjob_name": hit["cronjob_name"],
+            "status": hit["status"],
+            "status_code": hit["status_code"],
+            "executed_at": str(hit["executed_at"]).replace(" ", "T") if hit["executed_at"] else None,
+            "score": hit["score"],
+            "output_snippet": output or None,
+            "error_snippet": error or None,
+        })
+    return results, next_cursor
@@ -0,0 +1,206 @@
+"""Executor worker process (EXECUTOR_MODE=process).
+
+The scheduler process only puts run requests on a multiprocessing queue; a
+separate process does the HTTP call, the log write and the retention delete,
+then reports (status, elapsed) back on a result queue. That keeps slow DNS or a
+burst of fires off the event loop that serves the API and pages.
+
+The parent supervises the process: a crash fails the runs in flight and the
+process is restarted with backoff; shutdown sends a sentinel, lets the worker
+drain what it already accepted (up to EXECUTOR_DRAIN_TIMEOUT) and kills it after.
+"""
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import signal
+import time
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+from app.services.metrics.collector import record_cronjob_run
+
+logger = logging.getLogger(__name__)
+
+# A worker that stayed up this long is considered healthy again (restart backoff resets)
+HEALTHY_AFTER_SECONDS = 60.0
+MAX_RESTART_BACKOFF = 30.0
+
+
+# --- child process ---------------------------------------------------------
+
+def _worker_main(requests, results) -> None:
+    """Process entry point. SIGINT/SIGTERM are ignored: the parent decides when to drain."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    from app.logging_config import setup_logging
+
+    setup_logging()
+    asyncio.run(_serve(requests, results))
+
+
+async def _serve(requests, results) -> None:
+    from app.services.cronjob.breaker import breakers
+    from app.services.cronjob.executor import execute_cronjob_by_id, running_jobs
+
+    breakers.enable_persistence()  # breaker state of scheduled runs lives here
+    tasks: Set[asyncio.Task] = set()
+
+    async def run(
+        run_id: int, cronjob_id: int, scheduled_at: Optional[datetime], dispatched_at: Optional[datetime],
+        catch_up: Optional[str], missed_fires: Optional[int],
+    ):
+        status, elapsed = None, 0.0
+        if cronjob_id in running_jobs:
+            # Running here as a node of a dependency graph: same duplicate-run rule as the scheduler
+            logger.warning(f"Cronjob {cronjob_id} already running, skipping")
+            results.put((run_id, cronjob_id, status, elapsed))
+            return
+        running_jobs.add(cronjob_id)
+        try:
+            outcome = await execute_cronjob_by_id(
+                cronjob_id, scheduled_at=scheduled_at, dispatched_at=dispatched_at,
+                catch_up=catch_up, missed_fires=missed_fires,
+            )
+            if outcome is not None:
+                status, elapsed = outcome
+        except Exception as e:
+            logger.exception(f"Error executing cronjob {cronjob_id}: {e}")
+            status = "error"
+        finally:
+            running_jobs.discard(cronjob_id)
+        results.put((run_id, cronjob_id, status, elapsed))
+
+    while True:
+        item = await asyncio.to_thread(requests.get)
+        if item is None:  # drain
+            break
+        task = asyncio.create_task(run(*item))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        logger.info(f"Executor draining {len(tasks)} run(s)")
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# --- parent side -----------------------------------------------------------
+
+class ExecutorProcess:
+    """Owns the worker process, its queues and the runs waiting for a result."""
+
+    def __init__(self, drain_timeout: float):
+        self.drain_timeout = drain_timeout
+        self._ctx = multiprocessing.get_context("spawn")  # never fork a running event loop / DB engine
+        self._process = None
+        self._requests = None
+        self._results = None
+        self._reader: Optional[asyncio.Task] = None
+        self._supervisor: Optional[asyncio.Task] = None
+        self._pending: Dict[int, Tuple[int, asyncio.Future]] = {}
+        self._ids = itertools.count(1)
+        self._accepting = False
+        self._started_at = 0.0
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self) -> None:
+        self._spawn()
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    def _spawn(self) -> None:
+        # Fresh queues each time: a worker killed mid-put can leave a queue's lock held
+        self._requests, self._results = self._ctx.Queue(), self._ctx.Queue()
+        self._process = self._ctx.Process(
+            target=_worker_main, args=(self._requests, self._results), name="cronjob-executor", daemon=True,
+        )
+        self._process.start()
+        self._started_at = time.monotonic()
+        self._reader = asyncio.create_task(self._read_results(self._results))
+        self._accepting = True
+        logger.info(f"Executor process started (pid {self._process.pid})")
+
+    async def _read_results(self, results) -> None:
+        while True:
+            item = await asyncio.to_thread(results.get)
+            if item is None:
+                return
+            run_id, cronjob_id, status, elapsed = item
+            if status is not None:
+                record_cronjob_run(cronjob_id, status, elapsed)
+            entry = self._pending.pop(run_id, None)
+            if entry is not None and not entry[1].done():
+                entry[1].set_result(status)
+
+    def _fail_pending(self, reason: str) -> None:
+        if self._pending:
+            logger.error(f"{len(self._pending)} cronjob run(s) lost: {reason}")
+        for cronjob_id, future in self._pending.values():
+            record_cronjob_run(cronjob_id, "error", 0.0)
+            if not future.done():
+                future.set_result("error")
+        self._pending.clear()
+
+    async def _stop_reader(self) -> None:
+        """Let the reader consume what is already queued, then end it."""
+        self._results.put(None)
+        try:
+            await asyncio.wait_for(self._reader, timeout=5.0)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._reader.cancel()
+
+    async def _supervise(self) -> None:
+        backoff = 1.0
+        while True:
+            await asyncio.sleep(1.0)
+            if self._process.is_alive():
+                if time.monotonic() - self._started_at > HEALTHY_AFTER_SECONDS:
+                    backoff = 1.0
+                continue
+            self._accepting = False
+            logger.error(f"Executor process exited (code {self._process.exitcode}), restarting in {backoff:.0f}s")
+            await self._stop_reader()
+            self._fail_pending(f"executor process exited with code {self._process.exitcode}")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_RESTART_BACKOFF)
+            self._spawn()
+
+    async def submit(
+        self,
+        cronjob_id: int,
+        scheduled_at: Optional[datetime],
+        dispatched_at: Optional[datetime],
+        catch_up: Optional[str] = None,
+        missed_fires: Optional[int] = None,
+    ) -> Optional[str]:
+        """Queue one run and wait for its status (None: job deleted/disabled meanwhile)."""
+        if not self._accepting:
+            logger.error(f"Executor process unavailable, cronjob {cronjob_id} run dropped")
+            record_cronjob_run(cronjob_id, "error", 0.0)
+            return "error"
+        run_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[run_id] = (cronjob_id, future)
+        self._requests.put((run_id, cronjob_id, scheduled_at, dispatched_at, catch_up, missed_fires))
+        return await future
+
+    async def stop(self) -> None:
+        """Stop accepting, drain accepted runs (bounded by drain_timeout), then stop the process."""
+        self._accepting = False
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            self._supervisor = None
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            self._requests.put(None)
+            await asyncio.to_thread(self._process.join, self.drain_timeout)
+            if self._process.is_alive():
+                logger.warning(f"Executor did not drain within {self.drain_timeout}s, killing it")
+                self._process.kill()
+                await asyncio.to_thread(self._process.join, 5.0)
+        await self._stop_reader()
+        self._fail_pending("executor stopped")
+        self._process = None
+        logger.info("Executor process stopped")
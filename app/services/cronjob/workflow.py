@@ -0,0 +1,258 @@
+"""Job dependency graphs (DAG): a job with dependencies runs together with everything upstream of it.
+
+When such a job fires, its upstream closure is loaded and executed in topological
+order: a node starts once all of its dependencies finished OK (success / unchanged),
+at most WORKFLOW_MAX_PARALLEL nodes at a time. Nodes take part in the scheduler's
+duplicate-run guard (executor.running_jobs): a node whose job is already running
+(e.g. on its own schedule) waits for that run to end first, and an own-schedule
+fire arriving while the node runs is skipped. The root is claimed by whoever
+started the graph. A failed node blocks everything
+downstream of it (recorded as "skipped"); independent branches keep running.
+
+Every node writes its usual CronjobLog rows. The graph run as a whole is one
+CronjobRun row: per-node start/end offsets and the critical path - the chain of
+dependencies with the largest summed duration, i.e. what bounds the run's length.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import LOG_RETENTION_DAYS, WORKFLOW_MAX_PARALLEL
+from app.database.database import async_session
+from app.database.models import Cronjob, CronjobDependency, CronjobRun
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the jobs of one graph (upstream closure)
+MAX_GRAPH_NODES = 500
+
+Graph = Dict[int, List[int]]  # job id -> ids it depends on
+
+
+def _chunks(ids: List[int], size: int = 500):
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+async def load_dependencies(db: AsyncSession, ids: Optional[Iterable[int]] = None) -> Graph:
+    """Dependencies of the given jobs (every job when ids is None); jobs without any are left out."""
+    graph: Graph = defaultdict(list)
+    query = select(CronjobDependency.cronjob_id, CronjobDependency.depends_on_id)
+    if ids is None:
+        rows = (await db.execute(query)).all()
+    else:
+        rows = []
+        for chunk in _chunks(list(ids)):
+            rows.extend((await db.execute(query.where(CronjobDependency.cronjob_id.in_(chunk)))).all())
+    for cronjob_id, depends_on_id in rows:
+        graph[cronjob_id].append(depends_on_id)
+    for deps in graph.values():
+        deps.sort()
+    return dict(graph)
+
+
+async def upstream_graph(db: AsyncSession, root_id: int) -> Graph:
+    """root_id and every job it depends on, transitively -> {id: dependency ids}."""
+    graph: Graph = {}
+    frontier = [root_id]
+    while frontier:
+        found = await load_dependencies(db, frontier)
+        for node in frontier:
+            graph[node] = found.get(node, [])
+        frontier = sorted({d for node in frontier for d in graph[node] if d not in graph})
+        if len(graph) + len(frontier) > MAX_GRAPH_NODES:
+            raise ValueError(f"Dependency graph of cronjob {root_id} exceeds {MAX_GRAPH_NODES} jobs")
+    return graph
+
+
+def find_cycle(graph: Graph) -> Optional[List[int]]:
+    """A dependency cycle as [a, b, ..., a] (a depends on b ...), or None."""
+    state: Dict[int, int] = {}  # 1 = on the current path, 2 = done
+    for start in graph:
+        if start in state:
+            continue
+        path, stack = [], [(start, iter(graph.get(start, ())))]
+        state[start] = 1
+        path.append(start)
+        while stack:
+            node, deps = stack[-1]
+            dep = next(deps, None)
+            if dep is None:
+                stack.pop()
+                path.pop()
+                state[node] = 2
+            elif state.get(dep) == 1:
+                return path[path.index(dep):] + [dep]
+            elif dep not in state:
+                state[dep] = 1
+                path.append(dep)
+                stack.append((dep, iter(graph.get(dep, ()))))
+    return None
+
+
+def critical_path(graph: Graph, durations: Dict[int, int]) -> Tuple[List[int], int]:
+    """Chain of dependencies with the largest summed duration -> (ids upstream first, total ms)."""
+    best: Dict[int, Tuple[int, Optional[int]]] = {}  # node -> (longest chain ending here, previous node)
+    waiting = {node: len(deps) for node, deps in graph.items()}
+    dependents = defaultdict(list)
+    for node, deps in graph.items():
+        for dep in deps:
+            dependents[dep].append(node)
+    ready = [node for node, n in waiting.items() if n == 0]
+    while ready:
+        node = ready.pop()
+        prev = max(graph[node], key=lambda d: best[d][0], default=None)
+        best[node] = (durations.get(node, 0) + (best[prev][0] if prev is not None else 0), prev)
+        for child in dependents[node]:
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                ready.append(child)
+    if not best:
+        return [], 0
+    node = max(best, key=lambda n: best[n][0])
+    total, path = best[node][0], []
+    while node is not None:
+        path.append(node)
+        node = best[node][1]
+    return path[::-1], total
+
+
+async def run_workflow(
+    root_id: int,
+    scheduled_at: Optional[datetime] = None,
+    dispatched_at: Optional[datetime] = None,
+    trigger_depth: int = 0,
+    catch_up: Optional[str] = None,
+    missed_fires: Optional[int] = None,
+) -> Tuple[str, float]:
+    """Run root_id's graph and record it as one CronjobRun -> (success | failed | error, elapsed seconds)."""
+    from app.services.cronjob.executor import OK_STATUSES, claim_job, execute_cronjob_by_id, running_jobs
+
+    async def run_node(node: int, **kwargs):
+        claim = node != root_id
+        if claim:
+            await claim_job(node)
+        try:
+            return await execute_cronjob_by_id(node, **kwargs)
+        finally:
+            if claim:
+                running_jobs.discard(node)
+
+    async with async_session() as db:
+        try:
+            graph = await upstream_graph(db, root_id)
+        except ValueError as e:
+            logger.error(str(e))
+            return "error", 0.0
+        names = dict((await db.execute(select(Cronjob.id, Cronjob.name).where(Cronjob.id.in_(list(graph))))).all())
+    cycle = find_cycle(graph)
+    if cycle is not None:
+        logger.error(f"Cronjob {root_id}: dependency cycle {' -> '.join(map(str, cycle))}, not running")
+        return "error", 0.0
+
+    dependents = defaultdict(list)
+    for node, deps in graph.items():
+        for dep in deps:
+            dependents[dep].append(node)
+    waiting = {node: len(deps) for node, deps in graph.items()}
+    ready = sorted(node for node, n in waiting.items() if n == 0)
+    results: Dict[int, dict] = {}
+    running: Dict[asyncio.Task, int] = {}
+    started_at = datetime.utcnow()
+    run_start = time.perf_counter()
+
+    def offset_ms() -> int:
+        return int((time.perf_counter() - run_start) * 1000)
+
+    try:
+        while ready or running:
+            while ready and len(running) < WORKFLOW_MAX_PARALLEL:
+                node = ready.pop(0)
+                results[node] = {"start_ms": offset_ms()}
+                # Only nodes without dependencies start at the fire time; lateness of the others is meaningless
+                first = not graph[node]
+                task = asyncio.create_task(run_node(
+                    node,
+                    scheduled_at=scheduled_at if first else None,
+                    dispatched_at=dispatched_at if first else None,
+                    require_enabled=False,  # upstream jobs may be disabled: they then only run in the graph
+                    trigger_depth=trigger_depth,
+                    with_dependencies=False,
+                    catch_up=catch_up if first else None,
+                    missed_fires=missed_fires if first else None,
+                ))
+                running[task] = node
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda t: running[t]):
+                node = running.pop(task)
+                try:
+                    outcome = task.result()
+                except Exception as e:
+                    logger.exception(f"Error executing cronjob {node} (graph of {root_id}): {e}")
+                    outcome = ("error", 0.0)
+                results[node].update(end_ms=offset_ms(), status=outcome[0] if outcome else "deleted")
+                if results[node]["status"] not in OK_STATUSES:
+                    continue  # dependents stay waiting -> skipped
+                for child in dependents[node]:
+                    waiting[child] -= 1
+                    if waiting[child] == 0:
+                        ready.append(child)
+                ready.sort()
+    finally:
+        for task in running:
+            task.cancel()
+
+    elapsed = time.perf_counter() - run_start
+    nodes = []
+    for node, deps in graph.items():
+        result = results.get(node)
+        if result is None:
+            # Failed or themselves skipped
+            blocked_by = [d for d in deps if results.get(d, {}).get("status") not in OK_STATUSES]
+            result = {"status": "skipped", "start_ms": None, "end_ms": None, "blocked_by": blocked_by}
+        duration = result["end_ms"] - result["start_ms"] if result["start_ms"] is not None else 0
+        nodes.append({"cronjob_id": node, "name": names.get(node), "depends_on": deps, "duration_ms": duration, **result})
+    nodes.sort(key=lambda n: (n["start_ms"] is None, n["start_ms"] or 0, n["cronjob_id"]))
+    path, path_ms = critical_path(graph, {n["cronjob_id"]: n["duration_ms"] for n in nodes})
+    status = "success" if all(n["status"] in OK_STATUSES for n in nodes) else "failed"
+
+    async with async_session() as db:
+        db.add(CronjobRun(
+            cronjob_id=root_id,
+            status=status,
+            scheduled_at=scheduled_at,
+            started_at=started_at,
+            duration_ms=int(elapsed * 1000),
+            critical_path_ms=path_ms,
+            nodes=json.dumps(nodes),
+            critical_path=json.dumps(path),
+        ))
+        cutoff = datetime.utcnow() - timedelta(days=LOG_RETENTION_DAYS)
+        await db.execute(delete(CronjobRun).where(CronjobRun.cronjob_id == root_id, CronjobRun.started_at < cutoff))
+        await db.commit()
+    logger.info(
+        f"Cronjob graph {root_id}: {status}, {len(nodes)} job(s) in {elapsed:.1f}s "
+        f"(critical path {' -> '.join(map(str, path))}: {path_ms} ms)"
+    )
+    return status, elapsed
+
+
+def run_dict(run: CronjobRun) -> dict:
+    return {
+        "id": run.id,
+        "cronjob_id": run.cronjob_id,
+        "status": run.status,
+        "scheduled_at": run.scheduled_at,
+        "started_at": run.started_at,
+        "duration_ms": run.duration_ms,
+        "critical_path_ms": run.critical_path_ms,
+        "critical_path": json.loads(run.critical_path),
+        "nodes": json.loads(run.nodes),
+    }
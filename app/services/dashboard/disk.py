@@ -0,0 +1,340 @@
+"""Disk usage: per-mount stats and an incremental, cancellable directory-size scanner.
+
+Scanner cache: one record per directory, keyed by (inode, mtime_ns). A directory's
+mtime changes whenever an entry is added, removed or renamed in it, so on a rescan
+a directory whose key still matches is not listed again - only stat()ed - and the
+walk lists only the directories that changed - but it still lstat()s every
+directory of the tree, so a rescan costs one stat per directory instead of a
+listing. Files that grow in place do not touch their directory's mtime; pass
+full=True to re-list everything. The cache lives in the worker process that ran
+the scan: with several web workers a rescan may land on a cold one.
+
+Running scans are registered in DATA_DIR/disk_scans (<id>.json: owner pid, path,
+last progress event), so the MAX_CONCURRENT_SCANS limit, status and cancel work
+from any worker. Cancelling a scan owned by another worker creates <id>.cancel,
+which the owner checks at every progress interval. Entries of dead pids are pruned.
+"""
+import asyncio
+import json
+import logging
+import os
+import stat
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import psutil
+
+try:
+    import fcntl
+except ImportError:  # Windows: single worker, the in-process dict is enough
+    fcntl = None
+
+from app.config import DATA_DIR, DISK_SCAN_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Largest subdirectories reported in the final event / seconds between progress events
+TOP_CHILDREN = 20
+PROGRESS_INTERVAL = 0.5
+# Stop caching beyond this many directories (≈200 bytes each)
+MAX_CACHED_DIRS = 1_000_000
+MAX_CONCURRENT_SCANS = 2
+SCANS_DIR = DATA_DIR / "disk_scans"
+
+
+def list_mounts() -> List[dict]:
+    """Usage and inode stats for every mounted partition (blocking - run in a thread)."""
+    mounts, seen = [], set()
+    for part in psutil.disk_partitions(all=False):
+        if part.mountpoint in seen:
+            continue
+        seen.add(part.mountpoint)
+        try:
+            usage = psutil.disk_usage(part.mountpoint)
+            vfs = os.statvfs(part.mountpoint)
+        except OSError as e:
+            mounts.append({"mountpoint": part.mountpoint, "device": part.device, "fstype": part.fstype, "error": str(e)})
+            continue
+        inodes_used = vfs.f_files - vfs.f_ffree
+        mounts.append({
+            "mountpoint": part.mountpoint,
+            "device": part.device,
+            "fstype": part.fstype,
+            "readonly": "ro" in part.opts.split(","),
+            "total_bytes": usage.total,
+            "used_bytes": usage.used,
+            "free_bytes": usage.free,
+            "percent": round(usage.percent, 1),
+            # Some filesystems (btrfs, vfat) report no inode counts
+            "inodes_total": vfs.f_files,
+            "inodes_used": inodes_used,
+            "inodes_free": vfs.f_ffree,
+            "inodes_percent": round(inodes_used / vfs.f_files * 100, 1) if vfs.f_files else None,
+        })
+    return mounts
+
+
+class _DirRecord:
+    __slots__ = ("key", "files_bytes", "files", "subdirs", "error")
+
+    def __init__(self, key: Tuple[int, int], files_bytes: int, files: int, subdirs: List[str], error: Optional[str]):
+        self.key = key
+        self.files_bytes = files_bytes
+        self.files = files
+        self.subdirs = subdirs
+        self.error = error
+
+
+def _allocated(st: os.stat_result) -> int:
+    # Allocated blocks like du; st_size for sparse-less filesystems that report no blocks
+    blocks = getattr(st, "st_blocks", None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+class DirSizeCache:
+    def __init__(self):
+        self.records: Dict[str, _DirRecord] = {}
+
+    def visit(self, path: str, device: int, full: bool) -> Tuple[_DirRecord, bool]:
+        """Record for one directory and whether it came from the cache (blocking)."""
+        try:
+            st = os.lstat(path)
+        except OSError as e:
+            return _DirRecord((0, 0), 0, 0, [], str(e)), False
+        key = (st.st_ino, st.st_mtime_ns)
+        cached = self.records.get(path)
+        if cached is not None and cached.key == key and not full:
+            return cached, True
+
+        files_bytes, files, subdirs, error = 0, 0, [], None
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        est = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    # Same filesystem only, symlinks counted as themselves (du -x)
+                    if stat.S_ISDIR(est.st_mode):
+                        if est.st_dev == device:
+                            subdirs.append(entry.path)
+                    else:
+                        files_bytes += _allocated(est)
+                        files += 1
+        except OSError as e:
+            error = str(e)
+        record = _DirRecord(key, files_bytes + _allocated(st), files, subdirs, error)
+        if cached is not None or len(self.records) < MAX_CACHED_DIRS:
+            self.records[path] = record
+        return record, False
+
+    def forget_missing(self, root: str, visited: set) -> None:
+        """Drop records under root that this walk did not reach (deleted or moved)."""
+        prefix = root.rstrip(os.sep) + os.sep
+        for path in [p for p in self.records if (p == root or p.startswith(prefix)) and p not in visited]:
+            del self.records[path]
+
+
+cache = DirSizeCache()
+_pool = ThreadPoolExecutor(max_workers=DISK_SCAN_WORKERS, thread_name_prefix="disk-scan")
+active_scans: Dict[str, asyncio.Event] = {}  # scans running in this process -> cancel event
+
+
+def _scan_file(scan_id: str, suffix: str = ".json") -> Path:
+    return SCANS_DIR / f"{scan_id}{suffix}"
+
+
+@contextmanager
+def _registry_lock():
+    """Serialize check-and-register between workers (held for a directory listing at most)."""
+    SCANS_DIR.mkdir(exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(SCANS_DIR / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _write_status(scan_id: str, status: dict) -> None:
+    tmp = _scan_file(scan_id, ".tmp")
+    tmp.write_text(json.dumps(status))
+    os.replace(tmp, _scan_file(scan_id))
+
+
+def read_scan(scan_id: str) -> Optional[dict]:
+    """Registry entry of a running scan (any worker), or None."""
+    try:
+        return json.loads(_scan_file(scan_id).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _live_scans() -> List[str]:
+    live = []
+    for path in SCANS_DIR.glob("*.json"):
+        status = read_scan(path.stem)
+        if status is not None and _pid_alive(status.get("pid", 0)):
+            live.append(path.stem)
+        else:  # owner died mid-scan
+            release_scan(path.stem)
+    return live
+
+
+def register_scan(root: str, full: bool) -> Optional[Tuple[str, asyncio.Event]]:
+    """Reserve one of the MAX_CONCURRENT_SCANS slots (across workers) -> (scan_id, cancel event), None when all are taken.
+
+    Called by the request handler before it starts streaming, so concurrent requests
+    see each other; the stream calls release_scan() when it ends.
+    """
+    with _registry_lock():
+        if len(_live_scans()) >= MAX_CONCURRENT_SCANS:
+            return None
+        scan_id = uuid.uuid4().hex[:12]
+        _write_status(scan_id, {"scan_id": scan_id, "pid": os.getpid(), "path": root, "full": full, "last": None})
+    cancel = active_scans[scan_id] = asyncio.Event()
+    return scan_id, cancel
+
+
+def request_cancel(scan_id: str) -> bool:
+    """Cancel a scan running in this or another worker; False when there is no such scan."""
+    event = active_scans.get(scan_id)
+    if event is not None:
+        event.set()
+        return True
+    if read_scan(scan_id) is None:
+        return False
+    _scan_file(scan_id, ".cancel").touch()
+    return True
+
+
+def release_scan(scan_id: str) -> None:
+    active_scans.pop(scan_id, None)
+    for suffix in (".json", ".cancel", ".tmp"):
+        _scan_file(scan_id, suffix).unlink(missing_ok=True)
+
+
+def _totals(root: str, visited: set) -> Dict[str, Tuple[int, int, int]]:
+    """(bytes, files, dirs) per visited directory, summed bottom-up from the records."""
+    totals: Dict[str, Tuple[int, int, int]] = {}
+    stack = [(root, False)]
+    while stack:
+        path, expanded = stack.pop()
+        record = cache.records.get(path)
+        if record is None:
+            totals[path] = (0, 0, 0)
+            continue
+        children = [c for c in record.subdirs if c in visited]
+        if not expanded:
+            stack.append((path, True))
+            stack.extend((c, False) for c in children if c not in totals)
+            continue
+        size, files, dirs = record.files_bytes, record.files, 0
+        for child in children:
+            c_size, c_files, c_dirs = totals.get(child, (0, 0, 0))
+            size, files, dirs = size + c_size, files + c_files, dirs + c_dirs + 1
+        totals[path] = (size, files, dirs)
+    return totals
+
+
+def _top_children(root: str, totals: Dict[str, Tuple[int, int, int]]) -> List[dict]:
+    record = cache.records.get(root)
+    children = [
+        {"path": c, "bytes": totals[c][0], "files": totals[c][1], "dirs": totals[c][2]}
+        for c in (record.subdirs if record else []) if c in totals
+    ]
+    children.sort(key=lambda c: c["bytes"], reverse=True)
+    return children[:TOP_CHILDREN]
+
+
+async def scan_directory(root: str, scan_id: str, cancel: asyncio.Event, full: bool = False) -> AsyncIterator[dict]:
+    """Walk root in the thread pool; yield progress events, then one "done" event.
+
+    Stops early when the scan's cancel event is set (DELETE .../scan/{id}) or the
+    consumer goes away (client disconnect closes the generator).
+    """
+    status = read_scan(scan_id) or {"scan_id": scan_id, "pid": os.getpid(), "path": root, "full": full}
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    visited, pending = set(), {}
+    listed = cached_hits = errors = scanned_bytes = 0
+    # Bounded in-flight work: directories are submitted as their parents finish
+    limit = DISK_SCAN_WORKERS * 4
+    queue: List[str] = []
+    try:
+        root = os.path.realpath(root)
+        device = os.lstat(root).st_dev
+        queue.append(root)
+        yield {"type": "started", "scan_id": scan_id, "path": root, "full": full}
+        last_progress = time.monotonic()
+        while (queue or pending) and not cancel.is_set():
+            while queue and len(pending) < limit:
+                path = queue.pop()
+                visited.add(path)
+                pending[loop.run_in_executor(_pool, cache.visit, path, device, full)] = path
+            done, _ = await asyncio.wait(pending, timeout=PROGRESS_INTERVAL, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                pending.pop(future)
+                record, hit = future.result()
+                cached_hits += hit
+                listed += not hit
+                errors += record.error is not None
+                scanned_bytes += record.files_bytes
+                queue.extend(c for c in record.subdirs if c not in visited)
+            if time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                last_progress = time.monotonic()
+                if _scan_file(scan_id, ".cancel").exists():  # DELETE handled by another worker
+                    cancel.set()
+                progress = {
+                    "type": "progress",
+                    "dirs": len(visited),
+                    "listed": listed,
+                    "cached": cached_hits,
+                    "errors": errors,
+                    "bytes": scanned_bytes,
+                    "elapsed_ms": int((time.perf_counter() - started) * 1000),
+                }
+                _write_status(scan_id, {**status, "last": progress})
+                yield progress
+        if cancel.is_set():
+            yield {"type": "cancelled", "dirs": len(visited), "bytes": scanned_bytes}
+            return
+        cache.forget_missing(root, visited)
+        totals = await loop.run_in_executor(_pool, _totals, root, visited)
+        size, files, dirs = totals.get(root, (0, 0, 0))
+        yield {
+            "type": "done",
+            "path": root,
+            "bytes": size,
+            "files": files,
+            "dirs": dirs,
+            "listed": listed,
+            "cached": cached_hits,
+            "errors": errors,
+            "elapsed_ms": int((time.perf_counter() - started) * 1000),
+            "children": _top_children(root, totals),
+        }
+    finally:
+        release_scan(scan_id)
+        # Queued directory visits are dropped; ones already running finish in the pool
+        for future in pending:
+            future.cancel()
+        if cancel.is_set() or pending:
+            logger.info(f"Disk scan {scan_id} of {root} stopped after {len(visited)} directories")
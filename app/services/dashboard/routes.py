@@ -1,14 +1,20 @@
 """Dashboard API - server metrics."""
+import asyncio
+import json
+import os
 import time
 from pathlib import Path
+from typing import Optional
 
 import psutil
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 
 from app.auth.dependencies import require_setup_complete
 from app.database.database import get_db
 from app.database.models import Cronjob, User
+from app.services.dashboard import disk
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
@@ -16,25 +22,18 @@ router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 _server_start_time = time.time()
 
 
-@router.get("/metrics")
-async def get_metrics(
-    db=Depends(get_db),
-    current_user: User = Depends(require_setup_complete),
-):
-    """Get server metrics for dashboard."""
+def collect_system_metrics(cpu_interval: Optional[float] = 0.1) -> dict:
+    """Uptime, CPU, memory and root disk usage (cpu_interval=None: CPU since the previous call, no wait)."""
     uptime_seconds = int(time.time() - _server_start_time)
     uptime_days = uptime_seconds // 86400
     uptime_hours = (uptime_seconds % 86400) // 3600
     uptime_mins = (uptime_seconds % 3600) // 60
     uptime_str = f"{uptime_days}d {uptime_hours}h {uptime_mins}m"
 
-    cpu_percent = psutil.cpu_percent(interval=0.1)
+    cpu_percent = psutil.cpu_percent(interval=cpu_interval)
     mem = psutil.virtual_memory()
     disk = psutil.disk_usage("/")
 
-    result = await db.execute(select(Cronjob).where(Cronjob.enabled == True))
-    active_cronjobs = len(result.scalars().all())
-
     return {
         "uptime": uptime_str,
         "uptime_seconds": uptime_seconds,
@@ -45,5 +44,65 @@ async def get_metrics(
         "disk_percent": round(disk.percent, 1),
         "disk_used_gb": round(disk.used / (1024**3), 2),
         "disk_total_gb": round(disk.total / (1024**3), 2),
-        "active_cronjobs": active_cronjobs,
     }
+
+
+@router.get("/metrics")
+async def get_metrics(
+    db=Depends(get_db),
+    current_user: User = Depends(require_setup_complete),
+):
+    """Get server metrics for dashboard."""
+    metrics = collect_system_metrics()
+
+    result = await db.execute(select(Cronjob).where(Cronjob.enabled == True))
+    active_cronjobs = len(result.scalars().all())
+
+    return {**metrics, "active_cronjobs": active_cronjobs}
+
+
+@router.get("/disks")
+async def get_disks(current_user: User = Depends(require_setup_complete)):
+    """Usage and inode stats for every mounted partition."""
+    return {"mounts": await asyncio.to_thread(disk.list_mounts)}
+
+
+@router.get("/disk/scan")
+async def scan_disk_usage(
+    path: str = Query("/", description="directory to size (stays on its filesystem)"),
+    full: bool = Query(False, description="re-list every directory, ignoring the cache"),
+    current_user: User = Depends(require_setup_complete),
+):
+    """Size a directory tree; streams NDJSON progress events, the last one is "done" or "cancelled"."""
+    if not os.path.isdir(path):
+        raise HTTPException(status_code=400, detail="Not a directory")
+    scan = disk.register_scan(os.path.realpath(path), full)
+    if scan is None:
+        raise HTTPException(status_code=429, detail="Too many scans in progress")
+    scan_id, cancel = scan
+
+    async def body():
+        try:
+            async for event in disk.scan_directory(path, scan_id, cancel, full):
+                yield json.dumps(event) + "\n"
+        finally:
+            disk.release_scan(scan_id)
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@router.get("/disk/scan/{scan_id}")
+async def get_disk_scan(scan_id: str, current_user: User = Depends(require_setup_complete)):
+    """A running scan (from any worker): path, owner pid and its last progress event."""
+    status = disk.read_scan(scan_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    return status
+
+
+@router.delete("/disk/scan/{scan_id}")
+async def cancel_disk_scan(scan_id: str, current_user: User = Depends(require_setup_complete)):
+    """Stop a running scan (from any worker); its stream ends with a "cancelled" event."""
+    if not disk.request_cancel(scan_id):
+        raise HTTPException(status_code=404, detail="Scan not found")
+    return {"message": "Scan cancelled"}
@@ -0,0 +1 @@
+"""Fleet service - agent snapshots and the multi-host aggregator."""
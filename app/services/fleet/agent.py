@@ -0,0 +1,57 @@
+"""Agent side: one compact snapshot of this server for the fleet aggregator."""
+import asyncio
+import socket
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import Cronjob, CronjobLog
+from app.services.cronjob.breaker import OPEN, read_breaker_state
+from app.services.dashboard.routes import collect_system_metrics
+from app.services.server.routes import list_services
+
+# Failed units listed by name; a broken box can have hundreds
+MAX_FAILED_UNITS = 20
+
+
+def _services_summary(result: dict) -> dict:
+    services = result.get("services") or []
+    failed = [s["unit"] for s in services if s.get("active") == "failed"]
+    return {
+        "total": len(services),
+        "active": sum(1 for s in services if s.get("active") == "active"),
+        "failed": len(failed),
+        "failed_units": failed[:MAX_FAILED_UNITS],
+        "error": result.get("error"),
+    }
+
+
+async def _cronjobs_summary(db: AsyncSession) -> dict:
+    total, enabled = (await db.execute(
+        select(func.count(Cronjob.id), func.count(Cronjob.id).filter(Cronjob.enabled == True))
+    )).one()
+    since = datetime.utcnow() - timedelta(hours=24)
+    runs = dict((await db.execute(
+        select(CronjobLog.status, func.count()).where(CronjobLog.executed_at >= since).group_by(CronjobLog.status)
+    )).all())
+    breaker_state = read_breaker_state() or {}
+    return {
+        "total": total,
+        "enabled": enabled,
+        "runs_24h": runs,
+        "open_breakers": sum(1 for b in breaker_state.get("breakers", []) if b.get("state") == OPEN),
+    }
+
+
+async def build_snapshot(db: AsyncSession) -> dict:
+    # cpu_interval=None: CPU since the previous poll, no 100 ms sleep per snapshot
+    metrics = await asyncio.to_thread(collect_system_metrics, None)
+    services = await asyncio.to_thread(list_services)
+    return {
+        "hostname": socket.gethostname(),
+        "generated_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "metrics": metrics,
+        "services": _services_summary(services),
+        "cronjobs": await _cronjobs_summary(db),
+    }
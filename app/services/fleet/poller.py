@@ -0,0 +1,219 @@
+"""Aggregator side: poll every agent in the background, serve the cached fleet view.
+
+One process (holder of DATA_DIR/fleet.lock, see cronjob/leader.py) polls all agents
+every FLEET_POLL_INTERVAL seconds over a single pooled httpx client - at most
+FLEET_CONCURRENCY requests in flight, each bounded by its agent's timeout - and
+writes the merged result to DATA_DIR/fleet.json. Page and API requests only read
+that file, so a fleet of 200 hosts costs one round per interval, not one fan-out
+per viewer.
+
+A host that stops answering keeps its last good snapshot (marked stale) next to
+the error, so the page still shows what it looked like before it went dark.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.config import (
+    DATA_DIR,
+    FLEET_AGENT_TIMEOUT,
+    FLEET_AGENTS,
+    FLEET_AGENTS_FILE,
+    FLEET_CONCURRENCY,
+    FLEET_POLL_INTERVAL,
+    FLEET_TOKEN,
+)
+from app.services.cronjob.leader import LeaderLease
+
+logger = logging.getLogger(__name__)
+
+STATE_PATH = DATA_DIR / "fleet.json"
+LOCK_PATH = DATA_DIR / "fleet.lock"
+SNAPSHOT_PATH = "/api/fleet/agent/snapshot"
+# A host whose last good snapshot is older than this many poll intervals is stale
+STALE_AFTER_INTERVALS = 3
+
+
+class Agent:
+    __slots__ = ("name", "url", "timeout", "token")
+
+    def __init__(self, name: str, url: str, timeout: float, token: str):
+        self.name = name
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.token = token
+
+
+def load_agents() -> List[Agent]:
+    """Agents from FLEET_AGENTS ("name=url,...") and FLEET_AGENTS_FILE (JSON list); later names win."""
+    agents: Dict[str, Agent] = {}
+    for entry in filter(None, (e.strip() for e in FLEET_AGENTS.split(","))):
+        name, sep, url = entry.partition("=")
+        if not sep:
+            name, url = entry, entry
+        agents[name.strip()] = Agent(name.strip(), url.strip(), FLEET_AGENT_TIMEOUT, FLEET_TOKEN)
+    if FLEET_AGENTS_FILE.exists():
+        try:
+            for item in json.loads(FLEET_AGENTS_FILE.read_text()):
+                name = str(item.get("name") or item["url"])
+                agents[name] = Agent(
+                    name, item["url"], float(item.get("timeout") or FLEET_AGENT_TIMEOUT), item.get("token") or FLEET_TOKEN,
+                )
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.error(f"Invalid {FLEET_AGENTS_FILE}: {e}")
+    return [a for a in agents.values() if a.url.startswith(("http://", "https://"))]
+
+
+def _host_entry(agent: Agent) -> dict:
+    return {
+        "name": agent.name,
+        "url": agent.url,
+        "status": "pending",
+        "error": None,
+        "checked_at": None,
+        "last_ok_at": None,
+        "latency_ms": None,
+        "consecutive_failures": 0,
+        "snapshot": None,
+    }
+
+
+class FleetPoller:
+    def __init__(self, interval: float, concurrency: int, state_path: Path = STATE_PATH):
+        self.interval = interval
+        self.concurrency = max(1, concurrency)
+        self.state_path = state_path
+        self.hosts: Dict[str, dict] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _poll_agent(self, agent: Agent, semaphore: asyncio.Semaphore) -> None:
+        host = self.hosts[agent.name]
+        headers = {"Authorization": f"Bearer {agent.token}"} if agent.token else {}
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                # httpx timeouts are per phase; wait_for bounds the whole request
+                response = await asyncio.wait_for(
+                    self._client.get(agent.url + SNAPSHOT_PATH, headers=headers, timeout=agent.timeout),
+                    agent.timeout,
+                )
+                response.raise_for_status()
+                snapshot = response.json()
+            except (httpx.HTTPError, asyncio.TimeoutError, ValueError) as e:
+                host.update(
+                    status="down",
+                    error=(str(e) or type(e).__name__)[:300],
+                    consecutive_failures=host["consecutive_failures"] + 1,
+                )
+            else:
+                host.update(
+                    status="up", error=None, consecutive_failures=0, snapshot=snapshot,
+                    last_ok_at=datetime.utcnow().isoformat(timespec="seconds"),
+                )
+            host["checked_at"] = datetime.utcnow().isoformat(timespec="seconds")
+            host["latency_ms"] = int((time.perf_counter() - started) * 1000)
+
+    async def poll_once(self) -> None:
+        agents = load_agents()  # re-read every round: agents can be added without a restart
+        self.hosts = {a.name: self.hosts.get(a.name) or _host_entry(a) for a in agents}
+        for agent in agents:
+            self.hosts[agent.name]["url"] = agent.url
+        if self._client is None or self._client.is_closed:
+            # One idle keep-alive connection per host survives between rounds
+            self._client = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=max(self.concurrency, len(agents)),
+                max_keepalive_connections=max(self.concurrency, len(agents)),
+                keepalive_expiry=self.interval * 2,
+            ))
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._poll_agent(a, semaphore) for a in agents))
+        self._persist(int((time.perf_counter() - started) * 1000))
+
+    def _persist(self, round_ms: int) -> None:
+        state = {
+            "pid": os.getpid(),
+            "updated_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "interval": self.interval,
+            "round_ms": round_ms,
+            "hosts": sorted(self.hosts.values(), key=lambda h: h["name"]),
+        }
+        try:
+            tmp = self.state_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(state))
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            logger.warning(f"Could not write fleet state: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.exception(f"Fleet poll round failed: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+poller = FleetPoller(FLEET_POLL_INTERVAL, FLEET_CONCURRENCY)
+
+
+async def _on_elected() -> None:
+    poller.start()
+    logger.info(f"Fleet poller started ({len(load_agents())} agents every {poller.interval:.0f}s)")
+
+
+lease = LeaderLease(LOCK_PATH, on_elected=_on_elected)
+
+
+def fleet_enabled() -> bool:
+    return bool(FLEET_AGENTS.strip()) or FLEET_AGENTS_FILE.exists()
+
+
+async def start_fleet_poller() -> None:
+    """Join the election for the poller (aggregator mode only)."""
+    if fleet_enabled():
+        await lease.start()
+
+
+async def stop_fleet_poller() -> None:
+    if lease.is_leader:
+        await poller.stop()
+    lease.stop()
+
+
+_cache: dict = {"mtime": None, "state": None}
+
+
+def read_fleet_state(path: Path = STATE_PATH) -> Optional[dict]:
+    """Last state written by the poller (parsed once per file change), None before the first round."""
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    if _cache["mtime"] != mtime:
+        try:
+            _cache["state"], _cache["mtime"] = json.loads(path.read_text()), mtime
+        except (OSError, ValueError):
+            return _cache["state"]
+    return _cache["state"]
@@ -0,0 +1,72 @@
+"""Fleet API - agent snapshot endpoint and the aggregated multi-host view."""
+import hmac
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies import require_setup_complete
+from app.config import FLEET_TOKEN
+from app.database.database import get_db
+from app.database.models import User
+from app.services.cronjob.executor import OK_STATUSES
+from app.services.fleet.agent import build_snapshot
+from app.services.fleet.poller import STALE_AFTER_INTERVALS, fleet_enabled, read_fleet_state
+
+router = APIRouter(prefix="/api/fleet", tags=["fleet"])
+
+
+@router.get("/agent/snapshot")
+async def get_agent_snapshot(request: Request, db: AsyncSession = Depends(get_db)):
+    """Snapshot of this server for an aggregator (agent mode: FLEET_TOKEN set, Bearer auth)."""
+    if not FLEET_TOKEN:
+        raise HTTPException(status_code=404, detail="Fleet agent disabled (FLEET_TOKEN not set)")
+    auth = request.headers.get("authorization", "")
+    if not hmac.compare_digest(auth, f"Bearer {FLEET_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    return await build_snapshot(db)
+
+
+def _totals(hosts: list) -> dict:
+    up = [h for h in hosts if h["status"] == "up"]
+    snapshots = [h["snapshot"] for h in up if h.get("snapshot")]
+    cpu = [s["metrics"]["cpu_percent"] for s in snapshots]
+    return {
+        "hosts": len(hosts),
+        "up": len(up),
+        "down": sum(1 for h in hosts if h["status"] == "down"),
+        "stale": sum(1 for h in hosts if h["stale"]),
+        "cpu_avg": round(sum(cpu) / len(cpu), 1) if cpu else None,
+        "failed_services": sum(s["services"]["failed"] for s in snapshots),
+        "failed_runs_24h": sum(
+            n for s in snapshots for st, n in s["cronjobs"]["runs_24h"].items() if st not in OK_STATUSES
+        ),
+        "open_breakers": sum(s["cronjobs"]["open_breakers"] for s in snapshots),
+    }
+
+
+@router.get("")
+async def get_fleet(current_user: User = Depends(require_setup_complete)):
+    """Merged fleet view from the poller's cache - never calls the agents itself."""
+    if not fleet_enabled():
+        return {"enabled": False, "hosts": [], "totals": _totals([])}
+    state = read_fleet_state()
+    if state is None:
+        return {"enabled": True, "updated_at": None, "hosts": [], "totals": _totals([])}
+
+    stale_before = datetime.utcnow() - timedelta(seconds=state["interval"] * STALE_AFTER_INTERVALS)
+    hosts = []
+    for host in state["hosts"]:
+        last_ok = host.get("last_ok_at")
+        stale = host["snapshot"] is not None and (
+            last_ok is None or datetime.fromisoformat(last_ok) < stale_before
+        )
+        hosts.append({**host, "stale": stale})
+    return {
+        "enabled": True,
+        "updated_at": state["updated_at"],
+        "round_ms": state["round_ms"],
+        "interval": state["interval"],
+        "hosts": hosts,
+        "totals": _totals(hosts),
+    }
@@ -0,0 +1 @@
+"""Metrics service - self-instrumentation exposed at /metrics."""
@@ -0,0 +1,243 @@
+"""In-process Prometheus-style metrics (counters, gauges, histograms).
+
+Metrics are only updated from the event loop thread (middleware, SQLAlchemy
+events running in the greenlet on that thread, executor), so no locks are
+needed: every write is a plain add into a preallocated list or dict slot.
+
+The registry lives in the process that records into it: with several uvicorn
+workers each one exposes its own HTTP/DB numbers, and cronjob runs are only
+counted in the scheduler leader (EXECUTOR_MODE=thread) - runs made by the
+separate executor process (EXECUTOR_MODE=process) are not exposed.
+"""
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from app.config import METRICS_PER_JOB
+
+# Default latency buckets (seconds)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{escaped}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    """Base metric with optional label names."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Histogram(_Metric):
+    """Histogram with fixed buckets; bucket counts are preallocated per label set."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# HTTP
+http_requests_total = registry.register(Counter(
+    "panel_http_requests_total", "HTTP requests handled", ("method", "route", "status"),
+))
+http_request_duration = registry.register(Histogram(
+    "panel_http_request_duration_seconds", "HTTP request latency", ("method", "route"),
+))
+http_requests_in_flight = registry.register(Gauge(
+    "panel_http_requests_in_flight", "HTTP requests currently being served",
+))
+
+# Database
+db_queries_total = registry.register(Counter(
+    "panel_db_queries_total", "SQL statements executed", ("operation",),
+))
+db_query_duration = registry.register(Histogram(
+    "panel_db_query_duration_seconds", "SQL statement duration", ("operation",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+))
+
+# Cronjob executor
+cronjob_runs_total = registry.register(Counter(
+    "panel_cronjob_runs_total", "Cronjob executions by outcome",
+    ("cronjob_id", "status") if METRICS_PER_JOB else ("status",),
+))
+cronjob_run_duration = registry.register(Histogram(
+    "panel_cronjob_run_duration_seconds", "Cronjob execution duration", ("status",),
+))
+
+# Event loop
+event_loop_lag = registry.register(Histogram(
+    "panel_event_loop_lag_seconds", "Delay of the periodic event-loop probe beyond its interval",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+))
+event_loop_lag_last = registry.register(Gauge(
+    "panel_event_loop_lag_last_seconds", "Most recent event-loop lag sample",
+))
+
+
+def instrument_engine(sync_engine) -> None:
+    """Attach SQLAlchemy cursor events to count and time every statement."""
+    from sqlalchemy import event
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_metrics_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        operation = statement.lstrip()[:6].upper().rstrip()
+        if operation not in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+            operation = "OTHER"
+        db_queries_total.inc(operation)
+        db_query_duration.observe(elapsed, operation)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("_metrics_start"):
+            conn.info["_metrics_start"].pop()
+
+
+async def loop_lag_probe(interval: float = 0.5) -> None:
+    """Sleep `interval` repeatedly and record how late each wake-up is."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        event_loop_lag.observe(lag)
+        event_loop_lag_last.set(lag)
+
+
+def record_cronjob_run(cronjob_id: int, status: str, duration_seconds: float) -> None:
+    """Record one executor run."""
+    # cronjob_id chỉ thành nhãn khi bật METRICS_PER_JOB: 10k job = 10k series mỗi status
+    if METRICS_PER_JOB:
+        cronjob_runs_total.inc(str(cronjob_id), status)
+    else:
+        cronjob_runs_total.inc(status)
+    cronjob_run_duration.observe(duration_seconds, status)
@@ -0,0 +1,41 @@
+"""ASGI middleware recording per-route latency and in-flight requests."""
+import time
+
+from app.services.metrics.collector import (
+    http_request_duration,
+    http_requests_in_flight,
+    http_requests_total,
+)
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware (no BaseHTTPMiddleware overhead)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            elapsed = time.perf_counter() - start
+            # Use the route template (not the raw path) to keep label cardinality bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "<unmatched>"
+            method = scope.get("method", "")
+            http_request_duration.observe(elapsed, method, route_path)
+            http_requests_total.inc(method, route_path, str(status_holder[0]))
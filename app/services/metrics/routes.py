@@ -0,0 +1,28 @@
+"""Metrics API - Prometheus text exposition."""
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+from app.auth.dependencies import get_current_user, require_auth, require_setup_complete
+from app.config import METRICS_TOKEN
+from app.database.models import User
+from app.services.metrics.collector import registry
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(request: Request, current_user: Optional[User] = Depends(get_current_user)):
+    """Expose panel metrics. METRICS_TOKEN (Bearer) when configured, otherwise a logged-in session.
+
+    Values are those of the worker process serving the request (see collector.py).
+    """
+    if METRICS_TOKEN:
+        auth = request.headers.get("authorization", "")
+        if not hmac.compare_digest(auth, f"Bearer {METRICS_TOKEN}"):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    else:
+        await require_setup_complete(await require_auth(current_user))
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,4 +1,5 @@
 """Server APIs - logs, systemd services."""
+import asyncio
 import json
 import os
 import platform
@@ -9,6 +10,7 @@ from fastapi import APIRouter, Depends, Query, Request
 from app.auth.dependencies import require_setup_complete
 from app.config import LOG_DIR, VNC_WS_URL
 from app.database.models import User
+from app.http_cache import json_response
 
 router = APIRouter(prefix="/api/server", tags=["server"])
 
@@ -61,9 +63,15 @@ async def get_logs(
 
 @router.get("/services")
 async def get_services(
+    request: Request,
     current_user: User = Depends(require_setup_complete),
 ):
-    """List systemd services - dùng JSON hoặc parse table."""
+    """List systemd services - dùng JSON hoặc parse table (weak ETag: 304 khi không đổi)."""
+    return json_response(request, await asyncio.to_thread(list_services))
+
+
+def list_services() -> dict:
+    """systemctl list-units (blocking: call it from a thread)."""
     if platform.system() != "Linux":
         return {"services": [], "error": "systemctl chỉ khả dụng trên Linux"}
     try:
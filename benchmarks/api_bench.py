@@ -0,0 +1,165 @@
+"""API latency / throughput benchmark under concurrent clients.
+
+Starts the app with uvicorn in a subprocess against a temporary database seeded
+with `--jobs` cronjobs and `--logs` log rows (spread over the first `--log-jobs`
+jobs, so one job's history is deep enough to page through), logs in as a bench
+user and hammers each scenario with N concurrent clients for `--seconds`.
+
+The clients share one httpx.AsyncClient in this process; at high concurrency the
+client side can become the limit - compare runs made with the same settings.
+
+Usage:
+    python benchmarks/api_bench.py [--concurrency 1 10 50] [--seconds 10] [--jobs 1000]
+                                   [--logs 200000] [--log-jobs 10] [--output api.json]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import (  # noqa: E402
+    BENCH_PASSWORD, BENCH_USER, ROOT, isolated_env, latency_summary, prepare_database, remove_workdir,
+    seed_cronjobs, seed_logs, write_results,
+)
+
+try:
+    import psutil
+except ImportError:  # RSS is reported when available
+    psutil = None
+
+
+def _scenarios(logs_per_job: int) -> dict:
+    deep_offset = max(0, logs_per_job - 50)
+    return {
+        "dashboard_metrics": "/api/dashboard/metrics",
+        "cronjobs_list": "/api/cronjobs",
+        "logs_first_page": "/api/cronjobs/1/logs?limit=50",
+        "logs_deep_page": f"/api/cronjobs/1/logs?limit=50&offset={deep_offset}",
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(port: int) -> subprocess.Popen:
+    # stderr to a file: an unread pipe would block the server once it fills up
+    with open(Path(os.environ["DATA_DIR"]) / "server.stderr", "wb") as stderr:
+        return subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=ROOT, env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=stderr,
+        )
+
+
+async def _wait_ready(client: httpx.AsyncClient, server: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            output = (Path(os.environ["DATA_DIR"]) / "server.stderr").read_text(errors="replace")
+            raise RuntimeError(f"server exited: {output[-2000:]}")
+        try:
+            if (await client.get("/login")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+async def _hammer(client: httpx.AsyncClient, path: str, concurrency: int, seconds: float) -> dict:
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latency_summary(latencies, time.perf_counter() - t0, errors)
+
+
+async def _bench(port: int, server: subprocess.Popen, scenarios: dict, concurrencies, seconds: float) -> list:
+    limits = httpx.Limits(max_connections=max(concurrencies), max_keepalive_connections=max(concurrencies))
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        await _wait_ready(client, server)
+        login = await client.post("/api/auth/login", json={"username": BENCH_USER, "password": BENCH_PASSWORD})
+        login.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {login.json()['token']}"
+
+        results = []
+        for name, path in scenarios.items():
+            await client.get(path)  # warm-up: first-hit imports / caches are not what we measure
+            for concurrency in concurrencies:
+                result = {"scenario": name, "path": path, "concurrency": concurrency}
+                result.update(await _hammer(client, path, concurrency, seconds))
+                if psutil is not None:
+                    result["server_rss_mb"] = round(psutil.Process(server.pid).memory_info().rss / 2**20, 1)
+                print(
+                    f"{name:18} concurrency={concurrency:>4} req/s={result['throughput_per_s']:>8} "
+                    f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+                    f"errors={result['errors']}",
+                    flush=True,
+                )
+                results.append(result)
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--seconds", type=float, default=10.0, help="per scenario and concurrency level")
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--logs", type=int, default=200_000)
+    parser.add_argument("--log-jobs", type=int, default=10, help="jobs the log rows are spread over")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    isolated_env()
+    prepare_database()
+    # Unreachable target and a once-a-year schedule: the server under test never fires a run
+    seed_cronjobs(args.jobs, "http://127.0.0.1:9/")
+    seed_seconds = seed_logs(args.logs, min(args.log_jobs, args.jobs))
+
+    port = _free_port()
+    server = _start_server(port)
+    try:
+        results = asyncio.run(_bench(
+            port, server, _scenarios(args.logs // min(args.log_jobs, args.jobs)), args.concurrency, args.seconds,
+        ))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        remove_workdir()
+
+    params = {
+        "jobs": args.jobs, "logs": args.logs, "log_jobs": args.log_jobs, "seconds": args.seconds,
+        "seed_seconds": round(seed_seconds, 2),
+    }
+    write_results(args.output, "api", params, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Shared helpers for the benchmark scripts: isolated app environment, seeding, stats, result files.
+
+Every suite runs against a throwaway directory (DATA_DIR, DATABASE_URL, LOG_DIR all
+point into it), so a benchmark never touches the real database, lock files or
+app.log - it is safe to run on a box where the panel is running.
+
+`isolated_env()` must be called before anything under `app` is imported: the
+app reads its configuration at import time.
+"""
+import asyncio
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+BENCH_USER, BENCH_PASSWORD = "bench", "bench-password"
+
+
+def isolated_env(workdir: Optional[Path] = None) -> Dict[str, str]:
+    """Point the app at a temporary directory (in os.environ) and return the variables set."""
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="panel-bench-"))
+    (workdir / "logs").mkdir(parents=True, exist_ok=True)
+    env = {
+        "DATA_DIR": str(workdir),
+        "DATABASE_URL": f"sqlite+aiosqlite:///{workdir / 'bench.db'}",
+        "LOG_DIR": str(workdir / "logs"),
+        "LOG_LEVEL": "WARNING",
+        "LOG_RATE_LIMIT": "0",
+        "EXECUTOR_MODE": os.environ.get("EXECUTOR_MODE", "inline"),
+    }
+    os.environ.update(env)
+    return env
+
+
+def remove_workdir() -> None:
+    """Delete the directory created by isolated_env() (databases can reach gigabytes)."""
+    workdir = Path(os.environ["DATA_DIR"])
+    if workdir.name.startswith("panel-bench-"):
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def db_path() -> Path:
+    return Path(os.environ["DATABASE_URL"].split("///", 1)[1])
+
+
+def prepare_database() -> None:
+    """Create the schema with the app's own init_db and a setup-complete bench user."""
+    from app.auth.services import get_password_hash
+    from app.database.database import engine, init_db
+
+    async def _init():
+        await init_db()
+        await engine.dispose()
+
+    asyncio.run(_init())
+    now = datetime.utcnow()
+    with sqlite3.connect(db_path()) as conn:
+        conn.execute(
+            "INSERT INTO users (username, password_hash, totp_verified, must_change_password, created_at, updated_at) "
+            "VALUES (?, ?, 1, 0, ?, ?)",
+            (BENCH_USER, get_password_hash(BENCH_PASSWORD), now, now),
+        )
+
+
+def seed_cronjobs(count: int, url: str, expression: str = "0 0 1 1 *", enable_log: bool = True) -> None:
+    """Insert `count` enabled cronjobs (ids 1..count) pointing at `url`."""
+    now = datetime.utcnow()
+    with sqlite3.connect(db_path()) as conn:
+        conn.executemany(
+            "INSERT INTO cronjobs (id, name, url, method, cron_expression, enabled, enable_log, created_at, updated_at) "
+            "VALUES (?, ?, ?, 'CURL', ?, 1, ?, ?, ?)",
+            ((i, f"bench-{i}", url, expression, int(enable_log), now, now) for i in range(1, count + 1)),
+        )
+
+
+def seed_logs(total: int, cronjobs: int, start_id: int = 1, batch: int = 50_000, output: str = "ok") -> float:
+    """Append `total` log rows spread over `cronjobs` jobs, newest last; returns seconds spent."""
+    started = time.perf_counter()
+    base = datetime.utcnow() - timedelta(seconds=total)
+    with sqlite3.connect(db_path()) as conn:
+        conn.execute("PRAGMA synchronous = OFF")
+        for first in range(start_id, start_id + total, batch):
+            last = min(first + batch, start_id + total)
+            conn.executemany(
+                "INSERT INTO cronjob_logs (id, cronjob_id, status, status_code, output, duration_ms, executed_at, attempt) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 1)",
+                (
+                    (i, i % cronjobs + 1, "success" if i % 10 else "failed", 200 if i % 10 else 500,
+                     output, 5 + i % 50, base + timedelta(seconds=i - start_id))
+                    for i in range(first, last)
+                ),
+            )
+            conn.commit()
+    return time.perf_counter() - started
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def latency_summary(latencies: List[float], elapsed: float, errors: int = 0) -> dict:
+    """Throughput and latency percentiles (milliseconds) of a batch of timed operations."""
+    ms = [v * 1000 for v in latencies]
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_per_s": round(len(ms) / elapsed, 1) if elapsed else None,
+        "p50_ms": _round(percentile(ms, 0.50)),
+        "p95_ms": _round(percentile(ms, 0.95)),
+        "p99_ms": _round(percentile(ms, 0.99)),
+        "max_ms": _round(max(ms) if ms else None),
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def run_metadata() -> dict:
+    """What the numbers were measured on - compare runs only when this matches."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "sqlite": sqlite3.sqlite_version,
+    }
+
+
+def write_results(path: Optional[Path], benchmark: str, params: dict, results) -> dict:
+    document = {"benchmark": benchmark, "meta": run_metadata(), "params": params, "results": results}
+    if path is not None:
+        path.write_text(json.dumps(document, indent=2))
+    return document
@@ -0,0 +1,76 @@
+"""Compare two benchmark result files (run_all.py output or a single suite's --output).
+
+Result rows are matched on their identifying fields (scenario, backend, mode,
+concurrency, jobs, rows); every numeric metric present in both is printed with
+its relative change. Metrics where lower is better (latencies, sizes) and higher
+is better (throughput) are flagged when they move more than --threshold percent.
+
+Usage:
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 10]
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Tuple
+
+KEY_FIELDS = ("scenario", "backend", "mode", "concurrency", "jobs", "rows")
+HIGHER_IS_BETTER = ("throughput_per_s", "fires_per_second", "insert_rows_per_s", "completeness")
+IGNORED = {"requests", "errors", "seconds", "window_seconds", "fires", "expected_fires", "loaded", "log_rows", "delay_ms"}
+
+
+def _suites(document: dict) -> Dict[str, list]:
+    if "suites" in document:
+        return {name: suite.get("results", []) for name, suite in document["suites"].items()}
+    return {document.get("benchmark", "results"): document.get("results", [])}
+
+
+def _rows(results: list) -> Dict[Tuple, dict]:
+    rows = {}
+    for result in results:
+        key = tuple((f, result[f]) for f in KEY_FIELDS if f in result)
+        rows[key] = {
+            k: v for k, v in result.items()
+            if isinstance(v, (int, float)) and not isinstance(v, bool) and k not in KEY_FIELDS and k not in IGNORED
+        }
+    return rows
+
+
+def _verdict(metric: str, change: float, threshold: float) -> str:
+    if abs(change) < threshold:
+        return ""
+    better = change > 0 if metric in HIGHER_IS_BETTER else change < 0
+    return "better" if better else "WORSE"
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> int:
+    worse = 0
+    base_suites, cand_suites = _suites(baseline), _suites(candidate)
+    for suite in sorted(base_suites.keys() & cand_suites.keys()):
+        base_rows, cand_rows = _rows(base_suites[suite]), _rows(cand_suites[suite])
+        print(f"== {suite}")
+        for key in [k for k in base_rows if k in cand_rows]:
+            label = " ".join(f"{k}={v}" for k, v in key)
+            for metric in sorted(base_rows[key].keys() & cand_rows[key].keys()):
+                old, new = base_rows[key][metric], cand_rows[key][metric]
+                if not old:
+                    continue
+                change = (new - old) / abs(old) * 100
+                verdict = _verdict(metric, change, threshold)
+                worse += verdict == "WORSE"
+                print(f"  {label:45} {metric:22} {old:>12} -> {new:>12} {change:+7.1f}% {verdict}")
+    return worse
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change worth flagging")
+    args = parser.parse_args()
+    worse = compare(json.loads(args.baseline.read_text()), json.loads(args.candidate.read_text()), args.threshold)
+    print(f"{worse} metric(s) worse by more than {args.threshold}%")
+    raise SystemExit(1 if worse else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Executor throughput benchmark - full runs (HTTP call + log row + retention delete) against the local stub.
+
+Runs go straight to the executor (no scheduler), `--concurrency` at a time, spread
+round-robin over `--jobs` cronjobs. `inline` executes on this event loop like
+EXECUTOR_MODE=inline; `process` submits to the executor worker process like
+EXECUTOR_MODE=process. The stub target runs in its own process.
+
+Each case runs in a fresh interpreter with its own temporary database.
+
+Usage:
+    python benchmarks/executor_bench.py [--runs 2000] [--concurrency 1 10 50] [--modes inline process]
+                                        [--delay-ms 0] [--output executor.json]
+"""
+import argparse
+import asyncio
+import json
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import (  # noqa: E402
+    db_path, isolated_env, latency_summary, prepare_database, remove_workdir, seed_cronjobs, write_results,
+)
+from stub_server import spawn  # noqa: E402
+
+
+async def _drive(mode: str, runs: int, concurrency: int, jobs: int) -> dict:
+    from app.services.cronjob.executor import execute_cronjob_by_id
+    from app.services.cronjob.worker import ExecutorProcess
+
+    executor = None
+    if mode == "process":
+        executor = ExecutorProcess(drain_timeout=30)
+        executor.start()
+        await asyncio.sleep(2.0)  # let the child import the app before the clock starts
+
+    counter = iter(range(runs))
+    latencies, statuses, exceptions = [], {}, {}
+
+    async def worker():
+        for n in counter:
+            cronjob_id = n % jobs + 1
+            t0 = time.perf_counter()
+            try:
+                if executor is not None:
+                    status = await executor.submit(cronjob_id, None, None)
+                else:
+                    outcome = await execute_cronjob_by_id(cronjob_id)
+                    status = outcome[0] if outcome else None
+            except Exception as e:  # a failing run is a result, not the end of the case
+                status = "exception"
+                exceptions.setdefault(type(e).__name__, str(e).splitlines()[0][:300])
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    if executor is not None:
+        await executor.stop()
+
+    summary = latency_summary(latencies, elapsed, errors=runs - statuses.get("success", 0))
+    summary["statuses"] = {str(k): v for k, v in statuses.items()}
+    if exceptions:
+        summary["exceptions"] = exceptions
+    return summary
+
+
+def _run_one(mode: str, runs: int, concurrency: int, jobs: int, delay_ms: float) -> dict:
+    isolated_env()
+    stub, url = spawn(delay_ms)
+    try:
+        prepare_database()
+        seed_cronjobs(jobs, url)
+        result = asyncio.run(_drive(mode, runs, concurrency, jobs))
+    finally:
+        stub.kill()
+    with sqlite3.connect(db_path()) as conn:
+        result["log_rows"] = conn.execute("SELECT count(*) FROM cronjob_logs").fetchone()[0]
+    remove_workdir()
+    return {"mode": mode, "concurrency": concurrency, "jobs": jobs, "delay_ms": delay_ms, **result}
+
+
+def _run_case(mode: str, runs: int, concurrency: int, jobs: int, delay_ms: float, timeout: float) -> dict:
+    cmd = [
+        sys.executable, __file__, "--case", mode, str(concurrency),
+        "--runs", str(runs), "--jobs", str(jobs), "--delay-ms", str(delay_ms),
+    ]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"mode": mode, "concurrency": concurrency, "timed_out": True, "timeout_seconds": timeout}
+    if proc.returncode != 0:
+        return {"mode": mode, "concurrency": concurrency, "error": proc.stderr.strip()[-2000:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(modes, concurrencies, runs, jobs, delay_ms, case_timeout) -> list:
+    results = []
+    for mode in modes:
+        for concurrency in concurrencies:
+            result = _run_case(mode, runs, concurrency, jobs, delay_ms, case_timeout)
+            if "requests" in result:
+                print(
+                    f"{mode:8} concurrency={concurrency:>4} runs/s={result['throughput_per_s']:>8} "
+                    f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms errors={result['errors']}",
+                    flush=True,
+                )
+            else:
+                print(f"{mode:8} concurrency={concurrency:>4} failed: {result}", flush=True)
+            results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--modes", nargs="+", default=["inline", "process"], choices=["inline", "process"])
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="stub response delay")
+    parser.add_argument("--case-timeout", type=float, default=300.0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--case", nargs=2, metavar=("MODE", "CONCURRENCY"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(_run_one(args.case[0], args.runs, int(args.case[1]), args.jobs, args.delay_ms)))
+        return
+
+    results = run(args.modes, args.concurrency, args.runs, args.jobs, args.delay_ms, args.case_timeout)
+    params = {"runs": args.runs, "jobs": args.jobs, "delay_ms": args.delay_ms}
+    write_results(args.output, "executor", params, results)
+
+
+if __name__ == "__main__":
+    main()
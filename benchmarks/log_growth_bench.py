@@ -0,0 +1,125 @@
+"""cronjob_logs growth benchmark - insert cost, file size and query latency as the table grows to 10M rows.
+
+Rows are appended in bulk (through the real schema, FTS triggers included) up to
+each checkpoint; at every checkpoint the queries the panel runs against the log
+table are timed (median of --repeat runs):
+
+  job_first_page    newest page of one job's logs (GET /api/cronjobs/{id}/logs)
+  job_deep_page     the same, near the end of that job's history (large OFFSET)
+  job_count         count of one job's rows
+  export_batch      one keyset batch of the log export (GET /api/cronjobs/logs/export)
+  retention_delete  the executor's per-run retention DELETE (rolled back, data stays)
+
+Queries go through plain sqlite3 with the same SQL the routes generate, so the
+numbers are the database cost without HTTP / ORM overhead.
+
+Usage:
+    python benchmarks/log_growth_bench.py [--checkpoints 100000 1000000 10000000] [--jobs 100]
+                                          [--output log_growth.json]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import db_path, isolated_env, prepare_database, remove_workdir, seed_cronjobs, seed_logs, write_results  # noqa: E402
+
+PAGE = 50
+LOG_COLUMNS = "id, status, status_code, output, error, duration_ms, executed_at, attempt"
+
+
+def _queries(rows: int, jobs: int) -> dict:
+    per_job = rows // jobs
+    cutoff = datetime.utcnow() - timedelta(days=30)
+    return {
+        "job_first_page": (
+            f"SELECT {LOG_COLUMNS} FROM cronjob_logs WHERE cronjob_id = ? "
+            "ORDER BY executed_at DESC, id DESC LIMIT ? OFFSET ?",
+            (1, PAGE, 0),
+        ),
+        "job_deep_page": (
+            f"SELECT {LOG_COLUMNS} FROM cronjob_logs WHERE cronjob_id = ? "
+            "ORDER BY executed_at DESC, id DESC LIMIT ? OFFSET ?",
+            (1, PAGE, max(0, per_job - PAGE)),
+        ),
+        "job_count": ("SELECT count(*) FROM cronjob_logs WHERE cronjob_id = ?", (1,)),
+        "export_batch": (
+            "SELECT id, cronjob_id, executed_at, status, status_code, duration_ms FROM cronjob_logs "
+            "WHERE id > ? ORDER BY id LIMIT 1000",
+            (rows // 2,),
+        ),
+        "retention_delete": ("DELETE FROM cronjob_logs WHERE cronjob_id = ? AND executed_at < ?", (1, cutoff)),
+    }
+
+
+def _time_queries(rows: int, jobs: int, repeat: int) -> dict:
+    timings = {}
+    with sqlite3.connect(db_path()) as conn:
+        for name, (sql, params) in _queries(rows, jobs).items():
+            samples = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                conn.execute(sql, params).fetchall()
+                samples.append(time.perf_counter() - t0)
+                conn.rollback()  # retention_delete must not change the data set
+            timings[f"{name}_ms"] = round(statistics.median(samples) * 1000, 3)
+    return timings
+
+
+def _db_bytes() -> int:
+    path = db_path()
+    return sum(os.path.getsize(p) for p in (path, Path(f"{path}-wal"), Path(f"{path}-journal")) if p.exists())
+
+
+def run(checkpoints, jobs: int, repeat: int) -> list:
+    isolated_env()
+    results = []
+    try:
+        prepare_database()
+        seed_cronjobs(jobs, "http://127.0.0.1:9/")
+        rows = 0
+        for target in sorted(checkpoints):
+            added = target - rows
+            seconds = seed_logs(added, jobs, start_id=rows + 1)
+            rows = target
+            size = _db_bytes()
+            result = {
+                "rows": rows,
+                "jobs": jobs,
+                "insert_rows_per_s": round(added / seconds, 1) if seconds else None,
+                "db_mb": round(size / 2**20, 1),
+                "bytes_per_row": round(size / rows, 1),
+                **_time_queries(rows, jobs, repeat),
+            }
+            print(
+                f"rows={rows:>10} insert/s={result['insert_rows_per_s']:>10} db={result['db_mb']:>8}MB "
+                f"first_page={result['job_first_page_ms']}ms deep_page={result['job_deep_page_ms']}ms "
+                f"retention={result['retention_delete_ms']}ms",
+                flush=True,
+            )
+            results.append(result)
+    finally:
+        remove_workdir()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkpoints", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--jobs", type=int, default=100, help="jobs the rows are spread over")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    results = run(args.checkpoints, args.jobs, args.repeat)
+    write_results(args.output, "log_growth", {"jobs": args.jobs, "repeat": args.repeat}, results)
+
+
+if __name__ == "__main__":
+    main()
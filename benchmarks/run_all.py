@@ -0,0 +1,67 @@
+"""Run the whole benchmark suite and write one JSON document.
+
+Suites: api, scheduler, executor, log_growth. Each runs as its own process with
+its own temporary database and stub target; nothing leaves the machine.
+`--quick` shrinks every suite to a smoke-sized run (minutes instead of the
+better part of an hour - the 10M-row log checkpoint dominates a full run).
+
+Compare two result files with benchmarks/compare.py.
+
+Usage:
+    python benchmarks/run_all.py --output results.json [--quick] [--suites api executor]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import run_metadata  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+
+SUITES = {
+    "api": ("api_bench.py", [], ["--seconds", "3", "--logs", "50000", "--concurrency", "1", "10"]),
+    "scheduler": ("scheduler_bench.py", [], ["--jobs", "1000", "10000", "--seconds", "3"]),
+    "executor": ("executor_bench.py", [], ["--runs", "300", "--concurrency", "1", "10"]),
+    "log_growth": ("log_growth_bench.py", [], ["--checkpoints", "100000", "1000000"]),
+}
+
+
+def run_suite(name: str, quick: bool) -> dict:
+    script, full_args, quick_args = SUITES[name]
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / f"{name}.json"
+        cmd = [sys.executable, str(HERE / script), *(quick_args if quick else full_args), "--output", str(output)]
+        print(f"== {name}: {' '.join(cmd[1:])}", flush=True)
+        started = time.perf_counter()
+        proc = subprocess.run(cmd)
+        elapsed = round(time.perf_counter() - started, 1)
+        if proc.returncode != 0 or not output.exists():
+            return {"error": f"exit code {proc.returncode}", "wall_seconds": elapsed}
+        document = json.loads(output.read_text())
+    document.pop("meta", None)  # one meta block for the whole run
+    document["wall_seconds"] = elapsed
+    return document
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suites", nargs="+", default=list(SUITES), choices=list(SUITES))
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a fast sanity run")
+    parser.add_argument("--output", type=Path, required=True)
+    args = parser.parse_args()
+
+    report = {"meta": {**run_metadata(), "quick": args.quick}, "suites": {}}
+    for name in args.suites:
+        report["suites"][name] = run_suite(name, args.quick)
+        args.output.write_text(json.dumps(report, indent=2))  # partial results survive an interrupted run
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
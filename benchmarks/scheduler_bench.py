@@ -0,0 +1,148 @@
+"""Scheduler backend benchmark - APScheduler vs heap backend at 1k / 10k / 50k jobs.
+
+Every job uses an every-second schedule, so a backend that keeps up dispatches
+N fires per second. Dispatch only records timing (no HTTP, no DB), so the numbers
+are the scheduling overhead alone.
+
+Each case runs in its own process with a timeout: a backend that blocks the event
+loop for longer than --case-timeout is reported as timed out instead of hanging
+the whole run.
+
+Usage:
+    python benchmarks/scheduler_bench.py [--jobs 1000 10000 50000] [--seconds 5] [--output bench.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler  # noqa: E402
+
+from app.services.cronjob.backends import APSchedulerBackend, HeapSchedulerBackend  # noqa: E402
+from common import write_results  # noqa: E402
+
+EXPRESSION = "* * * * * *"
+
+
+class _Recorder:
+    """Dispatch callback collecting fire count and dispatch lag."""
+
+    def __init__(self):
+        self.fires = 0
+        self.lags = []
+
+    def __call__(self, cronjob_id, scheduled_at):
+        self.fires += 1
+        if scheduled_at is not None:
+            self.lags.append((datetime.utcnow() - scheduled_at).total_seconds())
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 4)
+
+
+async def _run_one(backend_name: str, jobs: int, seconds: float) -> dict:
+    recorder = _Recorder()
+    if backend_name == "apscheduler":
+        backend = APSchedulerBackend(AsyncIOScheduler(), recorder)
+    else:
+        backend = HeapSchedulerBackend(recorder)
+    backend.start()
+
+    rows = [(i, f"job{i}", EXPRESSION, 0) for i in range(1, jobs + 1)]
+    t0 = time.perf_counter()
+    loaded = backend.sync(rows)
+    load_seconds = time.perf_counter() - t0
+
+    # Start mid-second so the window contains exactly `seconds` ticks
+    await asyncio.sleep(1.5 - (time.time() % 1))
+    recorder.fires, recorder.lags = 0, []
+    t0 = time.perf_counter()
+    await asyncio.sleep(seconds)
+    elapsed = time.perf_counter() - t0
+    fires = recorder.fires
+    backend.shutdown()
+
+    expected = jobs * int(seconds)
+    return {
+        "backend": backend_name,
+        "jobs": jobs,
+        "loaded": loaded,
+        "load_seconds": round(load_seconds, 4),
+        "window_seconds": round(elapsed, 3),
+        "fires": fires,
+        "expected_fires": expected,
+        "fires_per_second": round(fires / elapsed, 1),
+        "completeness": round(fires / expected, 4) if expected else None,
+        "lag_p50_s": _percentile(recorder.lags, 0.50),
+        "lag_p95_s": _percentile(recorder.lags, 0.95),
+        "lag_max_s": round(max(recorder.lags), 4) if recorder.lags else None,
+    }
+
+
+def _run_case(backend_name: str, jobs: int, seconds: float, timeout: float) -> dict:
+    """Run one case in a fresh interpreter so a stalled backend cannot skew or hang the others."""
+    cmd = [sys.executable, __file__, "--case", backend_name, str(jobs), "--seconds", str(seconds)]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"backend": backend_name, "jobs": jobs, "timed_out": True, "timeout_seconds": timeout}
+    if proc.returncode != 0:
+        return {"backend": backend_name, "jobs": jobs, "error": proc.stderr.strip()[-2000:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(job_counts, seconds, backends, case_timeout) -> list:
+    results = []
+    for jobs in job_counts:
+        for backend_name in backends:
+            result = _run_case(backend_name, jobs, seconds, case_timeout)
+            if result.get("timed_out"):
+                print(f"{backend_name:12} jobs={jobs:>6} timed out after {case_timeout}s", flush=True)
+            elif result.get("error"):
+                print(f"{backend_name:12} jobs={jobs:>6} failed: {result['error']}", flush=True)
+            else:
+                print(
+                    f"{backend_name:12} jobs={jobs:>6} load={result['load_seconds']:>8}s "
+                    f"fires/s={result['fires_per_second']:>10} completeness={result['completeness']} "
+                    f"lag_p95={result['lag_p95_s']}s",
+                    flush=True,
+                )
+            results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--backends", nargs="+", default=["apscheduler", "heap"], choices=["apscheduler", "heap"])
+    parser.add_argument("--case-timeout", type=float, default=120.0, help="seconds allowed per case")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--case", nargs=2, metavar=("BACKEND", "JOBS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # APScheduler logs one warning per missed run once it falls behind
+    logging.basicConfig(level=logging.CRITICAL)
+
+    if args.case:
+        print(json.dumps(asyncio.run(_run_one(args.case[0], int(args.case[1]), args.seconds))))
+        return
+
+    results = run(args.jobs, args.seconds, args.backends, args.case_timeout)
+    write_results(args.output, "scheduler", {"seconds": args.seconds}, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Local HTTP target for the executor / API benchmarks - no network leaves the machine.
+
+A bare asyncio server: every request gets `200 ok` (keep-alive honoured) after an
+optional fixed delay, so the numbers measure the panel and not a remote site.
+
+Usage (standalone):
+    python benchmarks/stub_server.py [--port 18080] [--delay-ms 0]
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+from typing import Optional, Tuple
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nContent-Length: 2\r\n\r\nok"
+
+
+class StubServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay_ms: float = 0.0):
+        self.host = host
+        self.port = port
+        self.delay = delay_ms / 1000
+        self.requests = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                writer.write(RESPONSE)
+                await writer.drain()
+                if b"connection: close" in head.lower():
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def spawn(delay_ms: float = 0.0) -> Tuple[subprocess.Popen, str]:
+    """Run the stub in its own process (it must not share the CPU / event loop being measured)."""
+    proc = subprocess.Popen(
+        [sys.executable, __file__, "--port", "0", "--delay-ms", str(delay_ms)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    line = proc.stdout.readline().strip()
+    if not line.startswith("stub listening on "):
+        proc.kill()
+        raise RuntimeError(f"stub server did not start: {line!r}")
+    return proc, line.rsplit(" ", 1)[1]
+
+
+async def _serve_forever(port: int, delay_ms: float) -> None:
+    server = StubServer(port=port, delay_ms=delay_ms)
+    await server.start()
+    print(f"stub listening on {server.url}", flush=True)
+    await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve_forever(args.port, args.delay_ms))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
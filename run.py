@@ -1,7 +1,7 @@
 """Application entry point."""
 import uvicorn
 
-from app.config import HOST, PORT
+from app.config import HOST, PORT, WEB_WORKERS
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -9,5 +9,6 @@ if __name__ == "__main__":
         host=HOST,
         port=PORT,
         reload=False,
-        workers=1,  # APScheduler needs single process
+        # Scheduler runs only in the worker holding the leader lease (app/services/cronjob/leader.py)
+        workers=WEB_WORKERS,
     )
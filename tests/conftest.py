@@ -0,0 +1,111 @@
+"""Test setup: the app's data, log and database paths point at a temporary directory."""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="panel-tests-")
+os.environ.setdefault("DATA_DIR", os.path.join(_TMP, "data"))
+os.environ.setdefault("LOG_DIR", os.path.join(_TMP, "logs"))
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_TMP}/test.db")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine on a fresh event loop against the test DB (schema created first).
+
+    Pooled connections belong to that loop, so the engine is disposed afterwards."""
+    from app.database.database import engine, init_db
+
+    def _run(coro):
+        async def main():
+            try:
+                await init_db()
+                return await coro
+            finally:
+                await engine.dispose()
+        return asyncio.run(main())
+    return _run
+
+
+async def _complete_setup() -> None:
+    from sqlalchemy import update
+
+    from app.database.database import async_session
+    from app.database.models import User
+
+    async with async_session() as db:
+        await db.execute(update(User).values(must_change_password=False, totp_verified=True))
+        await db.commit()
+
+
+@pytest.fixture(scope="session")
+def _app_client():
+    # The lifespan runs once per session: the scheduler is a module-level object bound to its first loop
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as c:
+        c.portal.call(_complete_setup)
+        response = c.post("/api/auth/login", json={"username": "Admin", "password": "Admin"})
+        assert response.status_code == 200, response.text
+        yield c
+
+
+@pytest.fixture
+def client(_app_client):
+    """TestClient of the app (lifespan included), logged in as the default admin with setup done.
+
+    Pooled connections belong to the client's loop, so the engine is disposed after each test."""
+    from app.database.database import engine
+
+    yield _app_client
+    _app_client.portal.call(engine.dispose)
+
+
+class HTTPStub:
+    """Local HTTP server answering with queued (status, headers, body) responses; the last one repeats."""
+
+    def __init__(self):
+        self.responses = [(200, {}, b"ok")]
+        self.requests = []  # (method, headers) per request
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _answer(self):
+                stub.requests.append((self.command, dict(self.headers)))
+                status, headers, body = stub.responses.pop(0) if len(stub.responses) > 1 else stub.responses[0]
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _answer
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def respond(self, *responses) -> None:
+        self.responses = list(responses)
+
+
+@pytest.fixture
+def http_stub():
+    stub = HTTPStub()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
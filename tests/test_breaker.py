@@ -0,0 +1,92 @@
+"""Per-host circuit breaker: closed -> open -> half_open -> closed / open."""
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.cronjob import breaker as breaker_module
+from app.services.cronjob.breaker import CLOSED, HALF_OPEN, OPEN, BreakerRegistry, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(breaker_module, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def _opened(threshold: int = 3):
+    breaker = BreakerRegistry(threshold, reset_seconds=30).for_url("http://api.example.com/job")
+    for _ in range(threshold):
+        breaker.acquire()
+        breaker.record_failure("connect refused")
+    return breaker
+
+
+def test_registry_is_per_host():
+    registry = BreakerRegistry(3, 30)
+    assert registry.for_url("http://A.example.com/x") is registry.for_url("http://a.example.com/y")
+    assert registry.for_url("http://a.example.com/") is not registry.for_url("http://b.example.com/")
+
+
+def test_opens_after_threshold_consecutive_failures(clock):
+    breaker = BreakerRegistry(3, 30).for_url("http://api.example.com/")
+    for _ in range(2):
+        breaker.acquire()
+        breaker.record_failure("timeout")
+    breaker.acquire()
+    breaker.record_success()  # resets the streak
+    for _ in range(2):
+        breaker.acquire()
+        breaker.record_failure("timeout")
+    assert breaker.state == CLOSED
+    breaker.acquire()
+    breaker.record_failure("timeout")
+    assert breaker.state == OPEN
+
+
+def test_open_fails_fast_until_reset(clock):
+    breaker = _opened()
+    with pytest.raises(CircuitOpenError, match="circuit open"):
+        breaker.acquire()
+    clock[0] += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    assert breaker.rejected == 2
+
+
+def test_half_open_allows_one_probe(clock):
+    breaker = _opened()
+    clock[0] += 30
+    breaker.acquire()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError, match="probe in flight"):
+        breaker.acquire()
+
+
+def test_probe_success_closes(clock):
+    breaker = _opened()
+    clock[0] += 30
+    breaker.acquire()
+    breaker.record_success()
+    assert (breaker.state, breaker.failures) == (CLOSED, 0)
+    breaker.acquire()
+
+
+def test_probe_failure_reopens(clock):
+    breaker = _opened()
+    clock[0] += 30
+    breaker.acquire()
+    breaker.record_failure("still down")
+    assert breaker.state == OPEN
+    assert breaker.opened_at == clock[0]
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+
+def test_cancelled_probe_lets_next_call_probe(clock):
+    breaker = _opened()
+    clock[0] += 30
+    breaker.acquire()
+    breaker.release()
+    breaker.acquire()
+    assert breaker.state == HALF_OPEN
@@ -0,0 +1,71 @@
+"""CronSpec against APScheduler's CronTrigger: same fire times, same rejected expressions."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from apscheduler.triggers.cron import CronTrigger
+
+from app.services.cronjob.cron import CronError, compile_cron, split_expression
+
+START = datetime(2024, 1, 1, 0, 0, 0)
+
+
+def _trigger_times(expression: str, after: datetime, n: int):
+    trigger = CronTrigger(timezone=timezone.utc, **split_expression(expression))
+    times, t = [], after.replace(tzinfo=timezone.utc)
+    for _ in range(n):
+        # get_next_fire_time returns the first time >= now: +1s makes it strictly after
+        t = trigger.get_next_fire_time(None, t + timedelta(seconds=1))
+        if t is None:
+            break
+        times.append(t.replace(tzinfo=None))
+    return times
+
+
+@pytest.mark.parametrize("expression, n", [
+    ("* * * * *", 200),
+    ("*/7 * * * *", 300),
+    ("5-55/10 */3 * * *", 300),
+    ("15,45 9-17 * * *", 200),
+    ("0 9-17/2 * * mon-fri", 200),
+    ("30 6 * jan,jul sun", 100),
+    ("0 0 1 */3 *", 40),
+    ("0 0 last * *", 40),
+    ("0 12 13 * fri", 15),        # day-of-month AND day-of-week
+    ("0 0 31 * *", 40),
+    ("0 0 29 feb *", 2),
+    ("0 22 * * sat-sun", 150),
+    ("0 12 * * 0", 100),           # 0 = Monday, as in CronTrigger
+    ("*/20 10 3 * * *", 200),      # 6 fields: seconds first
+    ("0 0-59/15 0 1,15 * *", 100),
+    ("0   0  * * *", 50),          # extra whitespace
+])
+def test_next_after_matches_crontrigger(expression, n):
+    spec = compile_cron(expression)
+    expected = _trigger_times(expression, START, n)
+    assert len(expected) == n
+    assert spec.next_n(START, n) == expected
+
+
+def test_next_after_is_strictly_after():
+    spec = compile_cron("*/5 * * * *")
+    assert spec.next_after(datetime(2024, 1, 1, 0, 5, 0)) == datetime(2024, 1, 1, 0, 10, 0)
+    assert spec.next_after(datetime(2024, 1, 1, 0, 4, 59, 999999)) == datetime(2024, 1, 1, 0, 5, 0)
+
+
+def test_impossible_date_has_no_next_fire():
+    assert compile_cron("0 0 30 feb *").next_after(START) is None
+
+
+@pytest.mark.parametrize("expression", [
+    "* * * *",
+    "61 * * * *",
+    "*/0 * * * *",
+    "* * * foo *",
+    "* 25 * * *",
+    "* * * * * * *",
+])
+def test_invalid_expressions_rejected(expression):
+    with pytest.raises(CronError):
+        compile_cron(expression)
+    with pytest.raises(ValueError):
+        CronTrigger(timezone=timezone.utc, **split_expression(expression))
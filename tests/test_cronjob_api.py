@@ -0,0 +1,111 @@
+"""Cronjob API: listing (filters, sort, paging, ETag) and bulk changes."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app.database.database import async_session
+from app.database.models import Cronjob, CronjobLog
+
+FIRED = datetime(2024, 3, 1, 12, 0)
+
+
+def _create(client, name, **fields):
+    body = {"name": name, "url": "http://127.0.0.1:9/", "cron_expression": "0 0 1 1 *", **fields}
+    response = client.post("/api/cronjobs", json=body)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def _last_fire_at(client, ids):
+    async def query():
+        async with async_session() as db:
+            return dict((await db.execute(select(Cronjob.id, Cronjob.last_fire_at).where(Cronjob.id.in_(ids)))).all())
+    return client.portal.call(query)
+
+
+def _add_runs(client, cronjob_id, *statuses):
+    """Log rows in the last hour, oldest first."""
+    async def add():
+        now = datetime.utcnow()
+        async with async_session() as db:
+            db.add_all(
+                CronjobLog(cronjob_id=cronjob_id, status=status, executed_at=now - timedelta(minutes=len(statuses) - i))
+                for i, status in enumerate(statuses)
+            )
+            await db.commit()
+    client.portal.call(add)
+
+
+def _list(client, **params):
+    response = client.get("/api/cronjobs", params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def _names(response):
+    return [job["name"] for job in response.json()]
+
+
+def test_list_filters_sort_and_paging(client):
+    alpha = _create(client, "listtest alpha")
+    beta = _create(client, "listtest beta", enabled=False)
+    _create(client, "listtest gamma")
+    _add_runs(client, alpha, "failed", "success")
+    _add_runs(client, beta, "success", "failed")
+
+    response = _list(client, q="LISTTEST", sort="-name", limit=2)
+    assert _names(response) == ["listtest gamma", "listtest beta"]
+    assert response.headers["x-total-count"] == "3"
+    response = _list(client, q="listtest", sort="-name", limit=2, offset=2)
+    assert _names(response) == ["listtest alpha"]
+    assert response.headers["x-total-count"] == "3"
+
+    assert _names(_list(client, q="listtest", enabled="false")) == ["listtest beta"]
+    assert _names(_list(client, q="listtest", last_status="failed")) == ["listtest beta"]
+    assert _names(_list(client, q="listtest", last_status="never")) == ["listtest gamma"]
+
+    jobs = {job["name"]: job for job in _list(client, q="listtest").json()}
+    assert jobs["listtest alpha"]["last_run"]["status"] == "success"
+    assert (jobs["listtest alpha"]["runs_24h"], jobs["listtest alpha"]["success_rate_24h"]) == (2, 0.5)
+    assert jobs["listtest gamma"]["last_run"] is None
+
+    assert _names(_list(client, q="listtest", sort="last_status", enabled="true")) == [
+        "listtest gamma", "listtest alpha",  # never run sorts first
+    ]
+
+
+def test_list_invalid_sort_is_rejected(client):
+    assert client.get("/api/cronjobs", params={"sort": "url"}).status_code == 422
+
+
+def test_list_etag_revalidation(client):
+    job_id = _create(client, "etagtest job")
+    first = _list(client, q="etagtest")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    again = client.get("/api/cronjobs", params={"q": "etagtest"}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+    # a new run changes the list
+    _add_runs(client, job_id, "success")
+    changed = client.get("/api/cronjobs", params={"q": "etagtest"}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()[0]["last_run"]["status"] == "success"
+
+
+def test_bulk_enable_resets_only_jobs_switched_on(client):
+    on = _create(client, "bulk on")
+    off = _create(client, "bulk off", enabled=False)
+
+    async def fired():
+        async with async_session() as db:
+            await db.execute(update(Cronjob).where(Cronjob.id.in_([on, off])).values(last_fire_at=FIRED))
+            await db.commit()
+    client.portal.call(fired)
+
+    response = client.post("/api/cronjobs/bulk", json={"enable": [on, off]})
+    assert response.status_code == 200, response.text
+    assert _last_fire_at(client, [on, off]) == {on: FIRED, off: None}
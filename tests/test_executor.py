@@ -0,0 +1,170 @@
+"""execute_cronjob against a local HTTP stub: retries, their log rows and change detection."""
+import asyncio
+
+from sqlalchemy import select
+
+from app.database.database import async_session
+from app.database.models import Cronjob, CronjobLog
+from app.services.cronjob import executor
+from app.services.cronjob.executor import execute_cronjob, execute_cronjob_by_id
+
+
+async def _job(url: str, **fields) -> int:
+    async with async_session() as db:
+        job = Cronjob(name="executor test", url=url, cron_expression="0 0 1 1 *", **fields)
+        db.add(job)
+        await db.commit()
+        return job.id
+
+
+async def _logs(cronjob_id: int):
+    async with async_session() as db:
+        result = await db.execute(
+            select(CronjobLog.attempt, CronjobLog.status, CronjobLog.status_code, CronjobLog.output)
+            .where(CronjobLog.cronjob_id == cronjob_id).order_by(CronjobLog.id)
+        )
+        return [tuple(row) for row in result.all()]
+
+
+def test_retries_log_every_attempt(run, http_stub, monkeypatch):
+    monkeypatch.setattr(executor, "_retry_delay", lambda attempt, backoff: 0)
+    http_stub.respond((503, {}, b"busy"), (502, {}, b"bad gateway"), (200, {}, b"done"))
+
+    async def scenario():
+        job_id = await _job(http_stub.url)
+        status, _ = await execute_cronjob(job_id, http_stub.url, "CURL", max_retries=3)
+        return status, await _logs(job_id)
+
+    status, logs = run(scenario())
+    assert status == "success"
+    assert logs == [(1, "failed", 503, "busy"), (2, "failed", 502, "bad gateway"), (3, "success", 200, "done")]
+
+
+def test_retries_stop_at_max_retries(run, http_stub, monkeypatch):
+    monkeypatch.setattr(executor, "_retry_delay", lambda attempt, backoff: 0)
+    http_stub.respond((503, {}, b"busy"))
+
+    async def scenario():
+        job_id = await _job(http_stub.url)
+        status, _ = await execute_cronjob(job_id, http_stub.url, "CURL", max_retries=1)
+        return status, await _logs(job_id)
+
+    status, logs = run(scenario())
+    assert status == "failed"
+    assert [row[:2] for row in logs] == [(1, "failed"), (2, "failed")]
+    assert len(http_stub.requests) == 2
+
+
+def test_client_error_is_not_retried(run, http_stub):
+    http_stub.respond((404, {}, b"missing"))
+
+    async def scenario():
+        job_id = await _job(http_stub.url)
+        await execute_cronjob(job_id, http_stub.url, "CURL", max_retries=3)
+        return await _logs(job_id)
+
+    assert run(scenario()) == [(1, "failed", 404, "missing")]
+
+
+def test_open_breaker_skips_the_request(run, http_stub):
+    breaker = executor.breakers.for_url(http_stub.url)
+    for _ in range(executor.breakers.threshold):
+        breaker.acquire()
+        breaker.record_failure("connect refused")
+
+    async def scenario():
+        job_id = await _job(http_stub.url)
+        status, _ = await execute_cronjob(job_id, http_stub.url, "CURL", max_retries=3)
+        async with async_session() as db:
+            error = (await db.execute(select(CronjobLog.error).where(CronjobLog.cronjob_id == job_id))).scalar_one()
+        return status, error
+
+    status, error = run(scenario())
+    assert status == "error"
+    assert error.startswith("circuit open")
+    assert http_stub.requests == []
+
+
+async def _fingerprint(cronjob_id: int):
+    async with async_session() as db:
+        result = await db.execute(
+            select(Cronjob.http_etag, Cronjob.body_hash, Cronjob.content_changed_at).where(Cronjob.id == cronjob_id)
+        )
+        return result.one()
+
+
+async def _follow_ups_done() -> None:
+    await asyncio.gather(*list(executor._follow_ups.values()))
+
+
+def test_unchanged_body_is_logged_without_output(run, http_stub):
+    http_stub.respond((200, {}, b"same content"))
+
+    async def scenario():
+        target = await _job(http_stub.url, enabled=False)
+        job_id = await _job(http_stub.url, change_detection=True, on_change_cronjob_id=target)
+        first = await execute_cronjob_by_id(job_id)
+        baseline = await _fingerprint(job_id)
+        second = await execute_cronjob_by_id(job_id)
+        await _follow_ups_done()
+        return first[0], second[0], baseline, await _fingerprint(job_id), await _logs(job_id), await _logs(target)
+
+    first, second, baseline, after, logs, target_logs = run(scenario())
+    assert (first, second) == ("success", "unchanged")
+    assert logs == [(1, "success", 200, "same content"), (1, "unchanged", 200, None)]
+    assert baseline.body_hash is not None
+    # same fingerprint: content_changed_at stays at the first fetch
+    assert after == baseline
+    # the first fetch only sets the baseline, an unchanged one triggers nothing
+    assert target_logs == []
+
+
+def test_etag_revalidation_304_is_unchanged(run, http_stub):
+    http_stub.respond((200, {"ETag": '"v1"'}, b"payload"), (304, {"ETag": '"v1"'}, b""))
+
+    async def scenario():
+        job_id = await _job(http_stub.url, change_detection=True)
+        await execute_cronjob_by_id(job_id)
+        status, _ = await execute_cronjob_by_id(job_id)
+        return status, await _logs(job_id), (await _fingerprint(job_id)).http_etag
+
+    status, logs, etag = run(scenario())
+    assert status == "unchanged"
+    assert logs[-1] == (1, "unchanged", 304, None)
+    assert etag == '"v1"'
+    assert "If-None-Match" not in http_stub.requests[0][1]
+    assert http_stub.requests[1][1]["If-None-Match"] == '"v1"'
+
+
+def test_changed_body_runs_on_change_job(run, http_stub):
+    http_stub.respond((200, {}, b"version 1"), (200, {}, b"version 2"))
+
+    async def scenario():
+        target = await _job(http_stub.url, enabled=False)
+        job_id = await _job(http_stub.url, change_detection=True, on_change_cronjob_id=target)
+        await execute_cronjob_by_id(job_id)
+        baseline = await _fingerprint(job_id)
+        status, _ = await execute_cronjob_by_id(job_id)
+        await _follow_ups_done()
+        return status, baseline, await _fingerprint(job_id), await _logs(target)
+
+    status, baseline, after, target_logs = run(scenario())
+    assert status == "success"
+    assert after.body_hash != baseline.body_hash
+    assert after.content_changed_at > baseline.content_changed_at
+    assert [row[1] for row in target_logs] == ["success"]
+
+
+def test_disabled_change_detection_sends_no_validators(run, http_stub):
+    http_stub.respond((200, {"ETag": '"v1"'}, b"payload"))
+
+    async def scenario():
+        job_id = await _job(http_stub.url)
+        await execute_cronjob_by_id(job_id)
+        await execute_cronjob_by_id(job_id)
+        return await _logs(job_id), await _fingerprint(job_id)
+
+    logs, fingerprint = run(scenario())
+    assert [row[1] for row in logs] == ["success", "success"]
+    assert fingerprint.body_hash is None
+    assert all("If-None-Match" not in headers for _, headers in http_stub.requests)
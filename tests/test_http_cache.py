@@ -0,0 +1,44 @@
+"""Page cache and static asset versioning."""
+import os
+
+from fastapi.templating import Jinja2Templates
+from starlette.datastructures import Headers
+
+from app.http_cache import AssetStaticFiles, PageCache
+
+
+class _Request:
+    headers = Headers({})
+
+
+def _setup(tmp_path):
+    (tmp_path / "templates").mkdir()
+    (tmp_path / "static").mkdir()
+    (tmp_path / "templates" / "page.html").write_text("<link href=\"{{ static_url('app.css') }}\">")
+    (tmp_path / "static" / "app.css").write_text("body { color: red }")
+    static_files = AssetStaticFiles(directory=str(tmp_path / "static"))
+    return static_files, PageCache(Jinja2Templates(directory=str(tmp_path / "templates")), static_files)
+
+
+def test_page_links_current_asset_hash(tmp_path):
+    static_files, pages = _setup(tmp_path)
+    first = pages.response(_Request(), "page.html")
+    assert static_files.url("app.css").encode() in first.body
+
+    css = tmp_path / "static" / "app.css"
+    css.write_text("body { color: blue }")
+    st = css.stat()
+    os.utime(css, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    second = pages.response(_Request(), "page.html")
+    assert static_files.url("app.css").encode() in second.body
+    assert second.body != first.body
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_page_rendered_once_while_assets_unchanged(tmp_path):
+    static_files, pages = _setup(tmp_path)
+    pages.response(_Request(), "page.html")
+    cached = pages._pages["page.html"]
+    pages.response(_Request(), "page.html")
+    assert pages._pages["page.html"] is cached
@@ -0,0 +1,111 @@
+"""Log export streaming across the main DB and the monthly archive files."""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database.database import async_session
+from app.database.models import Cronjob, CronjobLog
+from app.services.cronjob import archive, log_export
+
+CUTOFF = datetime(2024, 3, 1)
+# Two archived months (January, February) and three rows left in the main DB
+EXECUTED = [datetime(2024, 1, 30, 12), datetime(2024, 1, 31, 12), datetime(2024, 2, 10, 8),
+            datetime(2024, 2, 28, 23, 59), datetime(2024, 3, 1), datetime(2024, 3, 2), datetime(2024, 3, 5)]
+
+
+@pytest.fixture
+def archived_job(client, tmp_path, monkeypatch):
+    """Job whose older logs were moved to archive files; -> (job id, log ids oldest first)."""
+    monkeypatch.setattr(archive, "LOG_ARCHIVE_DIR", tmp_path / "archive")
+    monkeypatch.setattr(archive, "_listing", (None, []))
+    monkeypatch.setattr(log_export, "BATCH_SIZE", 2)
+
+    async def setup():
+        async with async_session() as db:
+            job = Cronjob(name="export test", url="http://127.0.0.1:9/", cron_expression="0 0 1 1 *")
+            db.add(job)
+            await db.flush()
+            logs = [
+                CronjobLog(cronjob_id=job.id, status="success", status_code=200, duration_ms=5,
+                           output=f"run {i}", executed_at=at)
+                for i, at in enumerate(EXECUTED)
+            ]
+            db.add_all(logs)
+            await db.commit()
+            ids = [log.id for log in logs]
+        await archive.archive_old_logs(CUTOFF)
+        return job.id, ids
+
+    return client.portal.call(setup)
+
+
+def _export(client, job_id, accept_encoding="identity", **params):
+    response = client.get(
+        "/api/cronjobs/logs/export",
+        params={"cronjob_id": job_id, **params},
+        headers={"Accept-Encoding": accept_encoding},
+    )
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_rows_split_between_main_db_and_archive(archived_job):
+    job_id, ids = archived_job
+    assert [start.month for start, _ in archive.archive_months()] == [1, 2]
+
+
+def test_ndjson_merges_hot_and_archived_rows_in_id_order(client, archived_job):
+    job_id, ids = archived_job
+    rows = [json.loads(line) for line in _export(client, job_id, include_output=True).text.splitlines()]
+    assert [r["id"] for r in rows] == ids
+    assert [r["output"] for r in rows] == [f"run {i}" for i in range(len(ids))]
+    assert [datetime.fromisoformat(r["executed_at"]) for r in rows] == EXECUTED
+
+
+def test_csv_export_crosses_the_boundary(client, archived_job):
+    job_id, ids = archived_job
+    reader = csv.DictReader(io.StringIO(_export(client, job_id, format="csv").text))
+    rows = list(reader)
+    assert "output" not in reader.fieldnames
+    assert [int(r["id"]) for r in rows] == ids
+    assert rows[0]["executed_at"] == EXECUTED[0].isoformat()
+
+
+def test_resume_after_id_inside_the_archive(client, archived_job):
+    job_id, ids = archived_job
+    rows = [json.loads(line) for line in _export(client, job_id, after_id=ids[1]).text.splitlines()]
+    assert [r["id"] for r in rows] == ids[2:]
+
+
+def test_time_range_selects_archived_months(client, archived_job):
+    job_id, ids = archived_job
+    rows = _export(client, job_id, since="2024-02-01T00:00:00", until="2024-03-02T00:00:00").text.splitlines()
+    assert [json.loads(line)["id"] for line in rows] == ids[2:5]
+
+
+def test_row_still_in_main_db_is_exported_once(client, archived_job):
+    job_id, ids = archived_job
+
+    async def rearchive_without_delete():
+        # the archiver wrote the batch but crashed before deleting it from the main DB
+        fields = {"id": ids[-1] + 1000, "cronjob_id": job_id, "status": "success",
+                  "executed_at": CUTOFF - timedelta(days=1)}
+        async with async_session() as db:
+            db.add(CronjobLog(**fields))
+            await db.commit()
+        archive._write_rows([tuple(fields.get(c) for c in archive.COLUMNS)])
+
+    client.portal.call(rearchive_without_delete)
+    rows = [json.loads(line)["id"] for line in _export(client, job_id).text.splitlines()]
+    assert rows == ids + [ids[-1] + 1000]
+
+
+def test_gzip_export(client, archived_job):
+    job_id, ids = archived_job
+    response = _export(client, job_id, accept_encoding="gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    # decoded by the client
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ids
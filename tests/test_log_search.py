@@ -0,0 +1,109 @@
+"""Full-text log search: matching, bm25 cursor paging, query errors."""
+import pytest
+
+from app.database.database import async_session
+from app.database.models import Cronjob, CronjobLog
+from app.services.cronjob import archive
+from app.services.cronjob.search import SearchQueryError, build_match
+
+
+@pytest.fixture
+def no_archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "LOG_ARCHIVE_DIR", tmp_path / "archive")
+    monkeypatch.setattr(archive, "_listing", (None, []))
+    return tmp_path / "archive"
+
+
+def _add_logs(client, name, rows):
+    """rows: (status, output, error) -> (job id, log ids)."""
+    async def add():
+        async with async_session() as db:
+            job = Cronjob(name=name, url="http://127.0.0.1:9/", cron_expression="0 0 1 1 *")
+            db.add(job)
+            await db.flush()
+            logs = [CronjobLog(cronjob_id=job.id, status=s, output=o, error=e) for s, o, e in rows]
+            db.add_all(logs)
+            await db.commit()
+            return job.id, [log.id for log in logs]
+    return client.portal.call(add)
+
+
+def _search(client, **params):
+    return client.get("/api/cronjobs/logs/search", params=params)
+
+
+def test_build_match():
+    assert build_match("disk full", raw=False) == '"disk" "full"*'
+    assert build_match('error:"disk full"', raw=True) == 'error:"disk full"'
+    with pytest.raises(SearchQueryError):
+        build_match("!!! ---", raw=False)
+
+
+def test_search_matches_output_and_error(client, no_archive):
+    job_id, ids = _add_logs(client, "search basic", [
+        ("success", "backup quokkaplain finished", None),
+        ("error", None, "connect quokkaplain refused"),
+        ("success", "nothing to see", None),
+    ])
+    body = _search(client, q="quokkaplain").json()
+    assert {h["log_id"] for h in body["hits"]} == set(ids[:2])
+    # an error match weighs more than an output match
+    assert body["hits"][0]["log_id"] == ids[1]
+    assert body["hits"][0]["error_snippet"] == "connect [[quokkaplain]] refused"
+    assert body["hits"][1]["output_snippet"] == "backup [[quokkaplain]] finished"
+    assert body["hits"][0]["cronjob_name"] == "search basic"
+    assert body["next_cursor"] is None
+    assert body["archived_excluded"] is False
+
+
+def test_prefix_match_and_job_filter(client, no_archive):
+    job_a, ids_a = _add_logs(client, "search a", [("success", "wombatprefix123 ok", None)])
+    job_b, ids_b = _add_logs(client, "search b", [("success", "wombatprefix456 ok", None)])
+    assert {h["log_id"] for h in _search(client, q="wombatpref").json()["hits"]} == {ids_a[0], ids_b[0]}
+    assert [h["log_id"] for h in _search(client, q="wombatpref", cronjob_id=job_b).json()["hits"]] == ids_b
+
+
+def test_cursor_pages_cover_every_hit_once(client, no_archive):
+    # different lengths -> different bm25 scores; equal ones tie-break on id
+    rows = [("success", "numbatpage " + "filler " * (i % 3), None) for i in range(7)]
+    job_id, ids = _add_logs(client, "search paging", rows)
+    seen, keys, cursor = [], [], None
+    while True:
+        params = {"q": "numbatpage", "limit": 3, **({"cursor": cursor} if cursor else {})}
+        body = _search(client, **params).json()
+        assert len(body["hits"]) <= 3
+        seen += [h["log_id"] for h in body["hits"]]
+        keys += [(h["score"], h["log_id"]) for h in body["hits"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(seen) == ids
+    assert keys == sorted(keys)
+
+
+def test_raw_fts_syntax(client, no_archive):
+    job_id, ids = _add_logs(client, "search raw", [
+        ("error", "dingoraw", "timeout"),
+        ("error", "dingoraw", "refused"),
+    ])
+    hits = _search(client, q="dingoraw NOT error:timeout", raw="true").json()["hits"]
+    assert [h["log_id"] for h in hits] == [ids[1]]
+
+
+@pytest.mark.parametrize("params", [
+    {"q": '"unterminated', "raw": "true"},
+    {"q": "error:", "raw": "true"},
+    {"q": "!!!"},
+    {"q": "numbat", "cursor": "not-a-cursor"},
+])
+def test_invalid_query_is_400(client, no_archive, params):
+    response = _search(client, **params)
+    assert response.status_code == 400, response.text
+
+
+def test_archived_logs_reported_as_excluded(client, no_archive):
+    no_archive.mkdir()
+    archive.month_path("2024-02").touch()
+    body = _search(client, q="anything").json()
+    assert body["archived_excluded"] is True
+    assert body["archived_before"] == "2024-03-01T00:00:00"
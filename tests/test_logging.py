@@ -0,0 +1,32 @@
+"""Log rate limiting."""
+import logging
+
+from app.logging_config import RateLimitFilter
+
+
+def _record(msg: str, level: int = logging.WARNING, lineno: int = 10) -> logging.LogRecord:
+    return logging.LogRecord("app.test", level, "/app/test.py", lineno, msg, None, None)
+
+
+def test_budget_is_per_message():
+    limiter = RateLimitFilter(limit=2, window=60)
+    assert [limiter.filter(_record("Cronjob 1 failed")) for _ in range(4)] == [True, True, False, False]
+    # same call site, other job: its own budget
+    assert [limiter.filter(_record("Cronjob 2 failed")) for _ in range(2)] == [True, True]
+
+
+def test_errors_never_dropped():
+    limiter = RateLimitFilter(limit=1, window=60)
+    assert all(limiter.filter(_record("boom", logging.ERROR)) for _ in range(5))
+
+
+def test_suppressed_count_reported_after_window():
+    limiter = RateLimitFilter(limit=1, window=60)
+    limiter.filter(_record("loop stalled"))
+    limiter.filter(_record("loop stalled"))
+    limiter.filter(_record("loop stalled"))
+    for site in limiter._sites.values():
+        site[0] -= 61
+    record = _record("loop stalled")
+    assert limiter.filter(record)
+    assert record.getMessage() == "loop stalled (2 similar messages suppressed in the last 60s)"
@@ -0,0 +1,146 @@
+"""MisfireTracker decisions per misfire_policy (every-minute schedule, times in naive UTC)."""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.cronjob import misfire
+from app.services.cronjob.misfire import Fire, MisfireTracker, slots_between
+
+EVERY_MINUTE = "* * * * *"
+T0 = datetime(2024, 3, 1, 12, 0, 0)
+
+
+def _tracker(policy: str, last: datetime = T0) -> MisfireTracker:
+    tracker = MisfireTracker()
+    tracker.sync([(1, EVERY_MINUTE, 0, policy, last)])
+    return tracker
+
+
+def test_slots_between_is_exclusive_inclusive():
+    slots, truncated = slots_between(EVERY_MINUTE, 0, T0, T0 + timedelta(minutes=3))
+    assert slots == [T0 + timedelta(minutes=m) for m in (1, 2, 3)]
+    assert not truncated
+    assert slots_between(EVERY_MINUTE, 0, T0, T0 + timedelta(minutes=3), limit=2) == (slots[:2], True)
+
+
+def test_on_time_fire_runs():
+    tracker = _tracker("coalesce")
+    at = T0 + timedelta(minutes=1)
+    assert tracker.plan(1, at, at + timedelta(seconds=1)) == (Fire(1, at), [])
+    assert tracker.jobs[1].last == at
+
+
+def test_duplicate_fire_is_dropped():
+    tracker = _tracker("replay_all")
+    at = T0 + timedelta(minutes=1)
+    tracker.plan(1, at, at)
+    assert tracker.plan(1, at, at) == (None, [])
+
+
+def test_unknown_job_runs_as_is():
+    assert MisfireTracker().plan(7, T0, T0) == (Fire(7, T0), [])
+
+
+@pytest.mark.parametrize("policy", ["skip", "coalesce", "replay_all"])
+def test_gap_before_on_time_fire(policy):
+    # Fires at 12:01..12:04 were never dispatched; 12:05 arrives on time
+    tracker = _tracker(policy)
+    at = T0 + timedelta(minutes=5)
+    now_fire, queued = tracker.plan(1, at, at + timedelta(seconds=1))
+    if policy == "skip":
+        assert (now_fire, queued) == (Fire(1, at), [])
+    elif policy == "coalesce":
+        assert (now_fire, queued) == (Fire(1, at, "coalesced", 4), [])
+    else:
+        assert now_fire == Fire(1, at)
+        assert queued == [Fire(1, T0 + timedelta(minutes=m), "replayed", 1) for m in range(1, 5)]
+    assert tracker.jobs[1].last == at
+
+
+@pytest.mark.parametrize("policy", ["skip", "coalesce", "replay_all"])
+def test_late_fire(policy):
+    # The 12:01 fire is dispatched at 12:03:30 (stalled loop): 12:01..12:03 are missed
+    tracker = _tracker(policy)
+    at, now = T0 + timedelta(minutes=1), T0 + timedelta(minutes=3, seconds=30)
+    now_fire, queued = tracker.plan(1, at, now)
+    assert now_fire is None
+    if policy == "skip":
+        assert queued == []
+    elif policy == "coalesce":
+        assert queued == [Fire(1, T0 + timedelta(minutes=3), "coalesced", 3)]
+    else:
+        assert [f.scheduled_at for f in queued] == [T0 + timedelta(minutes=m) for m in (1, 2, 3)]
+    # The 12:02 / 12:03 dispatches still to come are already handled
+    assert tracker.plan(1, T0 + timedelta(minutes=3), now) == (None, [])
+
+
+def test_replay_all_keeps_the_most_recent(monkeypatch):
+    monkeypatch.setattr(misfire, "MISFIRE_REPLAY_MAX", 3)
+    tracker = _tracker("replay_all")
+    at = T0 + timedelta(minutes=10)
+    _, queued = tracker.plan(1, at, at)
+    assert [f.scheduled_at for f in queued] == [T0 + timedelta(minutes=m) for m in (7, 8, 9)]
+
+
+def test_sync_keeps_newer_memory_and_resets_on_null():
+    tracker = _tracker("coalesce")
+    at = T0 + timedelta(minutes=2)
+    tracker.plan(1, at, at)
+    tracker.sync([(1, EVERY_MINUTE, 0, "coalesce", T0)])  # stored value not flushed yet
+    assert tracker.jobs[1].last == at
+    tracker.sync([(1, EVERY_MINUTE, 0, "coalesce", None)])  # schedule edited
+    assert tracker.jobs[1].last is None
+
+
+def test_catch_up_all():
+    tracker = MisfireTracker()
+    tracker.sync([
+        (1, EVERY_MINUTE, 0, "skip", T0),
+        (2, EVERY_MINUTE, 0, "coalesce", T0),
+        (3, EVERY_MINUTE, 0, "replay_all", T0),
+        (4, EVERY_MINUTE, 0, "replay_all", None),  # never fired: nothing counts as missed
+    ])
+    now = T0 + timedelta(minutes=3, seconds=10)
+    queued = asyncio.run(tracker.catch_up_all(now))
+    assert queued == [
+        Fire(2, T0 + timedelta(minutes=3), "coalesced", 3),
+        *[Fire(3, T0 + timedelta(minutes=m), "replayed", 1) for m in (1, 2, 3)],
+    ]
+    assert all(tracker.jobs[i].last == now for i in (1, 2, 3))
+    assert tracker.jobs[4].last is None
+
+
+def test_flush_survives_deleted_job(run):
+    from sqlalchemy import delete, select
+
+    from app.database.database import async_session
+    from app.database.models import Cronjob
+
+    async def scenario():
+        async with async_session() as db:
+            jobs = [Cronjob(name=f"flush {i}", url="http://127.0.0.1:9/", cron_expression=EVERY_MINUTE) for i in range(2)]
+            db.add_all(jobs)
+            await db.commit()
+            kept, gone = jobs[0].id, jobs[1].id
+        tracker = MisfireTracker()
+        tracker.sync([(i, EVERY_MINUTE, 0, "coalesce", T0) for i in (kept, gone)])
+        at = T0 + timedelta(minutes=1)
+        tracker.plan(kept, at, at)
+        tracker.plan(gone, at, at)
+        async with async_session() as db:
+            await db.execute(delete(Cronjob).where(Cronjob.id == gone))
+            await db.commit()
+        await tracker.flush()  # before the reload notices the deletion: the missing row is ignored
+        dirty_after_flush = dict(tracker._dirty)
+        tracker.plan(kept, at + timedelta(minutes=1), at + timedelta(minutes=1))
+        tracker.plan(gone, at + timedelta(minutes=1), at + timedelta(minutes=1))
+        tracker.sync([(kept, EVERY_MINUTE, 0, "coalesce", at)])  # reload without the deleted job
+        async with async_session() as db:
+            stored = (await db.execute(select(Cronjob.last_fire_at).where(Cronjob.id == kept))).scalar_one()
+        return kept, gone, dirty_after_flush, dict(tracker._dirty), stored
+
+    kept, gone, dirty_after_flush, dirty_after_sync, stored = run(scenario())
+    assert dirty_after_flush == {}
+    assert stored == T0 + timedelta(minutes=1)
+    assert list(dirty_after_sync) == [kept]
@@ -0,0 +1,42 @@
+"""Dependency graph helpers: cycle detection and critical path."""
+from app.services.cronjob.workflow import critical_path, find_cycle
+
+
+def test_no_cycle():
+    assert find_cycle({1: [], 2: [1], 3: [1, 2], 4: [3]}) is None
+    assert find_cycle({}) is None
+
+
+def test_self_loop():
+    assert find_cycle({1: [1]}) == [1, 1]
+
+
+def test_cycle_is_reported_as_a_path():
+    cycle = find_cycle({1: [2], 2: [3], 3: [1], 4: [1]})
+    assert cycle[0] == cycle[-1]
+    assert sorted(cycle[:-1]) == [1, 2, 3]
+    graph = {1: [2], 2: [3], 3: [1]}
+    for a, b in zip(cycle, cycle[1:]):
+        assert b in graph[a]
+
+
+def test_cycle_through_unlisted_node():
+    # Node 3 only appears as a dependency; the cycle 1 -> 2 -> 1 is still found
+    assert find_cycle({1: [2, 3], 2: [1]}) in ([1, 2, 1], [2, 1, 2])
+
+
+def test_critical_path_picks_the_longest_chain():
+    #   1 (100) -> 3 (50) -> 4 (10)
+    #   2 (300) ----^
+    graph = {1: [], 2: [], 3: [1, 2], 4: [3]}
+    assert critical_path(graph, {1: 100, 2: 300, 3: 50, 4: 10}) == ([2, 3, 4], 360)
+
+
+def test_critical_path_independent_branches():
+    graph = {1: [], 2: [1], 3: []}
+    assert critical_path(graph, {1: 10, 2: 10, 3: 50}) == ([3], 50)
+
+
+def test_critical_path_missing_durations_count_as_zero():
+    assert critical_path({1: [], 2: [1]}, {2: 5}) == ([1, 2], 5)
+    assert critical_path({}, {}) == ([], 0)